@@ -0,0 +1,311 @@
+# apify_fetcher.py
+# Concurrent Competitor Fetcher (Apify)
+# Runs the configured Apify actor for many competitor profile URLs at once (bounded
+# by APIFY_FETCH_CONCURRENCY) over pooled HTTP sessions, with retries and backoff.
+# Dataset items are cached on disk per (actor, input) with a TTL (a run-sync call
+# always starts a new actor run, so there is nothing to revalidate against), and
+# stream out as raw post records for wpil_pipeline as each URL completes.
+#
+#   python apify_fetcher.py https://www.tiktok.com/@someone --niche leadership --dry-run
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import jobs
+from config import settings
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Field names used by the common Apify scrapers, first match wins
+TEXT_FIELDS = ("text", "caption", "description", "full_text", "postText", "content")
+METRIC_FIELDS = {
+    "likes": ("diggCount", "likesCount", "likeCount", "likes", "numLikes", "reactionCount", "favorite_count"),
+    "comments": ("commentCount", "commentsCount", "comments", "numComments", "reply_count", "replyCount"),
+    "shares": ("shareCount", "sharesCount", "shares", "numShares", "repostCount", "retweetCount", "retweet_count"),
+}
+DATE_FIELDS = ("createTimeISO", "createTime", "postedAt", "timestamp", "created_at", "createdAt", "date")
+
+_state = {"pid": None, "pool": None}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class FetchError(RuntimeError):
+    pass
+
+
+def platform_of(url: str) -> str:
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    if host.endswith("tiktok.com"):
+        return "tiktok"
+    if host.endswith("linkedin.com"):
+        return "linkedin"
+    if host.endswith("twitter.com") or host == "x.com" or host.endswith(".x.com"):
+        return "twitter"
+    return ""
+
+
+def actor_for(platform: str) -> Optional[str]:
+    return {
+        "tiktok": settings.APIFY_TIKTOK_PROFILE_ACTOR,
+        "linkedin": settings.APIFY_LINKEDIN_PROFILE_ACTOR,
+        "twitter": settings.APIFY_TWITTER_PROFILE_ACTOR,
+    }.get(platform)
+
+
+def actor_input(url: str) -> Dict:
+    # Covers the profile scrapers' usual input names; actors ignore unknown fields
+    return {"profiles": [url], "startUrls": [{"url": url}], "resultsPerPage": settings.APIFY_MAX_ITEMS,
+            "maxItems": settings.APIFY_MAX_ITEMS}
+
+
+# ---------- HTTP ----------
+
+def _pool() -> ThreadPoolExecutor:
+    with _lock:
+        if _state["pid"] != os.getpid():
+            _state["pool"] = ThreadPoolExecutor(max_workers=settings.APIFY_FETCH_CONCURRENCY, thread_name_prefix="apify")
+            _state["pid"] = os.getpid()
+        return _state["pool"]
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None or getattr(_local, "pid", None) != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=settings.APIFY_FETCH_CONCURRENCY)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if settings.APIFY_API_KEY:
+            session.headers["Authorization"] = f"Bearer {settings.APIFY_API_KEY}"
+        _local.session, _local.pid = session, os.getpid()
+    return session
+
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), settings.APIFY_RETRY_MAX_SEC)
+        except ValueError:
+            pass
+    delay = settings.APIFY_RETRY_BACKOFF_SEC * (2 ** attempt)
+    return min(delay, settings.APIFY_RETRY_MAX_SEC) * random.uniform(0.5, 1.0)  # jitter spreads the retries
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """One HTTP call with retries on connection errors, 408, 429 and 5xx."""
+    last = None
+    for attempt in range(settings.APIFY_FETCH_RETRIES + 1):
+        retry_after = None
+        try:
+            res = _session().request(method, url, timeout=settings.APIFY_FETCH_TIMEOUT_SEC, **kwargs)
+            if res.status_code not in RETRY_STATUSES:
+                return res
+            last = f"HTTP {res.status_code}"
+            retry_after = res.headers.get("Retry-After")
+        except requests.RequestException as e:
+            last = str(e)[:80]
+        if attempt < settings.APIFY_FETCH_RETRIES:
+            time.sleep(_backoff(attempt, retry_after))
+    raise FetchError(f"{method} {urllib.parse.urlsplit(url).path} failed after {settings.APIFY_FETCH_RETRIES + 1} attempts: {last}")
+
+
+# ---------- Disk cache ----------
+
+def cache_key(actor: str, payload: Dict) -> str:
+    raw = json.dumps({"actor": actor, "input": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(settings.APIFY_CACHE_DIR, f"{key}.json")
+
+
+def _cache_read(key: str) -> Optional[Dict]:
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_write(key: str, entry: Dict) -> None:
+    os.makedirs(settings.APIFY_CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    evict()
+
+
+def evict() -> int:
+    """
+    Deletes expired entries, then the oldest ones until the directory fits
+    APIFY_CACHE_MAX_BYTES. Returns how many entries were removed.
+    """
+    entries = []
+    try:
+        with os.scandir(settings.APIFY_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    expired_before = time.time() - settings.APIFY_CACHE_TTL_SEC
+    removed = 0
+    for mtime, size, path in entries:
+        if mtime >= expired_before and total <= settings.APIFY_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def run_actor(actor: str, payload: Dict) -> Tuple[List[Dict], str]:
+    """
+    Dataset items of one actor run, and where they came from: "cache" (entry younger
+    than APIFY_CACHE_TTL_SEC) or "fetched".
+    """
+    key = cache_key(actor, payload)
+    entry = _cache_read(key)
+    now = time.time()
+    if entry is not None and now - entry["fetched_at"] < settings.APIFY_CACHE_TTL_SEC:
+        return entry["items"], "cache"
+
+    url = (f"{settings.APIFY_API_BASE.rstrip('/')}/v2/acts/{actor.replace('/', '~')}"
+           f"/run-sync-get-dataset-items?format=json&clean=true")
+    res = _request("POST", url, json=payload)
+    if res.status_code >= 400:
+        raise FetchError(f"actor {actor} answered HTTP {res.status_code}: {res.text[:80]}")
+    items = res.json()
+    if not isinstance(items, list):
+        raise FetchError(f"actor {actor} returned {type(items).__name__}, expected a list of items")
+    _cache_write(key, {"fetched_at": now, "actor": actor, "items": items})
+    return items, "fetched"
+
+
+# ---------- Normalize ----------
+
+def _first(item: Dict, fields) -> object:
+    for name in fields:
+        value = item.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _count(value) -> object:
+    # Some scrapers return the comment objects themselves instead of a count
+    return len(value) if isinstance(value, (list, dict)) else value or 0
+
+
+def normalize_item(item: Dict, platform: str, niche: str, source_url: str) -> Dict:
+    """One dataset item -> the raw post record wpil_pipeline.normalize_record reads."""
+    published = _first(item, DATE_FIELDS)
+    if isinstance(published, (int, float)) and published > 1e11:
+        published = published / 1000.0  # milliseconds
+    return {
+        "platform": platform,
+        "niche": niche,
+        "text": str(_first(item, TEXT_FIELDS) or ""),
+        "metrics": {k: _count(_first(item, fields)) for k, fields in METRIC_FIELDS.items()},
+        "published_at": published,
+        "source_url": source_url,
+    }
+
+
+# ---------- Fan-out ----------
+
+def _fetch_url(url: str) -> Tuple[str, List[Dict], str]:
+    platform = platform_of(url)
+    actor = actor_for(platform)
+    if not actor:
+        raise FetchError(f"no Apify actor configured for {platform or 'unknown platform'}")
+    items, source = run_actor(actor, actor_input(url))
+    return platform, items, source
+
+
+def fetch_records(urls: Iterable[str], niche: str, report: Dict | None = None) -> Iterator[Dict]:
+    """
+    Streams normalized records for many profile URLs. At most APIFY_FETCH_CONCURRENCY
+    runs are in flight; records of a URL are yielded as soon as it completes, so the
+    consumer overlaps with the slower fetches. Failed URLs are counted in report.
+    """
+    report = report if report is not None else {}
+    for name in ("urls", "fetched", "cache", "failed", "items"):
+        report.setdefault(name, 0)
+    report.setdefault("errors", [])
+
+    pending = iter(list(dict.fromkeys(u.strip() for u in urls if u and u.strip())))
+    pool = _pool()
+    inflight = {}
+
+    def top_up():
+        while len(inflight) < settings.APIFY_FETCH_CONCURRENCY:
+            url = next(pending, None)
+            if url is None:
+                return
+            jobs.checkpoint()  # a cancelled or overdue job starts no further actor runs
+            report["urls"] += 1
+            inflight[pool.submit(_fetch_url, url)] = url
+
+    top_up()
+    while inflight:
+        done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+        for fut in done:
+            url = inflight.pop(fut)
+            try:
+                platform, items, source = fut.result()
+            except Exception as e:
+                print(f"⚠️ [APIFY] {url[:60]}: {str(e)[:80]}")
+                report["failed"] += 1
+                report["errors"].append({"url": url, "error": str(e)[:200]})
+                continue
+            report[source] += 1
+            report["items"] += len(items)
+            for item in items:
+                if isinstance(item, dict):
+                    yield normalize_item(item, platform, niche, url)
+        top_up()
+
+
+def run(urls: Iterable[str], niche: str, dry_run: bool = False) -> Dict:
+    """Fetches competitor posts and runs them through the WPIL batch pipeline."""
+    from wpil_pipeline import run_pipeline
+
+    if not settings.ENABLE_APIFY:
+        raise FetchError("Apify is disabled (ENABLE_APIFY=false)")
+    fetch: Dict = {}
+    pipeline = run_pipeline(fetch_records(urls, niche, fetch), dry_run=dry_run)
+    return {"fetch": fetch, "pipeline": pipeline}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch competitor posts from Apify into the WPIL pipeline")
+    parser.add_argument("urls", nargs="+", help="competitor profile URLs")
+    parser.add_argument("--niche", required=True)
+    parser.add_argument("--dry-run", action="store_true", help="score and extract without writing patterns")
+    args = parser.parse_args()
+    print(json.dumps(run(args.urls, args.niche, args.dry_run), ensure_ascii=False, indent=2))
@@ -1,15 +1,41 @@
+import contextvars
 import os
 import re
+import json
 import requests
-import urllib.parse
-import random
+import threading
 import time
-from flask import Flask, request, jsonify, render_template
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import Flask, Response, g, request, jsonify, redirect, render_template, send_file, stream_with_context
 from flask_cors import CORS
-import google.generativeai as genai
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from db import SessionLocal, engine, init_db
+from models import Creator
+import nebula_health
+import model_registry
+import image_cache
+import profiler
+import telemetry
+import response_cache
+import singleflight
+import jobs
+import metrics_service
+import sic_memory
+import audit_log
+import hook_scoring
+import rollups
+import apify_fetcher
+from schemas import DailyBriefResponse, IdeaBrief, RankHooksRequest, ReportResponse, SubmitMetricsRequest
+from section_parser import DEFAULT_VISUAL, SectionStreamParser
+from wpil_runtime import invoke_wpil
 
 # استيراد النواة السيادية
-from dominator_brain import strategic_intelligence_core, alchemy_fusion_core, WPIL_DOMINATOR_SYSTEM
+from dominator_brain import strategic_intelligence_core, alchemy_fusion_core, sic_decide_batch, WPIL_DOMINATOR_SYSTEM
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 CORS(app)
@@ -25,70 +51,687 @@ MODELS_POOL = [
     "gemini-1.5-flash"           # النسخة الاحتياطية
 ]
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# تهيئة genai وقاعدة البيانات لا تتم عند الاستيراد: create_app() تقوم بها مرة واحدة (في الـ master مع --preload)
 APIFY_KEY = os.getenv("APIFY_API_KEY")
+_STARTUP = {"done": False, "seconds": None}
+_STARTUP_LOCK = threading.Lock()
 
-def get_ai_response_nebula_v14(prompt: str) -> str:
-    """بروتوكول Nebula المطور: جولة قسرية عبر 7 محركات لضمان الاستجابة"""
-    for model_name in MODELS_POOL:
+NEBULA_BUSY_MESSAGE = "🚨 كافة الشبكات العصبية مشغولة حالياً، يرجى المحاولة بعد 10 ثوانٍ."
+
+# مجمع خيوط مشترك للسباق المحوّط (الموديلات المتأخرة تكمل في الخلفية ويتم تجاهلها)
+_NEBULA_POOL = ThreadPoolExecutor(max_workers=settings.NEBULA_POOL_WORKERS, thread_name_prefix="nebula")
+
+# مجمع الأقسام المتوازية (منفصل عن _NEBULA_POOL لأن كل قسم يطلق سباقه المحوّط داخله)
+_SECTION_POOL = ThreadPoolExecutor(max_workers=settings.SECTION_POOL_WORKERS, thread_name_prefix="section")
+
+# مجدول الدفعات: سقف مشترك لكل طلبات /generate_all/batch في العامل، مربوط بحصة الموديلات
+_BATCH_POOL = ThreadPoolExecutor(max_workers=settings.BATCH_POOL_WORKERS, thread_name_prefix="batch")
+
+def _attempt_outcome(e: Exception) -> str:
+    if nebula_health.is_quota_error(e): return "quota"
+    return "empty" if str(e) == "empty response" else "error"
+
+# نص النظام السيادي يُمرر كتعليمات نظام ثابتة (ويُخزن لدى المزود حيث يدعم الموديل ذلك) بدل إلصاقه بكل طلب
+NEBULA_SYSTEM = WPIL_DOMINATOR_SYSTEM
+
+def _call_model(model_name: str, prompt: str) -> str:
+    """استدعاء موديل واحد بمهلة MODEL_TIMEOUT_SEC؛ يرفع استثناء إذا كانت الإجابة فارغة، ويسجل النتيجة في لوحة الصحة"""
+    print(f"📡 [COMMAND] Deploying Intelligence on: {model_name}")
+    telemetry.inc("dominator_model_calls_total", model=model_name)
+    started = time.monotonic()
+    with telemetry.span("model_attempt", "dominator_model_attempt_seconds", model=model_name) as span:
+        try:
+            model = model_registry.get_model(model_name, NEBULA_SYSTEM)
+            response = model.generate_content(prompt, request_options={"timeout": settings.MODEL_TIMEOUT_SEC})
+            if not (response and response.text):
+                raise RuntimeError("empty response")
+        except Exception as e:
+            span["outcome"] = _attempt_outcome(e)
+            nebula_health.record_failure(model_name, e, time.monotonic() - started)
+            raise
+    nebula_health.record_success(model_name, time.monotonic() - started)
+    model_registry.record_usage(model_name, response, NEBULA_SYSTEM)
+    return response.text
+
+def _nebula_sequential(prompt: str) -> str:
+    depth = 0
+    for depth, model_name in enumerate(nebula_health.order_models(MODELS_POOL)):
+        jobs.checkpoint()
         try:
-            print(f"📡 [COMMAND] Deploying Intelligence on: {model_name}")
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            if response and response.text:
-                return response.text
+            text = _call_model(model_name, prompt)
+            telemetry.observe("dominator_nebula_fallback_depth", depth, outcome="ok")
+            return text
         except Exception as e:
             print(f"⚠️ [RETRY] {model_name} bypassed. Logic: {str(e)[:40]}")
             time.sleep(0.5) # انتظار تقني بسيط لمنع الحظر اللحظي
             continue
-    return "🚨 كافة الشبكات العصبية مشغولة حالياً، يرجى المحاولة بعد 10 ثوانٍ."
+    telemetry.observe("dominator_nebula_fallback_depth", depth + 1, outcome="busy")
+    return NEBULA_BUSY_MESSAGE
+
+def _timed_call(model_name: str, prompt: str, submitted: float, started: dict) -> str:
+    # بداية التنفيذ الفعلية لا لحظة الإرسال: انتظار خيط حر في _NEBULA_POOL لا يُحسب من مهلة المحاولة
+    started["at"] = time.monotonic()
+    telemetry.observe("dominator_nebula_queue_seconds", started["at"] - submitted)
+    return _call_model(model_name, prompt)
+
+def _nebula_hedged(prompt: str) -> str:
+    """سباق محوّط: إذا تأخر الموديل الحالي أكثر من MODEL_HEDGE_DELAY_SEC منذ بدء تنفيذه نطلق التالي بالتوازي، وأول نص صالح يفوز"""
+    queue = nebula_health.order_models(MODELS_POOL)
+    if not queue:
+        telemetry.observe("dominator_nebula_fallback_depth", 0, outcome="busy")
+        return NEBULA_BUSY_MESSAGE
+    launched = 0
+    inflight = {}  # future -> (model_name, {"at": بداية التنفيذ الفعلية})
+    timeout = settings.MODEL_TIMEOUT_SEC
+    hedge_delay = settings.MODEL_HEDGE_DELAY_SEC
+    max_inflight = max(1, settings.MODEL_HEDGE_MAX_INFLIGHT)
+    last_started = {}
+
+    def launch():
+        nonlocal last_started, launched
+        jobs.checkpoint()
+        launched += 1
+        name = queue.pop(0)
+        last_started = {}
+        inflight[_NEBULA_POOL.submit(_timed_call, name, prompt, time.monotonic(), last_started)] = (name, last_started)
+
+    def elapsed(started: dict, now: float) -> float:
+        # ما زال في طابور المجمع: لم يبدأ زمنه بعد
+        return now - started["at"] if "at" in started else 0.0
+
+    launch()
+    while inflight:
+        now = time.monotonic()
+        wait_for = min(timeout - elapsed(started, now) for _, started in inflight.values())
+        if queue and len(inflight) < max_inflight:
+            wait_for = min(wait_for, hedge_delay - elapsed(last_started, now))
+        done, _ = wait(inflight, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+
+        failed = False
+        for fut in done:
+            name, _ = inflight.pop(fut)
+            try:
+                text = fut.result()
+            except Exception as e:
+                print(f"⚠️ [RETRY] {name} bypassed. Logic: {str(e)[:40]}")
+                failed = True
+                continue
+            for other in inflight:
+                other.cancel()
+            telemetry.observe("dominator_nebula_fallback_depth", launched - 1, outcome="ok")
+            return text
+
+        now = time.monotonic()
+        for fut, (name, started) in list(inflight.items()):
+            if elapsed(started, now) >= timeout:
+                print(f"⏱️ [TIMEOUT] {name} abandoned after {timeout}s")
+                fut.cancel()
+                del inflight[fut]
+                failed = True
+
+        # لا تحوّط قبل أن يبدأ آخر نموذج فعلاً: المجمع مشبع، ونموذج إضافي لن يزيد إلا الطابور
+        if queue and len(inflight) < max_inflight and (
+                failed or not inflight or ("at" in last_started and elapsed(last_started, now) >= hedge_delay)):
+            launch()
+    telemetry.observe("dominator_nebula_fallback_depth", launched, outcome="busy")
+    return NEBULA_BUSY_MESSAGE
+
+def get_ai_response_nebula_v14(prompt: str) -> str:
+    """بروتوكول Nebula المطور: جولة عبر المحركات مرتبة حسب الزمن المتوقع للنجاح مع تخطي المحركات ذات القاطع المفتوح"""
+    if settings.MODEL_HEDGE_ENABLED:
+        return _nebula_hedged(prompt)
+    return _nebula_sequential(prompt)
+
+# هوية السلسلة في مفتاح الكاش: تغيير ترسانة الموديلات أو نص النظام يبطل الإجابات القديمة تلقائياً
+NEBULA_CHAIN_ID = "nebula-v14:" + ",".join(MODELS_POOL) + ":system=" + model_registry.system_id(NEBULA_SYSTEM)
+# أسوأ زمن للسلسلة: كل الموديلات تنتهي مهلتها (مع فاصل المحاولات)؛ قفل التوحيد يجب ألا ينتهي قبلها
+NEBULA_WORST_CASE_SEC = len(MODELS_POOL) * (settings.MODEL_TIMEOUT_SEC + 1)
+
+def wants_cache_bypass(data: dict) -> bool:
+    return bool(data.get("bypass_cache")) or "no-cache" in request.headers.get("Cache-Control", "")
+
+def nebula_generate(prompt: str, bypass_cache: bool = False) -> str:
+    """Nebula خلف كاش المحتوى مع دمج الطلبات المتطابقة الجارية في نداء واحد (عبر الخيوط والعمال)"""
+    if bypass_cache:
+        response_cache.record_bypass()
+    else:
+        cached = response_cache.get(prompt, NEBULA_CHAIN_ID)
+        if cached is not None:
+            return cached
+
+    def produce() -> str:
+        text = get_ai_response_nebula_v14(prompt)
+        if text != NEBULA_BUSY_MESSAGE:
+            response_cache.put(prompt, NEBULA_CHAIN_ID, text)
+        return text
+
+    # طلب التجاوز يريد إجابة طازجة: يدمج فقط مع النداءات الجارية داخل العامل
+    peek = None if bypass_cache or not settings.RESPONSE_CACHE_ENABLED else (
+        lambda: response_cache.get(prompt, NEBULA_CHAIN_ID, record=False)
+    )
+    return singleflight.do(response_cache.cache_key(prompt, NEBULA_CHAIN_ID), produce, peek,
+                           ttl_sec=NEBULA_WORST_CASE_SEC, is_failure=lambda text: text == NEBULA_BUSY_MESSAGE)
+
+def _stream_model(model_name: str, prompt: str):
+    """بث موديل واحد قطعة بقطعة بمهلة MODEL_TIMEOUT_SEC مع تسجيل النتيجة في لوحة الصحة"""
+    print(f"📡 [STREAM] Deploying Intelligence on: {model_name}")
+    telemetry.inc("dominator_model_calls_total", model=model_name)
+    started = time.monotonic()
+    got_text = False
+    last = None
+    with telemetry.span("model_attempt", "dominator_model_attempt_seconds", model=model_name, stream="1") as span:
+        try:
+            model = model_registry.get_model(model_name, NEBULA_SYSTEM)
+            for chunk in model.generate_content(prompt, stream=True, request_options={"timeout": settings.MODEL_TIMEOUT_SEC}):
+                last = chunk
+                if chunk.text:
+                    got_text = True
+                    yield chunk.text
+            if not got_text:
+                raise RuntimeError("empty response")
+        except Exception as e:
+            span["outcome"] = _attempt_outcome(e)
+            nebula_health.record_failure(model_name, e, time.monotonic() - started)
+            raise
+    nebula_health.record_success(model_name, time.monotonic() - started)
+    model_registry.record_usage(model_name, last, NEBULA_SYSTEM)
+
+def nebula_stream(prompt: str, bypass_cache: bool = False):
+    """يبث نص Nebula كما يصل: ("chunk", نص) أو ("reset", موديل) إذا انقطع موديل بعد بث جزئي وانتقلنا للبديل"""
+    if bypass_cache:
+        response_cache.record_bypass()
+    else:
+        cached = response_cache.get(prompt, NEBULA_CHAIN_ID)
+        if cached is not None:
+            yield "chunk", cached
+            return
+    depth = 0
+    for depth, model_name in enumerate(nebula_health.order_models(MODELS_POOL)):
+        emitted = []
+        try:
+            for text in _stream_model(model_name, prompt):
+                emitted.append(text)
+                yield "chunk", text
+        except Exception as e:
+            print(f"⚠️ [RETRY] {model_name} bypassed. Logic: {str(e)[:40]}")
+            if emitted:
+                yield "reset", model_name
+            continue
+        response_cache.put(prompt, NEBULA_CHAIN_ID, "".join(emitted))
+        telemetry.observe("dominator_nebula_fallback_depth", depth, outcome="ok", stream="1")
+        return
+    telemetry.observe("dominator_nebula_fallback_depth", depth + 1, outcome="busy", stream="1")
+    yield "chunk", NEBULA_BUSY_MESSAGE
+
+V14_PATTERNS = {
+    "linkedin": r"\[LINKEDIN\](.*?)(?=\[TWITTER\]|\[TIKTOK\]|\[VISUAL_PROMPT\]|$)",
+    "twitter": r"\[TWITTER\](.*?)(?=\[LINKEDIN\]|\[TIKTOK\]|\[VISUAL_PROMPT\]|$)",
+    "tiktok": r"\[TIKTOK\](.*?)(?=\[LINKEDIN\]|\[TWITTER\]|\[VISUAL_PROMPT\]|$)",
+    "visual": r"\[VISUAL_PROMPT\](.*?)$"
+}
 
 def parse_v14(text):
     parts = {"linkedin": "", "twitter": "", "tiktok": "", "visual": "High-end professional business photography, realistic"}
-    patterns = {
-        "linkedin": r"\[LINKEDIN\](.*?)(?=\[TWITTER\]|\[TIKTOK\]|\[VISUAL_PROMPT\]|$)",
-        "twitter": r"\[TWITTER\](.*?)(?=\[LINKEDIN\]|\[TIKTOK\]|\[VISUAL_PROMPT\]|$)",
-        "tiktok": r"\[TIKTOK\](.*?)(?=\[LINKEDIN\]|\[TWITTER\]|\[VISUAL_PROMPT\]|$)",
-        "visual": r"\[VISUAL_PROMPT\](.*?)$"
-    }
-    for key, pat in patterns.items():
+    for key, pat in V14_PATTERNS.items():
         match = re.search(pat, text, re.S | re.I)
         if match: parts[key] = match.group(1).strip()
     if not parts["linkedin"]: parts["linkedin"] = text
     return parts
 
+def build_generate_prompt(idea: str) -> str:
+    return f"توليد حزمة سيادية كاملة متوافقة حرفياً مع الموضوع: {idea}\nأنهِ بـ [VISUAL_PROMPT]."
+
+def build_image_url(visual: str) -> str:
+    """نفس الوصف البصري = نفس البذرة ونفس الصورة؛ الرابط محلي (/images/<key>) والجلب المسبق يبدأ في الخلفية"""
+    return image_cache.image_url(visual)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.before_request
+def _ensure_started():
+    # تشغيل قديم عبر app:app بدون create_app(): الإقلاع يتم مع أول طلب (عدا فحص الحياة)،
+    # بلا engine.dispose() لأن طلبات أخرى قد تستخدم المجمع الآن ولا تفرع بعد هذه النقطة
+    if not _STARTUP["done"] and request.endpoint != "healthz":
+        _startup(warm=None, dispose=False)
+
+@app.before_request
+def _telemetry_start():
+    g.started = time.perf_counter()
+    g.profiler = None
+    if profiler.requested(request.headers.get(settings.PROFILE_HEADER)):
+        g.profiler = profiler.SamplingProfiler(threading.get_ident()).start()
+
+@app.after_request
+def _telemetry_finish(response):
+    # للمسارات المتدفقة يقيس هذا الزمن حتى أول بايت، لا حتى نهاية البث
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    telemetry.observe("dominator_http_request_seconds", time.perf_counter() - g.get("started", time.perf_counter()),
+                      endpoint=endpoint, method=request.method, status=response.status_code)
+    if g.get("profiler") is not None:
+        g.profiler.stop()
+        response.headers["X-Profile-Id"] = g.profiler.save(f"{request.method} {request.path}")
+        telemetry.inc("dominator_profiles_total", endpoint=endpoint)
+    return response
+
+@app.route("/metrics")
+def metrics(): return Response(telemetry.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/")
 def home(): return render_template("index.html")
 
+@app.route("/healthz")
+def healthz():
+    """فحص الحياة: العملية تستجيب فقط، بلا أي اعتماد خارجي"""
+    return jsonify({"status": "ok", "pid": os.getpid()}), 200
+
+@app.route("/readyz")
+def readyz():
+    """فحص الجاهزية: اكتمل الإقلاع، قاعدة البيانات تجيب، وحزمة الموديلات محملة إن كان التسخين مفعلاً"""
+    checks = {"startup": _STARTUP["done"], "model_sdk": model_registry.loaded() or not settings.MODEL_SDK_WARM_ON_START}
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        checks["database"] = True
+    except Exception as e:
+        print(f"⚠️ [READYZ] database: {str(e)[:60]}")
+        checks["database"] = False
+    ready = all(checks.values())
+    return jsonify({"status": "ready" if ready else "not_ready", "checks": checks, "startup_sec": _STARTUP["seconds"]}), 200 if ready else 503
+
+def discover_bundle(target: str, niche: str, bypass_cache: bool = False) -> dict:
+    posts = [{"text": target if target else f"Trend in {niche}", "engagement": "Confirmed", "author": "Target"}]
+    fusion = alchemy_fusion_core(posts, niche)
+    # استخدام Nebula لتخليق المختبر
+    output = nebula_generate(fusion['synthesis_task'], bypass_cache)
+    return {"super_post": output, "sources": posts}
+
+SECTION_MARKERS = {"linkedin": "[LINKEDIN]", "twitter": "[TWITTER]", "tiktok": "[TIKTOK]", "visual": "[VISUAL_PROMPT]"}
+_SECTION_MARKER_RE = re.compile(r"\[(?:LINKEDIN|TWITTER|TIKTOK|VISUAL_PROMPT)\]", re.I)
+
+def build_section_prompt(idea: str, key: str) -> str:
+    """موجّه قسم واحد: المنصة وقيودها البنيوية من invoke_wpil، أو الوصف البصري"""
+    if key == "visual":
+        return (f"اكتب قسم [VISUAL_PROMPT] فقط لحزمة سيادية عن الموضوع: {idea}\n"
+                "وصف فوتوغرافي واحد بالإنجليزية، بلا أي قسم آخر.")
+    constraints = invoke_wpil({"platform": key, "winning_post": idea})["constraints"]
+    return (f"اكتب قسم {SECTION_MARKERS[key]} فقط لحزمة سيادية متوافقة حرفياً مع الموضوع: {idea}\n"
+            f"القيود البنيوية: {json.dumps(constraints, ensure_ascii=False)}\n"
+            "لا تكتب أي قسم آخر.")
+
+def section_body(text: str, key: str) -> str:
+    """
+    تعليمات النظام تطلب الحزمة كاملة، فقد يكتب الموديل أقساماً أخرى مع المطلوب:
+    يُؤخذ قسم key بأنماط parse_v14 إن وُجدت علامته، وإلا فالنص الذي يسبق أول علامة
+    """
+    text = text.strip()
+    match = re.search(V14_PATTERNS[key], text, re.S | re.I)
+    if match:
+        return match.group(1).strip()
+    return _SECTION_MARKER_RE.split(text, 1)[0].strip()
+
+def _generate_section(idea: str, key: str, bypass_cache: bool) -> str:
+    """قسم واحد مع إعادة المحاولة الخاصة به فقط"""
+    prompt = build_section_prompt(idea, key)
+    for attempt in range(settings.SECTION_RETRIES + 1):
+        if attempt:
+            time.sleep(settings.SECTION_RETRY_BACKOFF_SEC * attempt)
+        jobs.checkpoint()
+        try:
+            text = nebula_generate(prompt, bypass_cache or attempt > 0)
+        except jobs.JobCancelled:
+            raise
+        except Exception as e:
+            print(f"⚠️ [SECTION] {key} attempt {attempt + 1} failed: {str(e)[:40]}")
+            continue
+        text = section_body(text, key)
+        if text and text != NEBULA_BUSY_MESSAGE:
+            return text
+        print(f"⚠️ [SECTION] {key} attempt {attempt + 1} returned nothing usable")
+    raise RuntimeError(f"section {key} failed after {settings.SECTION_RETRIES + 1} attempts")
+
+def generate_sections(idea: str, bypass_cache: bool = False) -> dict:
+    """الأقسام الأربعة بالتوازي: الزمن = أطول قسم لا مجموعها، وفشل قسم لا يسقط البقية"""
+    # نسخة السياق تحمل المهمة الجارية إلى خيوط الأقسام كي يرى jobs.checkpoint() إلغاءها
+    futures = {key: _SECTION_POOL.submit(contextvars.copy_context().run, _generate_section, idea, key, bypass_cache)
+               for key in SECTION_MARKERS}
+    parts, failed = {}, []
+    for key, fut in futures.items():
+        try:
+            parts[key] = fut.result()
+        except jobs.JobCancelled:
+            raise
+        except Exception as e:
+            print(f"⚠️ [SECTION] {str(e)[:60]}")
+            failed.append(key)
+            parts[key] = DEFAULT_VISUAL if key == "visual" else ""
+    if len(failed) == len(SECTION_MARKERS):
+        parts["linkedin"] = NEBULA_BUSY_MESSAGE  # نفس شكل الوضع الموحد عند انشغال كل الشبكات
+    if failed:
+        parts["failed_sections"] = failed
+    return parts
+
+def generate_bundle(idea: str, bypass_cache: bool = False, mode: str | None = None) -> dict:
+    if (mode or settings.GENERATE_MODE) == "sections":
+        with telemetry.span("generate_sections"):
+            parsed = generate_sections(idea, bypass_cache)
+    else:
+        with telemetry.span("nebula_generate"):
+            raw = nebula_generate(build_generate_prompt(idea), bypass_cache)
+        with telemetry.span("parse_v14"):
+            parsed = parse_v14(raw)
+    with telemetry.span("image_url"):
+        image_url = build_image_url(parsed['visual'])
+    with telemetry.span("strategic_intelligence_core"):
+        brain = strategic_intelligence_core(idea)
+    return {**parsed, "image_url": image_url, "video_blueprint": brain["video_segments"]}
+
+jobs.register("discover", lambda p: discover_bundle(p.get("target_data", ""), p.get("niche", "السيادة"), p.get("bypass_cache", False)))
+jobs.register("generate_all", lambda p: generate_bundle(p.get("text", "السيادة"), p.get("bypass_cache", False), p.get("mode")))
+jobs.register("competitors", lambda p: apify_fetcher.run(p.get("urls") or [], p.get("niche", "السيادة"), p.get("dry_run", False)))
+
 @app.route("/alchemy/discover", methods=["POST"])
 def discover():
     try:
         data = request.get_json(silent=True) or {}
-        target = data.get("target_data", "")
-        niche = data.get("niche", "السيادة")
-        posts = [{"text": target if target else f"Trend in {niche}", "engagement": "Confirmed", "author": "Target"}]
-        fusion = alchemy_fusion_core(posts, niche)
-        # استخدام Nebula لتخليق المختبر
-        output = get_ai_response_nebula_v14(f"{WPIL_DOMINATOR_SYSTEM}\n{fusion['synthesis_task']}")
-        return jsonify({"super_post": output, "sources": posts}), 200
-    except Exception as e: return jsonify({"error": str(e)}), 500
+        return jsonify(discover_bundle(data.get("target_data", ""), data.get("niche", "السيادة"), wants_cache_bypass(data))), 200
+    except Exception as e:
+        audit_log.log_event("alchemy.discover.failed", "ERROR", payload={"error": str(e)[:500]})
+        return jsonify({"error": str(e)}), 500
 
 @app.route("/generate_all", methods=["POST"])
 def generate():
     try:
         data = request.get_json(silent=True) or {}
-        idea = data.get("text", "السيادة")
-        prompt = f"{WPIL_DOMINATOR_SYSTEM}\nتوليد حزمة سيادية كاملة متوافقة حرفياً مع الموضوع: {idea}\nأنهِ بـ [VISUAL_PROMPT]."
-        raw = get_ai_response_nebula_v14(prompt)
-        parsed = parse_v14(raw)
-        
-        seed = random.randint(1, 99999)
-        quoted_v = urllib.parse.quote(parsed['visual'])
-        image_url = f"https://image.pollinations.ai/prompt/{quoted_v}?seed={seed}&width=1024&height=1024&model=flux&nologo=true"
-        
-        brain = strategic_intelligence_core(idea)
-        return jsonify({**parsed, "image_url": image_url, "video_blueprint": brain["video_segments"]}), 200
-    except Exception as e: return jsonify({"error": str(e)}), 500
+        return jsonify(generate_bundle(data.get("text", "السيادة"), wants_cache_bypass(data), data.get("mode"))), 200
+    except Exception as e:
+        audit_log.log_event("generate_all.failed", "ERROR", payload={"error": str(e)[:500]})
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/generate_all/stream", methods=["POST"])
+def generate_stream():
+    """نسخة البث (SSE): تُرسل القطع فور وصولها، وكل قسم فور إغلاقه، ورابط الصورة فور اكتمال الوصف البصري"""
+    data = request.get_json(silent=True) or {}
+    idea = data.get("text", "السيادة")
+    prompt = build_generate_prompt(idea)
+    bypass = wants_cache_bypass(data)
+
+    def events():
+        parser = SectionStreamParser()
+        image_url = None
+        try:
+            for kind, text in nebula_stream(prompt, bypass):
+                if kind == "reset":
+                    parser = SectionStreamParser()
+                    yield _sse("reset", {"model": text})
+                    continue
+                yield _sse("chunk", {"text": text})
+                for key, section in parser.feed(text):
+                    yield _sse("section", {"key": key, "text": section})
+            for key, section in parser.close():
+                yield _sse("section", {"key": key, "text": section})
+                if key == "visual":
+                    image_url = build_image_url(section)
+                    yield _sse("image", {"image_url": image_url})
+            parsed = parser.result()
+            if image_url is None:
+                image_url = build_image_url(parsed["visual"])
+                yield _sse("image", {"image_url": image_url})
+            brain = strategic_intelligence_core(idea)
+            yield _sse("done", {**parsed, "image_url": image_url, "video_blueprint": brain["video_segments"]})
+        except Exception as e:
+            audit_log.log_event("generate_all.stream.failed", "ERROR", payload={"error": str(e)[:500]})
+            yield _sse("error", {"error": str(e)})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+def _batch_item(item, index: int) -> dict:
+    if isinstance(item, dict):
+        return {"index": index, "id": item.get("id", index), "text": str(item.get("text") or "").strip()}
+    return {"index": index, "id": index, "text": str(item or "").strip()}
+
+def _batch_generate(idea: dict, bypass_cache: bool, mode: str | None = None) -> dict:
+    bundle = generate_bundle(idea["text"], bypass_cache, mode)
+    if bundle["linkedin"] == NEBULA_BUSY_MESSAGE:
+        raise RuntimeError("all models busy")
+    return bundle
+
+@app.route("/generate_all/batch", methods=["POST"])
+def generate_batch():
+    """دفعة أفكار على اتصال واحد: توليد متوازٍ بسقف concurrency، وكل حزمة تُبث سطر NDJSON فور اكتمالها"""
+    data = request.get_json(silent=True) or {}
+    ideas = data.get("ideas")
+    if not isinstance(ideas, list) or not ideas:
+        return jsonify({"error": "ideas must be a non-empty list"}), 400
+    if len(ideas) > settings.BATCH_MAX_IDEAS:
+        return jsonify({"error": f"at most {settings.BATCH_MAX_IDEAS} ideas per batch"}), 400
+    try:
+        concurrency = int(data.get("concurrency") or settings.BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be an integer"}), 400
+    concurrency = min(max(concurrency, 1), settings.BATCH_POOL_WORKERS)
+    items = [_batch_item(item, i) for i, item in enumerate(ideas)]
+    bypass = wants_cache_bypass(data)
+
+    def lines():
+        started = time.monotonic()
+        pending = [i for i in items if i["text"]]
+        inflight = {}
+        ok = failed = 0
+        for item in items:
+            if not item["text"]:
+                failed += 1
+                yield json.dumps({"index": item["index"], "id": item["id"], "ok": False, "error": "empty idea"}, ensure_ascii=False) + "\n"
+        try:
+            # نافذة منزلقة: لا تُرسل فكرة جديدة للمجدول إلا عند اكتمال أخرى، فتتقاسم الدفعات المتزامنة المجمع بعدل
+            while pending or inflight:
+                while pending and len(inflight) < concurrency:
+                    item = pending.pop(0)
+                    inflight[_BATCH_POOL.submit(_batch_generate, item, bypass, data.get("mode"))] = item
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    item = inflight.pop(fut)
+                    line = {"index": item["index"], "id": item["id"]}
+                    try:
+                        line.update(ok=True, result=fut.result())
+                        ok += 1
+                    except Exception as e:
+                        line.update(ok=False, error=str(e))
+                        failed += 1
+                        audit_log.log_event("generate_all.batch.item_failed", "ERROR", payload={"id": str(item["id"]), "error": str(e)[:500]})
+                    yield json.dumps(line, ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True, "succeeded": ok, "failed": failed, "elapsed_sec": round(time.monotonic() - started, 3)}) + "\n"
+        finally:
+            for fut in inflight:  # العميل انقطع: لا نبدأ ما لم يبدأ بعد
+                fut.cancel()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson", headers=headers)
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """وضع غير متزامن: يعيد معرف المهمة فوراً، والنتيجة تُستطلع من /jobs/<id>"""
+    data = request.get_json(silent=True) or {}
+    payload = dict(data.get("input") or {})
+    payload["bypass_cache"] = wants_cache_bypass(payload)
+    try:
+        job_id = jobs.submit(data.get("kind", "generate_all"), payload, data.get("timeout_sec"))
+    except KeyError:
+        return jsonify({"error": f"unknown job kind, expected one of {sorted(jobs.RUNNERS)}"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "timeout_sec must be a number of seconds"}), 400
+    except jobs.JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify({"job_id": job_id, "status": "queued", "poll": f"/jobs/{job_id}"}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None: return jsonify({"error": "job not found"}), 404
+    return jsonify(job), 200
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    if jobs.get(job_id) is None: return jsonify({"error": "job not found"}), 404
+    return jsonify({"job_id": job_id, "cancelled": jobs.cancel(job_id)}), 200
+
+@app.route("/jobs/<job_id>/stream")
+def stream_job(job_id):
+    """بث حالة المهمة (SSE) حتى تنتهي"""
+    if jobs.get(job_id) is None: return jsonify({"error": "job not found"}), 404
+
+    def events():
+        last_status = None
+        while True:
+            job = jobs.get(job_id)
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield _sse("status", job)
+            if last_status in jobs.TERMINAL_STATUSES:
+                return
+            time.sleep(0.5)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+@app.route("/sic/screen", methods=["POST"])
+def sic_screen():
+    """فرز مسبق بدون أي توكنز: قرار SIC لدفعة من الأفكار (ideas نصوص، أو signals بعقد SIC الكامل)"""
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+    signals = data.get("signals")
+    if signals is None:
+        ideas = data.get("ideas", [])
+        if not isinstance(ideas, list) or not all(isinstance(i, str) for i in ideas):
+            return jsonify({"error": "ideas must be a list of strings"}), 400
+        context = {k: data[k] for k in ("style_signal", "context_signal", "system_memory") if k in data}
+        # ذاكرة المنصات من نتائج التجارب المكتملة عندما لا يرسل العميل ذاكرته
+        context.setdefault("system_memory", {"historical_scores": sic_memory.platform_scores()})
+        signals = [{"content_signal": {"topic": idea, "raw_text": idea, "intent": data.get("intent", "inform")}, **context}
+                   for idea in ideas]
+    if not isinstance(signals, list):
+        return jsonify({"error": "signals must be a list"}), 400
+    decisions = sic_decide_batch(signals)
+    return jsonify({"decisions": decisions, "accepted": sum(1 for d in decisions if d["execute"])}), 200
+
+@app.route(f"{settings.API_PREFIX}/metrics", methods=["POST"])
+def submit_metrics():
+    try:
+        req = SubmitMetricsRequest.model_validate(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return jsonify({"error": e.errors(include_url=False)}), 422
+    with SessionLocal() as session:
+        try:
+            res = metrics_service.submit_metrics(session, req)
+        except metrics_service.ExperimentNotFound:
+            audit_log.log_event("metrics.rejected", "WARN", req.creator_id, {"experiment_id": req.experiment_id})
+            return jsonify({"error": "experiment not found"}), 404
+        except IntegrityError:
+            return jsonify({"error": "concurrent update of the same metrics point, retry"}), 409
+    audit_log.log_event("metrics.submitted", "INFO", req.creator_id, {
+        "experiment_id": req.experiment_id, "variant": req.variant_key, "t_label": req.point.t_label, "status": res.status})
+    return jsonify(res.model_dump()), 200
+
+@app.route(f"{settings.API_PREFIX}/hooks/rank", methods=["POST"])
+def rank_hooks():
+    try:
+        req = RankHooksRequest.model_validate(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return jsonify({"error": e.errors(include_url=False)}), 422
+    with SessionLocal() as session:
+        creator = session.get(Creator, req.creator_id)
+        if creator is None: return jsonify({"error": "creator not found"}), 404
+        dna, calibration = hook_scoring.scoring_context(creator.genome)
+        niche = req.niche or creator.primary_niche
+    signal = {"platform": req.platform, "niche": niche, "winning_post": req.winning_post or ""}
+    candidates = [[c if isinstance(c, str) else c.model_dump() for c in idea.candidates] for idea in req.ideas]
+    ranked = hook_scoring.rank_hook_variants(candidates, signal, dna, calibration)
+    ideas = [IdeaBrief(title=i.title, angle=i.angle, value_promise=i.value_promise, variants=v) for i, v in zip(req.ideas, ranked)]
+    return jsonify(DailyBriefResponse(creator_id=req.creator_id, ideas=ideas).model_dump()), 200
+
+def _creator_ids():
+    ids = [i for raw in request.args.getlist("creator_id") for i in raw.split(",") if i.strip()]
+    return list(dict.fromkeys(i.strip() for i in ids))
+
+@app.route(f"{settings.API_PREFIX}/reports/creators")
+def report_creators():
+    ids = _creator_ids()
+    if not ids: return jsonify({"error": "creator_id required"}), 400
+    if len(ids) > settings.REPORTS_MAX_CREATORS: return jsonify({"error": f"at most {settings.REPORTS_MAX_CREATORS} creators"}), 400
+    with SessionLocal() as session:
+        return jsonify({"creators": rollups.creator_reports(session, ids)}), 200
+
+@app.route(f"{settings.API_PREFIX}/reports/creators/daily")
+def report_creators_daily():
+    ids = _creator_ids()
+    if not ids: return jsonify({"error": "creator_id required"}), 400
+    if len(ids) > settings.REPORTS_MAX_CREATORS: return jsonify({"error": f"at most {settings.REPORTS_MAX_CREATORS} creators"}), 400
+    days = min(max(request.args.get("days", 30, type=int), 1), settings.REPORTS_MAX_DAYS)
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    with SessionLocal() as session:
+        return jsonify({"since": since.isoformat(), "days": rollups.daily_reports(session, ids, since)}), 200
+
+@app.route(f"{settings.API_PREFIX}/reports/experiments")
+def report_experiments():
+    creator_id = request.args.get("creator_id", "").strip()
+    if not creator_id: return jsonify({"error": "creator_id required"}), 400
+    limit = min(max(request.args.get("limit", 50, type=int), 1), settings.REPORTS_MAX_EXPERIMENTS)
+    with SessionLocal() as session:
+        reports = rollups.experiment_reports(session, creator_id, limit, request.args.get("status"))
+    return jsonify({"experiments": [ReportResponse(**r).model_dump() for r in reports]}), 200
+
+@app.route("/images/<key>")
+def image(key: str):
+    """يخدم الصورة من ذاكرة القرص؛ إن لم تكتمل بعد يحول المتصفح فوراً للمصدر بنفس البذرة (والجلب يستمر في الخلفية)"""
+    if not re.fullmatch(r"[0-9a-f]{32}", key):
+        return jsonify({"error": "not found"}), 404
+    path, meta = image_cache.resolve(key)
+    if meta is None:
+        return jsonify({"error": "not found"}), 404
+    if path is None:
+        res = redirect(image_cache.upstream_url(meta["prompt"], key), code=302)
+        res.headers["Cache-Control"] = "no-store"  # الطلب التالي يجب أن يعود إلينا ليجد النسخة المحلية
+        return res
+    res = send_file(path, mimetype=meta.get("content_type") or "image/jpeg", conditional=True, etag=key, max_age=31536000)
+    res.headers["Cache-Control"] = "public, max-age=31536000, immutable"  # العنوان مشتق من المحتوى
+    return res
+
+@app.route("/images/stats")
+def images_stats(): return jsonify(image_cache.stats()), 200
+
+@app.route("/cache/stats")
+def cache_stats(): return jsonify(response_cache.stats()), 200
+
+@app.route("/models/stats")
+def models_stats(): return jsonify(model_registry.stats()), 200
+
+@app.route("/audit/stats")
+def audit_stats(): return jsonify(audit_log.stats()), 200
+
+def _startup(warm: bool | None, dispose: bool) -> None:
+    with _STARTUP_LOCK:
+        if not _STARTUP["done"]:
+            started = time.perf_counter()
+            init_db()
+            if dispose:
+                engine.dispose()  # الاتصالات لا تعبر التفرع
+            if settings.MODEL_SDK_WARM_ON_START if warm is None else warm:
+                model_registry.warm()
+            _STARTUP["seconds"] = round(time.perf_counter() - started, 3)
+            _STARTUP["done"] = True
+
+def create_app(warm: bool | None = None) -> Flask:
+    """
+    نقطة الدخول (gunicorn "app:create_app()"): تنشئ الجداول وتسخن حزمة الموديلات مرة واحدة لكل عملية.
+    مع --preload تعمل في الـ master قبل التفرع فيتشارك العمال الذاكرة (copy-on-write)،
+    ولا تبقى لدى الـ master أي اتصالات قاعدة بيانات أو خيوط يرثها العمال.
+    """
+    _startup(warm, dispose=True)
+    return app
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
+    create_app().run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
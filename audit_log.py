@@ -0,0 +1,141 @@
+# audit_log.py
+# Asynchronous Audit Log
+# log_event() only appends to an in-memory queue; a background thread writes the
+# queue to audit_logs in batched executemany inserts when the batch size or the
+# flush interval is reached. Under overload INFO events are dropped or sampled
+# (AUDIT_OVERLOAD_POLICY), WARN events are dropped only when the queue is full, and
+# ERROR events are always kept.
+
+import atexit
+import json
+import os
+import random
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import insert
+
+from config import settings
+from db import engine
+from models import AuditLog
+
+SEVERITIES = ("INFO", "WARN", "ERROR")
+
+_queue = deque()  # row dicts; deque.append / popleft are thread-safe
+_wakeup = threading.Event()
+_write_lock = threading.Lock()  # one writer at a time (flusher, explicit flush, exit)
+_state = {"pid": None}
+_start_lock = threading.Lock()
+_counters = Counter()
+
+
+def _admit(severity: str) -> bool:
+    if severity == "ERROR":
+        return True
+    depth = len(_queue)
+    if depth >= settings.AUDIT_QUEUE_MAX:
+        return False
+    if severity == "INFO" and depth >= settings.AUDIT_QUEUE_MAX * settings.AUDIT_OVERLOAD_AT:
+        if settings.AUDIT_OVERLOAD_POLICY == "sample":
+            return random.random() < settings.AUDIT_INFO_SAMPLE_RATE
+        return False
+    return True
+
+
+def log_event(event: str, severity: str = "INFO", creator_id: str | None = None,
+              payload: Dict[str, Any] | None = None, blocked: bool = False) -> bool:
+    """
+    Queues one audit row without touching the database. Returns False when the
+    event was shed by the overload policy (never for ERROR).
+    """
+    if not settings.AUDIT_ENABLED:
+        return False
+    severity = severity.upper() if severity.upper() in SEVERITIES else "INFO"
+    _ensure_started()
+    if not _admit(severity):
+        _counters[f"dropped_{severity.lower()}"] += 1
+        return False
+    _queue.append({
+        "at": datetime.utcnow(),
+        "creator_id": creator_id,
+        "event": event[:120],
+        "severity": severity,
+        "payload_json": json.dumps(payload or {}, ensure_ascii=False, default=str),
+        "blocked": blocked,
+    })
+    _counters["queued"] += 1
+    if len(_queue) >= settings.AUDIT_FLUSH_BATCH:
+        _wakeup.set()
+    return True
+
+
+def _drain(limit: int) -> list:
+    rows = []
+    while len(rows) < limit:
+        try:
+            rows.append(_queue.popleft())
+        except IndexError:
+            break
+    return rows
+
+
+def flush() -> int:
+    """
+    Writes everything queued so far, one executemany per batch. Returns rows written.
+    On a database error the batch goes back to the front of the queue and the
+    error is raised.
+    """
+    written = 0
+    with _write_lock:
+        while True:
+            rows = _drain(settings.AUDIT_FLUSH_BATCH)
+            if not rows:
+                return written
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), rows)
+            except Exception:
+                _counters["write_failures"] += 1
+                _queue.extendleft(reversed(rows))
+                raise
+            written += len(rows)
+            _counters["written"] += len(rows)
+
+
+def _flusher() -> None:
+    while True:
+        _wakeup.wait(settings.AUDIT_FLUSH_SEC)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [AUDIT] flush failed: {str(e)[:60]}")
+
+
+def _ensure_started() -> None:
+    if _state["pid"] == os.getpid():
+        return
+    with _start_lock:
+        if _state["pid"] == os.getpid():
+            return
+        if _state["pid"] is not None:
+            _queue.clear()  # forked child: the parent writes what it queued
+            _counters.clear()
+        threading.Thread(target=_flusher, name="audit-log-flusher", daemon=True).start()
+        _state["pid"] = os.getpid()
+
+
+def stats() -> Dict[str, int]:
+    return {"queue_depth": len(_queue), **{k: _counters[k] for k in (
+        "queued", "written", "dropped_info", "dropped_warn", "write_failures")}}
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if _queue and _state["pid"] == os.getpid():
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [AUDIT] {len(_queue)} events lost at shutdown: {str(e)[:60]}")
@@ -0,0 +1,57 @@
+# benchmarks/bench_apify_fetch.py
+# Competitor fetch latency against the local Apify stand-in: sequential
+# (concurrency 1) vs concurrent fan-out, cold cache vs warm cache vs expired
+# entries. Runs in a scratch directory; nothing real is contacted or written.
+#
+#   python benchmarks/bench_apify_fetch.py --urls 24 --latency 0.5 --concurrency 1,4,8
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import fake_apify  # noqa: E402
+import apify_fetcher  # noqa: E402
+from config import settings  # noqa: E402
+
+
+def timed_fetch(urls, niche: str):
+    report = {}
+    started = time.perf_counter()
+    records = sum(1 for _ in apify_fetcher.fetch_records(urls, niche, report))
+    return time.perf_counter() - started, records, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apify fetcher: sequential vs concurrent, cold vs cached")
+    parser.add_argument("--urls", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake actor run")
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = fake_apify.serve(0, args.latency, args.items, args.fail_every)
+    settings.APIFY_API_BASE = f"http://127.0.0.1:{server.server_address[1]}"
+    settings.APIFY_TIKTOK_PROFILE_ACTOR = "bench~tiktok-profile"
+    settings.APIFY_RETRY_BACKOFF_SEC = 0.05
+    urls = [f"https://www.tiktok.com/@competitor{i}" for i in range(args.urls)]
+
+    print(f"{'mode':<34}{'seconds':>9}{'records':>9}  source")
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        settings.APIFY_FETCH_CONCURRENCY = concurrency
+        apify_fetcher._state["pid"] = None  # rebuild the pool at the new size
+        with tempfile.TemporaryDirectory() as scratch:
+            settings.APIFY_CACHE_DIR = scratch
+            for label, ttl in (("cold", 3600), ("warm", 3600), ("expired", 0)):
+                settings.APIFY_CACHE_TTL_SEC = ttl
+                seconds, records, report = timed_fetch(urls, "leadership")
+                source = {k: report[k] for k in ("fetched", "cache", "failed")}
+                print(f"{f'concurrency={concurrency} {label}':<34}{seconds:>9.3f}{records:>9}  {source}")
+    print(f"backend: {server.stats()}")
+    server.shutdown()
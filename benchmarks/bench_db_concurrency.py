@@ -0,0 +1,139 @@
+# benchmarks/bench_db_concurrency.py
+# Concurrent read/write throughput of the database engine profiles.
+# Each profile runs in a fresh scratch SQLite file with several forked worker
+# processes (like gunicorn workers): writers submit metrics points and audit rows,
+# readers run the report queries. Reports ops/s and "database is locked" errors.
+#
+#   python benchmarks/bench_db_concurrency.py --writers 4 --readers 4 --seconds 5
+#   python benchmarks/bench_db_concurrency.py --url postgresql://...   (server database)
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+T_LABELS = ("T+60m", "T+24h", "T+48h")
+
+
+def _seed(creators: int, experiments: int):
+    from db import SessionLocal, init_db
+    from models import Creator, Experiment
+
+    init_db()
+    ids = []
+    with SessionLocal() as session:
+        for _ in range(creators):
+            c = Creator(primary_niche="bench", baseline_views=1000, baseline_share_rate=0.01, baseline_engagement_rate=0.05)
+            session.add(c)
+            session.flush()
+            for i in range(experiments):
+                e = Experiment(creator_id=c.id, idea_title=f"bench {i}", variant_a_json='{"h":1}', variant_b_json='{"h":2}')
+                session.add(e)
+                session.flush()
+                ids.append((c.id, e.id))
+        session.commit()
+    return ids
+
+
+def _worker(role: str, ids, seconds: float, out) -> None:
+    from sqlalchemy import insert
+    from sqlalchemy.exc import OperationalError
+
+    import metrics_service
+    import rollups
+    from db import SessionLocal, engine
+    from models import AuditLog
+    from schemas import SubmitMetricsRequest
+
+    engine.dispose(close=False)  # never reuse the parent's connections after fork
+    rng = random.Random(os.getpid())
+    ops = locked = failed = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        creator_id, experiment_id = rng.choice(ids)
+        try:
+            with SessionLocal() as session:
+                if role == "writer":
+                    metrics_service.submit_metrics(session, SubmitMetricsRequest(
+                        creator_id=creator_id, experiment_id=experiment_id, variant_key=rng.choice("AB"),
+                        point={"t_label": rng.choice(T_LABELS), "views": rng.randint(100, 10000),
+                               "likes": rng.randint(0, 500), "comments": rng.randint(0, 50), "shares": rng.randint(0, 100)},
+                    ))
+                    with engine.begin() as conn:
+                        conn.execute(insert(AuditLog.__table__), [{"event": "bench", "severity": "INFO", "payload_json": "{}"}] * 10)
+                else:
+                    rollups.creator_reports(session, [creator_id])
+                    rollups.experiment_reports(session, creator_id, 20)
+            ops += 1
+        except OperationalError as e:
+            if "locked" in str(e):
+                locked += 1
+            else:
+                failed += 1
+        except Exception as e:
+            failed += 1
+            print(f"{role} {os.getpid()}: {type(e).__name__}: {str(e)[:120]}", file=sys.stderr)
+    out.put((role, ops, locked, failed))
+
+
+def run_profile(writers: int, readers: int, seconds: float, creators: int, experiments: int) -> dict:
+    ids = _seed(creators, experiments)
+    from db import engine
+    engine.dispose()
+
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(role, ids, seconds, out))
+             for role in ["writer"] * writers + ["reader"] * readers]
+    for p in procs:
+        p.start()
+    results = [out.get(timeout=seconds + 120) for _ in procs]
+    for p in procs:
+        p.join()
+
+    report = {}
+    for role in ("writer", "reader"):
+        rows = [r for r in results if r[0] == role]
+        report[f"{role}_ops_per_sec"] = round(sum(r[1] for r in rows) / seconds, 1)
+        report[f"{role}_locked_errors"] = sum(r[2] for r in rows)
+        report[f"{role}_other_errors"] = sum(r[3] for r in rows)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database engine profile read/write benchmark")
+    parser.add_argument("--profile", action="append", choices=["default", "tuned"], help="profiles to compare, default both")
+    parser.add_argument("--url", help="database URL (default: scratch SQLite file per profile)")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--creators", type=int, default=20)
+    parser.add_argument("--experiments", type=int, default=10, help="experiments per creator")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Settings are read at import time, so each profile runs in its own interpreter
+        print(json.dumps(run_profile(args.writers, args.readers, args.seconds, args.creators, args.experiments)))
+        sys.exit(0)
+
+    for profile in args.profile or ["default", "tuned"]:
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(os.environ, DB_ENGINE_PROFILE=profile, AUDIT_ENABLED="false",
+                       DATABASE_URL=args.url or f"sqlite:///{os.path.join(scratch, 'bench.db')}")
+            cmd = [sys.executable, os.path.abspath(__file__), "--child",
+                   "--writers", str(args.writers), "--readers", str(args.readers), "--seconds", str(args.seconds),
+                   "--creators", str(args.creators), "--experiments", str(args.experiments)]
+            res = subprocess.run(cmd, env=env, cwd=scratch, capture_output=True, text=True)
+            if res.returncode != 0:
+                print(f"{profile:>8}: failed\n{res.stderr[-2000:]}")
+                continue
+            print(f"{profile:>8}: {res.stdout.strip().splitlines()[-1]}")
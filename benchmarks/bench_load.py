@@ -0,0 +1,209 @@
+# benchmarks/bench_load.py
+# Load test of the real app under gunicorn against the local fake Gemini backend.
+# For every (endpoint, workers, threads) scenario: start the fake backend and a fresh
+# gunicorn (with the production gunicorn.conf.py) in a scratch directory, send
+# requests open-loop at a fixed rate, and report p50/p95/p99 latency, throughput,
+# error rate and model-call amplification (backend calls per request). Exits 1 when a scenario drifts past the baseline.
+#
+#   python benchmarks/bench_load.py                      # compare with the stored baseline
+#   python benchmarks/bench_load.py --update-baseline    # record a new baseline
+#   python benchmarks/bench_load.py --workers 1,2,4 --threads 4,8 --rate 8 --duration 30
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import fake_gemini  # noqa: E402
+import fake_images  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline_load.json")
+PROFILE = os.path.join(HERE, "fake_gemini_profile.json")
+
+ENDPOINTS = {
+    "/generate_all": lambda i: {"text": f"خطة نمو رقم {i} لشركة ناشئة"},
+    "/alchemy/discover": lambda i: {"target_data": f"منشور مرجعي رقم {i} عن القيادة", "niche": "القيادة"},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def drive(url: str, body, rate: float, duration: float, timeout: float):
+    """
+    Open-loop load: request i is due at start + i / rate whether or not earlier ones
+    finished, and its latency is measured from that due time (no coordinated omission).
+    """
+    total = int(rate * duration)
+    local = threading.local()
+    latencies = np.full(total, np.nan)
+    ok = np.zeros(total, dtype=bool)
+
+    def one(i: int, due: float) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            res = session.post(url, json=body(i), timeout=timeout)
+            ok[i] = res.status_code == 200 and "error" not in res.json()
+        except (requests.RequestException, ValueError):
+            ok[i] = False
+        latencies[i] = time.perf_counter() - due
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(512, max(8, int(rate * timeout)))) as pool:
+        for i in range(total):
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, i, due)
+    elapsed = time.perf_counter() - started
+    return latencies, ok, elapsed
+
+
+def run_scenario(endpoint: str, workers: int, threads: int, args) -> dict:
+    backend = fake_gemini.serve(_free_port(), fake_gemini.load_profile(args.profile), args.latency_scale, args.seed)
+    images = fake_images.serve(_free_port(), latency=0.5 * args.latency_scale)
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            GEMINI_API_ENDPOINT=f"http://127.0.0.1:{backend.server_address[1]}",
+            GEMINI_API_KEY="local",
+            DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+            SIC_MEMORY_PATH=os.path.join(scratch, "sic_memory.db"),
+            TELEMETRY_PATH=os.path.join(scratch, "telemetry.db"),
+            IMAGE_UPSTREAM=f"http://127.0.0.1:{images.server_address[1]}",
+            IMAGE_CACHE_DIR=os.path.join(scratch, "image_cache"),
+            MODEL_CONTEXT_CACHE_ENABLED="false",
+        )
+        cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "--chdir", scratch, "--pythonpath", ROOT,
+               "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+               "--timeout", str(int(args.timeout) + 30), "--log-level", "warning"]
+        log = open(os.path.join(scratch, "gunicorn.log"), "w")
+        proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            _wait_ready(f"http://127.0.0.1:{port}/readyz", proc)
+            backend.reset()
+            latencies, ok, elapsed = drive(f"http://127.0.0.1:{port}{endpoint}", ENDPOINTS[endpoint],
+                                           args.rate, args.duration, args.timeout)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+            log.close()
+            backend.shutdown()
+            images.shutdown()
+
+    done = latencies[~np.isnan(latencies)] * 1000.0
+    calls = backend.stats()["total_calls"]
+    return {
+        "requests": int(latencies.size),
+        "p50_ms": round(float(np.percentile(done, 50)), 1),
+        "p95_ms": round(float(np.percentile(done, 95)), 1),
+        "p99_ms": round(float(np.percentile(done, 99)), 1),
+        "throughput_rps": round(float(ok.sum()) / elapsed, 2),
+        "error_rate": round(1.0 - float(ok.mean()), 4),
+        "amplification": round(calls / max(latencies.size, 1), 3),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Regressions against the baseline. Latency gets a small absolute slack so
+    sub-100ms noise never fails a run.
+    """
+    problems = []
+    for key, res in results.items():
+        base = baseline.get("scenarios", {}).get(key)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            limit = base[metric] * (1 + tolerance) + 50.0
+            if res[metric] > limit:
+                problems.append(f"{key}: {metric} {res[metric]} > {limit:.1f} (baseline {base[metric]})")
+        if res["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            problems.append(f"{key}: throughput_rps {res['throughput_rps']} < baseline {base['throughput_rps']} - {tolerance:.0%}")
+        if res["amplification"] > base["amplification"] * (1 + tolerance) + 0.05:
+            problems.append(f"{key}: amplification {res['amplification']} > baseline {base['amplification']} + {tolerance:.0%}")
+        if res["error_rate"] > base["error_rate"] + 0.02:
+            problems.append(f"{key}: error_rate {res['error_rate']} > baseline {base['error_rate']} + 0.02")
+    return problems
+
+
+def _ints(value: str):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test app.py under gunicorn against a fake Gemini backend")
+    parser.add_argument("--endpoint", action="append", choices=sorted(ENDPOINTS), help="default: all")
+    parser.add_argument("--workers", default="1,2", help="comma-separated gunicorn worker counts")
+    parser.add_argument("--threads", default="4", help="comma-separated gunicorn thread counts")
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load per scenario")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--profile", default=PROFILE, help="fake backend profile (JSON)")
+    parser.add_argument("--latency-scale", type=float, default=0.25, help="scale the profile latencies")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative drift")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for endpoint in args.endpoint or sorted(ENDPOINTS):
+        for workers in _ints(args.workers):
+            for threads in _ints(args.threads):
+                key = f"{endpoint} w={workers} t={threads} rate={args.rate:g}"
+                results[key] = run_scenario(endpoint, workers, threads, args)
+                print(f"{key:<48} {json.dumps(results[key])}", flush=True)
+
+    if args.update_baseline:
+        baseline = {"settings": {k: getattr(args, k) for k in ("duration", "latency_scale", "seed", "profile")},
+                    "scenarios": results}
+        baseline["settings"]["profile"] = os.path.relpath(args.profile, ROOT)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("no baseline, run with --update-baseline first")
+        sys.exit(0)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        problems = compare(results, json.load(f), args.tolerance)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    sys.exit(1 if problems else 0)
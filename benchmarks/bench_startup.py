@@ -0,0 +1,156 @@
+# benchmarks/bench_startup.py
+# Cold-start cost of the app, against the local fake Gemini backend.
+#   in-process: `import app`, create_app(), then the first /healthz, /readyz and
+#               /generate_all in a fresh interpreter, with the SDK warmed in
+#               create_app() or left to the first model call;
+#   gunicorn:   spawn -> /readyz answering 200 and the first /generate_all, with
+#               --preload on and off, plus the total PSS of master + workers.
+# Runs in a scratch directory; nothing real is contacted or written.
+#
+#   python benchmarks/bench_startup.py --runs 3 --workers 2,4
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import fake_gemini  # noqa: E402
+
+# Runs inside a fresh interpreter; prints one JSON line
+_IN_PROCESS = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+client = app.app.test_client()
+def timed(fn):
+    s = time.perf_counter(); res = fn(); return round(time.perf_counter() - s, 4), res.status_code
+health, hs = timed(lambda: client.get("/healthz"))
+ready, rs = timed(lambda: client.get("/readyz"))
+first, fs = timed(lambda: client.post("/generate_all", json={"text": "startup probe", "bypass_cache": True}))
+second, _ = timed(lambda: client.post("/generate_all", json={"text": "startup probe 2", "bypass_cache": True}))
+print(json.dumps({"import_sec": round(t1 - t0, 4), "create_app_sec": round(t2 - t1, 4), "healthz_sec": health,
+                  "readyz_sec": ready, "first_generate_sec": first, "second_generate_sec": second,
+                  "status": [hs, rs, fs]}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(scratch: str, backend_port: int, **extra) -> dict:
+    return dict(
+        os.environ,
+        GEMINI_API_ENDPOINT=f"http://127.0.0.1:{backend_port}",
+        GEMINI_API_KEY="local",
+        DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+        SIC_MEMORY_PATH=os.path.join(scratch, "sic_memory.db"),
+        TELEMETRY_PATH=os.path.join(scratch, "telemetry.db"),
+        IMAGE_CACHE_ENABLED="false",
+        MODEL_CONTEXT_CACHE_ENABLED="false",
+        PYTHONPATH=ROOT,
+        **extra,
+    )
+
+
+def _pss_mb(pid: int) -> float:
+    """PSS of a process and its children (Linux /proc), shared pages split fairly."""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            pids += [int(p) for p in f.read().split()]
+        for p in pids:
+            with open(f"/proc/{p}/smaps_rollup", "r") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+    except OSError:
+        return float("nan")
+    return round(total / 1024.0, 1)
+
+
+def in_process(backend_port: int, warm: bool) -> dict:
+    with tempfile.TemporaryDirectory() as scratch:
+        env = _env(scratch, backend_port, MODEL_SDK_WARM_ON_START=str(warm).lower())
+        out = subprocess.run([sys.executable, "-c", _IN_PROCESS], cwd=scratch, env=env,
+                             capture_output=True, text=True, timeout=300)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr[-500:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def gunicorn_boot(backend_port: int, workers: int, preload: bool) -> dict:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as scratch:
+        env = _env(scratch, backend_port, GUNICORN_PRELOAD=str(preload).lower())
+        cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "--chdir", scratch,
+               "--pythonpath", ROOT, "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"]
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            ready = None
+            while ready is None and time.perf_counter() - started < 120:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+                try:
+                    if requests.get(f"http://127.0.0.1:{port}/readyz", timeout=1).status_code == 200:
+                        ready = time.perf_counter() - started
+                except requests.RequestException:
+                    time.sleep(0.02)
+            first_started = time.perf_counter()
+            res = requests.post(f"http://127.0.0.1:{port}/generate_all", json={"text": "startup probe", "bypass_cache": True},
+                                timeout=60)
+            first = time.perf_counter() - first_started
+            time.sleep(1.0)  # let every worker finish booting before measuring memory
+            pss = _pss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    return {"ready_sec": round(ready, 3) if ready else None, "first_generate_sec": round(first, 3),
+            "first_generate_status": res.status_code, "pss_mb": pss}
+
+
+def _median(rows, key):
+    values = [r[key] for r in rows if r.get(key) is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import, create_app and first-request time of the app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", default="2", help="comma-separated gunicorn worker counts")
+    parser.add_argument("--skip-gunicorn", action="store_true")
+    args = parser.parse_args()
+
+    backend = fake_gemini.serve(_free_port(), fake_gemini.DEFAULT_PROFILE, latency_scale=0.05)
+    backend_port = backend.server_address[1]
+
+    for warm in (True, False):
+        rows = [in_process(backend_port, warm) for _ in range(args.runs)]
+        summary = {k: _median(rows, k) for k in rows[0] if k != "status"}
+        print(f"in-process warm_sdk={str(warm).lower():<5} {json.dumps(summary)}", flush=True)
+
+    if not args.skip_gunicorn:
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            for preload in (True, False):
+                rows = [gunicorn_boot(backend_port, workers, preload) for _ in range(args.runs)]
+                summary = {k: _median(rows, k) for k in ("ready_sec", "first_generate_sec", "pss_mb")}
+                print(f"gunicorn workers={workers} preload={str(preload).lower():<5} {json.dumps(summary)}", flush=True)
+    backend.shutdown()
@@ -0,0 +1,77 @@
+# benchmarks/bench_wpil_ingest.py
+# WPIL ingest throughput: per-pattern ingest_pattern vs bulk ingest_patterns.
+# Runs in a scratch directory; the real wpil_patterns.jsonl is never touched.
+#
+#   python benchmarks/bench_wpil_ingest.py --n 1000 --n 10000
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wpil_memory  # noqa: E402
+from wpil_ingest import ingest_pattern, ingest_patterns  # noqa: E402
+
+PLATFORMS = ["linkedin", "twitter", "tiktok"]
+NICHES = ["leadership", "coaching", "fintech", "saas", "real_estate"]
+INTENTS = ["educational", "authority", "storytelling"]
+
+
+def make_patterns(n: int, duplicate_ratio: float, seed: int = 7):
+    rng = random.Random(seed)
+    patterns = []
+    for i in range(n):
+        if patterns and rng.random() < duplicate_ratio:
+            patterns.append(dict(rng.choice(patterns)))
+            continue
+        patterns.append({
+            "platform": rng.choice(PLATFORMS),
+            "niche": rng.choice(NICHES),
+            "intent": rng.choice(INTENTS),
+            "hook": {"type": rng.choice(["bold_claim", "question", "number"]), "max_words": rng.choice([8, 12, 16]), "v": i},
+            "structure": {"line_density": "one_idea_per_line", "sentence_length": "short"},
+            "cta": {"type": "question", "position": "end"},
+        })
+    return patterns
+
+
+def _fresh_store() -> None:
+    for path in (wpil_memory.MEMORY_FILE, wpil_memory.LOCK_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+    wpil_memory._index.reset()
+
+
+def bench(n: int, duplicate_ratio: float, single_limit: int) -> None:
+    patterns = make_patterns(n, duplicate_ratio)
+
+    _fresh_store()
+    started = time.perf_counter()
+    report = ingest_patterns(iter(patterns))
+    bulk = time.perf_counter() - started
+    print(f"n={n:>7} bulk   ingest_patterns: {bulk:8.3f}s  {n / bulk:>10.0f} patterns/s  stored={report['stored']} dup={report['duplicates']}")
+
+    m = min(n, single_limit)
+    _fresh_store()
+    started = time.perf_counter()
+    for p in patterns[:m]:
+        ingest_pattern(p)
+    single = time.perf_counter() - started
+    print(f"n={m:>7} single ingest_pattern:  {single:8.3f}s  {m / single:>10.0f} patterns/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WPIL ingest throughput benchmark")
+    parser.add_argument("--n", type=int, action="append", help="batch sizes (repeatable), default 1000 and 10000")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="fraction of structural duplicates")
+    parser.add_argument("--single-limit", type=int, default=2000, help="cap for the per-pattern baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        for n in args.n or [1000, 10000]:
+            bench(n, args.duplicates, args.single_limit)
@@ -0,0 +1,138 @@
+# benchmarks/fake_apify.py
+# Local stand-in for the Apify run-sync endpoint
+# (POST /v2/acts/<actor>/run-sync-get-dataset-items), for tests and benchmarks that
+# must not start real actor runs. Point the app at it with
+#   APIFY_API_BASE=http://127.0.0.1:8767
+# Every run sleeps for a configurable latency and returns deterministic TikTok-style
+# items per profile URL; like the real endpoint, every call is a new run.
+# Every n-th run can fail with 429 / 503 to exercise retries.
+#
+#   python benchmarks/fake_apify.py --port 8767 --latency 2 --items 50
+#   GET /__stats -> {"runs": n, "failures": n}; POST /__reset clears them
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ROUTE = re.compile(r"^/v2/acts/(?P<actor>[^/]+)/run-sync-get-dataset-items")
+_LINES = [
+    "Most founders get hiring wrong.",
+    "Here is what 10 years taught me:",
+    "- Hire for slope, not intercept",
+    "- Write the job before the ad",
+    "- Pay for judgment",
+    "Which one do you disagree with?",
+]
+
+
+def dataset_items(url: str, count: int, now: float) -> list:
+    rng = random.Random(hashlib.sha256(url.encode("utf-8")).hexdigest())
+    items = []
+    for i in range(count):
+        lines = _LINES[: rng.randint(2, len(_LINES))]
+        items.append({
+            "id": hashlib.sha256(f"{url}:{i}".encode("utf-8")).hexdigest()[:12],
+            "text": "\n".join(lines),
+            "diggCount": rng.randint(10, 50_000),
+            "commentCount": rng.randint(0, 2_000),
+            "shareCount": rng.randint(0, 5_000),
+            "createTime": int(now) - rng.randint(0, 30) * 86400,
+            "webVideoUrl": f"{url.rstrip('/')}/video/{i}",
+        })
+    return items
+
+
+class FakeApify(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency: float = 1.0, items: int = 30, fail_every: int = 0):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.items = items
+        self.fail_every = fail_every
+        self.day = int(time.time() // 86400)  # data "changes" once a day
+        self.counts = {"runs": 0, "failures": 0}
+        self.stats_lock = threading.Lock()
+
+    def stats(self):
+        with self.stats_lock:
+            return dict(self.counts)
+
+    def reset(self) -> None:
+        with self.stats_lock:
+            self.counts = {"runs": 0, "failures": 0}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeApify
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, payload, headers=None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/__stats"):
+            return self._json(200, self.server.stats())
+        self._json(404, {"error": {"type": "page-not-found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path.startswith("/__reset"):
+            self.server.reset()
+            return self._json(200, {"ok": True})
+        if not _ROUTE.match(self.path):
+            return self._json(404, {"error": {"type": "page-not-found"}})
+
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._json(400, {"error": {"type": "invalid-input"}})
+        url = ((payload.get("profiles") or [None])[0]) or ((payload.get("startUrls") or [{}])[0]).get("url") or ""
+        count = int(payload.get("maxItems") or self.server.items)
+
+        with self.server.stats_lock:
+            self.server.counts["runs"] += 1
+            runs = self.server.counts["runs"]
+            failing = self.server.fail_every and runs % self.server.fail_every == 0
+            if failing:
+                self.server.counts["failures"] += 1
+        time.sleep(self.server.latency)
+        if failing:
+            return self._json(429 if runs % 2 else 503, {"error": {"type": "rate-limit-exceeded"}}, {"Retry-After": "0.1"})
+        self._json(200, dataset_items(url, min(count, self.server.items), self.server.day * 86400.0))
+
+
+def serve(port: int, latency: float = 1.0, items: int = 30, fail_every: int = 0) -> FakeApify:
+    """Starts the fake server on a background thread and returns it."""
+    server = FakeApify(("127.0.0.1", port), latency, items, fail_every)
+    threading.Thread(target=server.serve_forever, name="fake-apify", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Apify run-sync backend")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per actor run")
+    parser.add_argument("--items", type=int, default=30, help="dataset items per profile")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every n-th run with 429/503 (0 = never)")
+    args = parser.parse_args()
+
+    server = FakeApify(("127.0.0.1", args.port), args.latency, args.items, args.fail_every)
+    print(f"fake apify on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,181 @@
+# benchmarks/fake_gemini.py
+# Local stand-in for the Gemini REST API (generativelanguage v1beta), for load tests
+# that must not spend real quota. Point the app at it with
+#   GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+# Latency, error / 429 rates and response size are configurable per model name;
+# answers carry the [LINKEDIN]/[TWITTER]/[TIKTOK]/[VISUAL_PROMPT] markers.
+#
+#   python benchmarks/fake_gemini.py --port 8765 --profile benchmarks/fake_gemini_profile.json
+#   GET /__stats -> {"calls": {...}, "errors": {...}}; POST /__reset clears them
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+DEFAULT_PROFILE = {
+    "default": {
+        "latency_ms": {"median": 800, "p95": 2500},  # lognormal through these two points
+        "error_rate": 0.0,
+        "quota_rate": 0.0,
+        "response_chars": 1800,
+    },
+    "models": {},
+}
+
+_ROUTE = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)")
+_FILLER = "الاستراتيجية تبدأ من وضوح الرسالة. "
+
+
+def _merged(profile: Dict, model: str) -> Dict:
+    spec = dict(profile.get("default") or {})
+    spec.update((profile.get("models") or {}).get(model) or {})
+    return spec
+
+
+def sample_latency(spec: Dict, rng: random.Random, scale: float = 1.0) -> float:
+    """Seconds, drawn from a lognormal fitted to the median and p95 of the spec."""
+    lat = spec.get("latency_ms") or {}
+    median = max(float(lat.get("median", 800)), 1.0)
+    p95 = max(float(lat.get("p95", median)), median)
+    sigma = math.log(p95 / median) / 1.6449  # z(0.95)
+    return rng.lognormvariate(math.log(median), sigma) / 1000.0 * scale
+
+
+def bundle_text(chars: int, seed: int) -> str:
+    section = max(chars // 4, 40)
+    body = (_FILLER * (section // len(_FILLER) + 1))[:section]
+    return (f"[LINKEDIN]\n{body}\n[TWITTER]\n{body}\n[TIKTOK]\n{body}\n"
+            f"[VISUAL_PROMPT]\nExecutive in a tailored suit, boardroom, cinematic light, take {seed}")
+
+
+def _candidate(text: str, finished: bool) -> Dict:
+    c = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        c["finishReason"] = "STOP"
+    return c
+
+
+class FakeGemini(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, profile: Dict, latency_scale: float = 1.0, seed: int = 7):
+        super().__init__(addr, _Handler)
+        self.profile = profile
+        self.latency_scale = latency_scale
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.calls = Counter()
+        self.errors = Counter()
+        self.stats_lock = threading.Lock()
+
+    def draw(self, spec: Dict):
+        with self.rng_lock:
+            return (sample_latency(spec, self.rng, self.latency_scale), self.rng.random(), self.rng.random(),
+                    self.rng.randint(1, 99999))
+
+    def stats(self) -> Dict:
+        with self.stats_lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors), "total_calls": sum(self.calls.values())}
+
+    def reset(self) -> None:
+        with self.stats_lock:
+            self.calls.clear()
+            self.errors.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGemini
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/__stats"):
+            return self._json(200, self.server.stats())
+        self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.path.startswith("/__reset"):
+            self.server.reset()
+            return self._json(200, {"ok": True})
+
+        match = _ROUTE.match(self.path)
+        if not match:
+            # cachedContents and anything else: unsupported, the app falls back
+            return self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+        model = match["model"]
+        spec = _merged(self.server.profile, model)
+        latency, err_roll, quota_roll, seed = self.server.draw(spec)
+        with self.server.stats_lock:
+            self.server.calls[model] += 1
+        time.sleep(latency)
+
+        quota_rate = float(spec.get("quota_rate", 0.0))
+        error_rate = float(spec.get("error_rate", 0.0))
+        if quota_roll < quota_rate:
+            with self.server.stats_lock:
+                self.server.errors[f"{model}:429"] += 1
+            return self._json(429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                                              "status": "RESOURCE_EXHAUSTED"}})
+        if err_roll < error_rate:
+            with self.server.stats_lock:
+                self.server.errors[f"{model}:500"] += 1
+            return self._json(500, {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}})
+
+        text = bundle_text(int(spec.get("response_chars", 1800)), seed)
+        usage = {"promptTokenCount": 120, "candidatesTokenCount": len(text) // 4, "totalTokenCount": 120 + len(text) // 4}
+        if match["method"] == "generateContent":
+            return self._json(200, {"candidates": [_candidate(text, True)], "usageMetadata": usage})
+
+        # REST streaming: one JSON array, one element per chunk
+        pieces = [text[i:i + 200] for i in range(0, len(text), 200)]
+        chunks = [{"candidates": [_candidate(p, i == len(pieces) - 1)]} for i, p in enumerate(pieces)]
+        chunks[-1]["usageMetadata"] = usage
+        return self._json(200, chunks)
+
+
+def serve(port: int, profile: Dict, latency_scale: float = 1.0, seed: int = 7) -> FakeGemini:
+    """Starts the fake server on a background thread and returns it."""
+    server = FakeGemini(("127.0.0.1", port), profile, latency_scale, seed)
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server
+
+
+def load_profile(path: str | None) -> Dict:
+    if not path:
+        return DEFAULT_PROFILE
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Gemini REST backend")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", help="JSON profile (default: built-in)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every sampled latency")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server = FakeGemini(("127.0.0.1", args.port), load_profile(args.profile), args.latency_scale, args.seed)
+    print(f"fake gemini on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,113 @@
+# benchmarks/fake_images.py
+# Local stand-in for the image render service (pollinations-style GET /prompt/<text>),
+# for tests and load runs that must not hit the real service. Point the app at it with
+#   IMAGE_UPSTREAM=http://127.0.0.1:8766
+# Every render sleeps for a configurable latency and returns deterministic bytes
+# for (prompt, seed), so repeated prompts are byte-identical.
+#
+#   python benchmarks/fake_images.py --port 8766 --latency 1.5
+#   GET /__stats -> {"renders": n, "by_seed": {...}}; POST /__reset clears them
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Smallest valid 1x1 PNG; the render payload is this plus a tail derived from the request
+_PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def render_bytes(prompt: str, seed: str, size: int) -> bytes:
+    digest = hashlib.sha256(f"{prompt}\x00{seed}".encode("utf-8")).digest()
+    return _PNG_1X1 + (digest * (size // len(digest) + 1))[:size]
+
+
+class FakeImages(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency: float = 0.5, size: int = 64_000, error_rate: float = 0.0):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.size = size
+        self.error_rate = error_rate
+        self.renders = 0
+        self.by_seed = Counter()
+        self.stats_lock = threading.Lock()
+
+    def stats(self):
+        with self.stats_lock:
+            return {"renders": self.renders, "by_seed": dict(self.by_seed)}
+
+    def reset(self) -> None:
+        with self.stats_lock:
+            self.renders = 0
+            self.by_seed.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeImages
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path.startswith("/__stats"):
+            return self._send(200, json.dumps(self.server.stats()).encode("utf-8"), "application/json")
+        if not parsed.path.startswith("/prompt/"):
+            return self._send(404, b"not found", "text/plain")
+
+        prompt = urllib.parse.unquote(parsed.path[len("/prompt/"):])
+        seed = urllib.parse.parse_qs(parsed.query).get("seed", ["0"])[0]
+        with self.server.stats_lock:
+            self.server.renders += 1
+            self.server.by_seed[seed] += 1
+            failing = self.server.error_rate and (self.server.renders % max(int(1 / self.server.error_rate), 1) == 0)
+        time.sleep(self.server.latency)
+        if failing:
+            return self._send(502, b"render failed", "text/plain")
+        self._send(200, render_bytes(prompt, seed, self.server.size), "image/png")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.path.startswith("/__reset"):
+            self.server.reset()
+            return self._send(200, b'{"ok": true}', "application/json")
+        self._send(404, b"not found", "text/plain")
+
+
+def serve(port: int, latency: float = 0.5, size: int = 64_000, error_rate: float = 0.0) -> FakeImages:
+    """Starts the fake server on a background thread and returns it."""
+    server = FakeImages(("127.0.0.1", port), latency, size, error_rate)
+    threading.Thread(target=server.serve_forever, name="fake-images", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake image render backend")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per render")
+    parser.add_argument("--size", type=int, default=64_000, help="bytes per image")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of renders answered with 502")
+    args = parser.parse_args()
+
+    server = FakeImages(("127.0.0.1", args.port), args.latency, args.size, args.error_rate)
+    print(f"fake images on http://127.0.0.1:{args.port}")
+    server.serve_forever()
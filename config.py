@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,19 +13,144 @@ class Settings(BaseSettings):
     API_PREFIX: str = "/v1"
     MAX_REQUEST_BYTES: int = 2_000_000  # 2MB payload guard for MVP
 
+    # Database engine profile ("tuned" applies the settings below, "default" is plain SQLAlchemy)
+    DB_ENGINE_PROFILE: Literal["tuned", "default"] = "tuned"
+    DB_QUERY_CACHE_SIZE: int = 1200  # compiled statement cache per engine
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268_435_456  # 256MB
+    SQLITE_CACHE_SIZE: int = -65_536  # negative = KiB, i.e. 64MB per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SEC: int = 10
+    DB_POOL_RECYCLE_SEC: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     # Gemini (optional in MVP; system falls back to deterministic templates)
     GEMINI_API_KEY: str | None = None
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_API_ENDPOINT: str | None = None  # e.g. http://127.0.0.1:8765 for benchmarks/fake_gemini.py (REST transport)
 
     # Apify (optional)
     APIFY_API_KEY: str | None = None
     APIFY_TIKTOK_PROFILE_ACTOR: str | None = None  # e.g. actor id if you have it
     APIFY_TIKTOK_TREND_ACTOR: str | None = None
+    APIFY_LINKEDIN_PROFILE_ACTOR: str | None = None
+    APIFY_TWITTER_PROFILE_ACTOR: str | None = None
+    APIFY_API_BASE: str = "https://api.apify.com"  # point at a local stand-in for tests
+    APIFY_FETCH_CONCURRENCY: int = 4  # actor runs in flight per worker
+    APIFY_FETCH_TIMEOUT_SEC: float = 300.0  # run-sync waits for the actor to finish
+    APIFY_FETCH_RETRIES: int = 3
+    APIFY_RETRY_BACKOFF_SEC: float = 1.0  # doubles per attempt, with jitter
+    APIFY_RETRY_MAX_SEC: float = 30.0
+    APIFY_MAX_ITEMS: int = 100  # posts per profile
+    APIFY_CACHE_DIR: str = "./apify_cache"
+    APIFY_CACHE_TTL_SEC: int = 21600  # after this the actor runs again; expired entries are deleted
+    APIFY_CACHE_MAX_BYTES: int = 268_435_456  # 256MB, oldest entries go first
 
     # Rate limiting / safety
     MAX_REQUESTS_PER_IP_PER_MIN: int = 30
     MAX_CONCURRENT_JOBS: int = 2
     MODEL_TIMEOUT_SEC: int = 90
+    MAX_QUEUED_JOBS: int = 50  # per worker; beyond this /jobs answers 429
+    JOB_TIMEOUT_SEC: int = 600  # whole-job deadline (default and cap of timeout_sec); covers the full model chain
+    JOB_CANCEL_POLL_SEC: float = 1.0  # how often a running job checks its deadline and the table for a cancel
+
+    # Model clients (one per process) and provider-side context caching of the system text
+    MODEL_SDK_WARM_ON_START: bool = True  # import the Gemini SDK in create_app(), not on the first model call
+    MODEL_CONTEXT_CACHE_ENABLED: bool = False  # the stock system prompt is far below the provider minimum
+    MODEL_CONTEXT_CACHE_MIN_TOKENS: int = 32768  # provider minimum for an explicit cache; smaller systems are never tried
+    MODEL_CONTEXT_CACHE_MODELS: list[str] = ["gemini-1.5-flash", "gemini-2.0-flash", "gemini-2.5-flash", "gemini-2.5-flash-lite"]
+    MODEL_CONTEXT_CACHE_TTL_SEC: int = 3600
+    MODEL_CONTEXT_CACHE_RETRY_SEC: int = 3600  # after a model refuses a cache (unsupported / too few tokens)
+
+    # /generate_all/batch fan-out (size the pool to the model quota)
+    BATCH_MAX_IDEAS: int = 200
+    BATCH_POOL_WORKERS: int = 8  # per worker process, shared by all batch requests
+    BATCH_CONCURRENCY: int = 4  # default in-flight ideas per batch request
+
+    # Generation mode: "single" = one completion for the whole bundle, "sections" = one
+    # concurrent completion per platform + visual, each retried on its own
+    GENERATE_MODE: Literal["single", "sections"] = "single"
+    SECTION_POOL_WORKERS: int = 16
+    SECTION_RETRIES: int = 2
+    SECTION_RETRY_BACKOFF_SEC: float = 1.0
+
+    # Nebula hedged racing (start the next model if the current one is slow)
+    MODEL_HEDGE_ENABLED: bool = True
+    MODEL_HEDGE_DELAY_SEC: float = 2.0
+    MODEL_HEDGE_MAX_INFLIGHT: int = 2
+    NEBULA_POOL_WORKERS: int = 16
+
+    # Nebula model health (shared via DATABASE_URL)
+    MODEL_HEALTH_REFRESH_SEC: float = 2.0
+    MODEL_HEALTH_FLUSH_SEC: float = 1.0  # buffered attempts are written this often
+    MODEL_BREAKER_FAILURES: int = 3
+    MODEL_BREAKER_COOLDOWN_SEC: int = 60
+    MODEL_BREAKER_QUOTA_COOLDOWN_SEC: int = 300
+
+    # LLM response cache (memory LRU in front of the DB)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SEC: int = 86400
+    RESPONSE_CACHE_MEMORY_ITEMS: int = 512
+    RESPONSE_CACHE_MEMORY_TTL_SEC: int = 600
+    RESPONSE_CACHE_PURGE_EVERY: int = 200  # stores per worker between deletes of expired rows (0 = never)
+    RESPONSE_CACHE_HIT_BATCH: int = 64  # DB-tier hit counts buffered per worker before one batched UPDATE
+
+    # Single-flight coalescing of identical in-flight prompts
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_SHARED: bool = True  # coordinate workers through inflight_locks
+    SINGLEFLIGHT_LOCK_TTL_SEC: int | None = None  # None = the caller's worst case (every model timing out, for Nebula)
+    SINGLEFLIGHT_FAILURE_TTL_SEC: float = 10.0  # a leader's failure answers followers and new callers this long
+    SINGLEFLIGHT_POLL_SEC: float = 0.25
+
+    # SIC platform memory (host-shared SQLite WAL counters)
+    SIC_MEMORY_PATH: str = "./sic_memory.db"
+    SIC_MEMORY_FLUSH_SEC: float = 2.0
+    SIC_MEMORY_FLUSH_BATCH: int = 500
+    SIC_MEMORY_MIN_OUTCOMES: int = 20  # completed experiments before a platform's score can suppress it in /sic/screen
+
+    # Audit log (async, batched inserts into audit_logs)
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_MAX: int = 10000  # per worker; only ERROR events may exceed it
+    AUDIT_FLUSH_SEC: float = 1.0
+    AUDIT_FLUSH_BATCH: int = 500
+    AUDIT_OVERLOAD_AT: float = 0.5  # queue fill ratio where INFO shedding starts
+    AUDIT_OVERLOAD_POLICY: Literal["drop", "sample"] = "sample"
+    AUDIT_INFO_SAMPLE_RATE: float = 0.1
+
+    # Telemetry (host-shared SQLite WAL series, served at /metrics)
+    TELEMETRY_ENABLED: bool = True
+    TELEMETRY_PATH: str = "./telemetry.db"
+    TELEMETRY_FLUSH_SEC: float = 2.0
+    TELEMETRY_FLUSH_BATCH: int = 2000
+
+    # Per-request sampling profiler (send PROFILE_HEADER: <PROFILE_TOKEN>)
+    PROFILE_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Dominator-Profile"
+    PROFILE_TOKEN: str | None = None
+    PROFILE_SAMPLE_INTERVAL_SEC: float = 0.005
+    PROFILE_DIR: str = "./profiles"
+
+    # Visual assets (content-addressed on-disk LRU served at /images/<key>)
+    IMAGE_CACHE_ENABLED: bool = True
+    IMAGE_CACHE_DIR: str = "./image_cache"
+    IMAGE_CACHE_MAX_BYTES: int = 536_870_912  # 512MB, least recently served images go first
+    IMAGE_UPSTREAM: str = "https://image.pollinations.ai"  # point at a local stub for tests
+    IMAGE_PUBLIC_BASE: str = ""  # prefix for /images/<key> URLs, e.g. https://cdn.example.com
+    IMAGE_WIDTH: int = 1024
+    IMAGE_HEIGHT: int = 1024
+    IMAGE_MODEL: str = "flux"
+    IMAGE_PREFETCH_WORKERS: int = 4
+    IMAGE_FETCH_TIMEOUT_SEC: float = 60.0
+    IMAGE_FETCH_RETRIES: int = 1
+    IMAGE_WAIT_SEC: float = 0.0  # /images/<key> wait for a pending render before redirecting upstream; it holds a request thread
+
+    # Reports (read from creator rollups)
+    REPORTS_MAX_CREATORS: int = 500
+    REPORTS_MAX_DAYS: int = 365
+    REPORTS_MAX_EXPERIMENTS: int = 200
 
     # Feature flags
     ENABLE_LLM: bool = True
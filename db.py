@@ -1,13 +1,58 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-)
+
+def _engine_kwargs(url: str) -> dict:
+    is_sqlite = url.startswith("sqlite")
+    kwargs = {
+        "echo": False,
+        "future": True,
+        "connect_args": {"check_same_thread": False} if is_sqlite else {},
+    }
+    if settings.DB_ENGINE_PROFILE != "tuned":
+        return kwargs
+
+    kwargs["query_cache_size"] = settings.DB_QUERY_CACHE_SIZE
+    if is_sqlite:
+        # sqlite3's own busy handler, in seconds; the PRAGMA below keeps it in sync
+        kwargs["connect_args"]["timeout"] = settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0
+    else:
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SEC,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_use_lifo=True,  # idle connections age out instead of all staying warm
+        )
+    return kwargs
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL))
+
+if settings.DB_ENGINE_PROFILE == "tuned" and engine.dialect.name == "sqlite" and ":memory:" not in settings.DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cur.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cur.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cur.close()
+
+def lock_for_write(session) -> None:
+    """
+    Takes the database write lock at the start of the session's transaction, so a
+    read-modify-write is serialized across workers. SQLite ignores SELECT ... FOR
+    UPDATE, so there the transaction is opened with BEGIN IMMEDIATE; other backends
+    rely on the caller's row locks.
+    """
+    conn = session.connection()
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
 Base = declarative_base()
@@ -15,4 +60,24 @@ Base = declarative_base()
 
 def init_db():
     import models  # noqa: F401
+    existing = set(inspect(engine).get_table_names())
     Base.metadata.create_all(bind=engine)
+    # create_all only builds tables it creates; add the columns (with their scalar
+    # defaults) and indexes declared later to old tables
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            have = {c["name"] for c in inspect(engine).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in have and not column.primary_key:
+                    _add_column(table.name, column)
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+
+
+def _add_column(table_name: str, column) -> None:
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        ddl += f" DEFAULT {default!r}" if isinstance(default, (int, float)) else f" DEFAULT '{default}'"
+    with engine.begin() as conn:
+        conn.exec_driver_sql(ddl)
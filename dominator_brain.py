@@ -1,5 +1,12 @@
 from __future__ import annotations
-from typing import Any, Dict, List
+import copy
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 # =========================================================
 # Strategic Intelligence Core (SIC) - V14.1 FINAL STABILITY
@@ -34,3 +41,289 @@ def alchemy_fusion_core(gold_posts: List[Dict[str, Any]], niche: str) -> Dict[st
     صمم [VISUAL_PROMPT] يصف لقطة فوتوغرافية لـ {get_elite_character()} مرتبطة بالموضوع.
     """
     return {"synthesis_task": task, "logic_trace": "SYNTHESIS v14.1 ACTIVE"}
+
+# =========================================================
+# SIC Decision Engine - V16.0 (SIC_LOGIC.md / SIC_BLUEPRINT.md)
+# Pure & deterministic: normalize -> metrics -> dominance law -> platforms -> directive
+# =========================================================
+
+SIC_PLATFORMS = ("linkedin", "twitter", "tiktok")
+SIC_INTENTS = ("inform", "persuade", "dominate")
+SIC_STYLES = ("Professional", "Aggressive", "Visionary", "Rebel")
+SIC_TIME_CONTEXTS = ("now", "trend", "evergreen")
+
+# Metric columns produced by sic_metrics_batch
+SIC_METRICS = ("curiosity", "shock", "skimmability", "share", "authority", "hook", "depth", "visual")
+_M = {name: i for i, name in enumerate(SIC_METRICS)}
+
+DOMINANCE_LAW = {"curiosity": 0.7, "share": 0.6, "hook": 0.6}
+PLATFORM_RULES = {
+    "twitter": (("curiosity", "skimmability"), 1.6),
+    "linkedin": (("authority", "depth"), 1.5),
+    "tiktok": (("shock", "visual"), 1.4),
+}
+PLATFORM_SUPPRESSION = 0.6
+CONTENT_MODES = {"twitter": "thread", "linkedin": "post", "tiktok": "video"}
+CTA_BY_INTENT = {"inform": "question", "persuade": "action", "dominate": "curiosity"}
+
+# Shared with hook_scoring: the same cue words score hooks and SIC signals
+SIGNAL_WORDS = {
+    "curiosity": re.compile(r"\b(why|how|secret|nobody|truth|mistake|hidden|what if)\b|لماذا|كيف|سر|الحقيقة|خطأ|لا أحد", re.I),
+    "shock": re.compile(r"\b(never|stop|dead|fail\w*|worst|shocking|lie|wrong)\b|لن|توقف|فشل|أسوأ|صادم|كذبة", re.I),
+    "you": re.compile(r"\b(you|your)\b|أنت|لك|عليك", re.I),
+    "authority": re.compile(r"\b(data|study|research|years|experience|proven|report)\b|بيانات|دراسة|سنوات|خبرة|مثبت", re.I),
+    "visual": re.compile(r"\b(see|watch|look|video|show|picture)\b|شاهد|انظر|فيديو|صورة", re.I),
+}
+NUMBER = re.compile(r"\d+")
+
+# Feature columns extracted per signal (text-side, then all math runs on arrays)
+_FEATURES = ("words", "lines", "words_per_line", "questions", "exclaims", "numbers", "percents",
+             "curiosity_words", "shock_words", "you_words", "authority_words", "visual_words",
+             "hook_words", "hook_question", "hook_number", "hook_curiosity", "hook_shock",
+             "trend", "persuade", "dominate", "inform",
+             "style_professional", "style_aggressive", "style_visionary", "style_rebel", "confidence")
+_F = {name: i for i, name in enumerate(_FEATURES)}
+
+_DECISION_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_DECISION_CACHE_MAX = 4096
+_DECISION_CACHE_LOCK = threading.Lock()
+
+
+def _abort(reason: str) -> Dict[str, Any]:
+    return {
+        "execute": False,
+        "primary_platform": None,
+        "secondary_platforms": [],
+        "content_mode": "post",
+        "style_override": "",
+        "rules": {},
+        "decision_reason": reason,
+    }
+
+
+def sic_normalize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stage 1: validates the input contract and returns the canonical signal.
+    Raises ValueError with a readable reason when the input is missing or malformed.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("input must be an object")
+    content = payload.get("content_signal")
+    if not isinstance(content, dict):
+        raise ValueError("content_signal is required")
+    style = payload.get("style_signal") or {}
+    context = payload.get("context_signal") or {}
+    memory = payload.get("system_memory") or {}
+    if not all(isinstance(x, dict) for x in (style, context, memory)):
+        raise ValueError("style_signal, context_signal and system_memory must be objects")
+
+    topic = " ".join(str(content.get("topic") or "").split())
+    raw_text = "\n".join(" ".join(l.split()) for l in str(content.get("raw_text") or "").splitlines() if l.strip())
+    if not topic and not raw_text:
+        raise ValueError("content_signal needs a topic or raw_text")
+
+    intent = str(content.get("intent") or "inform").strip().lower()
+    if intent not in SIC_INTENTS:
+        raise ValueError(f"unknown intent: {intent}")
+
+    style_dna = str(style.get("style_dna") or "Professional").strip().capitalize()
+    if style_dna not in SIC_STYLES:
+        raise ValueError(f"unknown style_dna: {style_dna}")
+    confidence = float(style.get("confidence_level", 1.0))
+    if not 0.0 <= confidence <= 1.0:
+        raise ValueError("confidence_level must be between 0.0 and 1.0")
+
+    platforms = context.get("platforms_available", list(SIC_PLATFORMS))
+    if not isinstance(platforms, list):
+        raise ValueError("platforms_available must be a list")
+    platforms = sorted({"twitter" if str(p).strip().lower() == "x" else str(p).strip().lower() for p in platforms})
+    unknown = [p for p in platforms if p not in SIC_PLATFORMS]
+    if unknown:
+        raise ValueError(f"unknown platforms: {unknown}")
+
+    time_context = str(context.get("time_context") or "now").strip().lower()
+    if time_context not in SIC_TIME_CONTEXTS:
+        raise ValueError(f"unknown time_context: {time_context}")
+
+    history = memory.get("historical_scores") or {}
+    if not isinstance(history, dict):
+        raise ValueError("historical_scores must be an object")
+    history = {p: round(float(history[p]), 4) for p in SIC_PLATFORMS if history.get(p) is not None}
+
+    return {
+        "topic": topic,
+        "raw_text": raw_text,
+        "intent": intent,
+        "style_dna": style_dna,
+        "confidence_level": round(confidence, 4),
+        "platforms_available": platforms,
+        "time_context": time_context,
+        "historical_scores": history,
+    }
+
+
+def _features(signal: Dict[str, Any]) -> List[float]:
+    text = "\n".join(x for x in (signal["topic"], signal["raw_text"]) if x)
+    lines = text.splitlines()
+    hook = lines[0]
+    words = len(text.split())
+    counts = {name: len(rx.findall(text)) for name, rx in SIGNAL_WORDS.items()}
+    row = {
+        "words": words,
+        "lines": len(lines),
+        "words_per_line": words / len(lines),
+        "questions": text.count("?") + text.count("؟"),
+        "exclaims": text.count("!"),
+        "numbers": len(NUMBER.findall(text)),
+        "percents": text.count("%"),
+        "curiosity_words": counts["curiosity"],
+        "shock_words": counts["shock"],
+        "you_words": counts["you"],
+        "authority_words": counts["authority"],
+        "visual_words": counts["visual"],
+        "hook_words": len(hook.split()),
+        "hook_question": float("?" in hook or "؟" in hook),
+        "hook_number": float(bool(NUMBER.search(hook))),
+        "hook_curiosity": float(bool(SIGNAL_WORDS["curiosity"].search(hook))),
+        "hook_shock": float(bool(SIGNAL_WORDS["shock"].search(hook))),
+        "trend": float(signal["time_context"] == "trend"),
+        "persuade": float(signal["intent"] == "persuade"),
+        "dominate": float(signal["intent"] == "dominate"),
+        "inform": float(signal["intent"] == "inform"),
+        "style_professional": float(signal["style_dna"] == "Professional"),
+        "style_aggressive": float(signal["style_dna"] == "Aggressive"),
+        "style_visionary": float(signal["style_dna"] == "Visionary"),
+        "style_rebel": float(signal["style_dna"] == "Rebel"),
+        "confidence": signal["confidence_level"],
+    }
+    return [row[name] for name in _FEATURES]
+
+
+def sic_metrics_batch(signals: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Stage 2 for N normalized signals at once: returns an (N, len(SIC_METRICS)) array
+    of scores in [0.0, 1.0].
+    """
+    X = np.array([_features(s) for s in signals], dtype=float).reshape(len(signals), len(_FEATURES))
+    f = {name: X[:, i] for name, i in _F.items()}
+    cap = np.minimum
+    style = f["confidence"]
+
+    curiosity = (0.45 + 0.15 * cap(f["questions"], 2) + 0.1 * cap(f["curiosity_words"], 3)
+                 + 0.1 * f["hook_number"] + 0.05 * f["trend"] + 0.05 * style * (f["style_visionary"] + f["style_rebel"]))
+    shock = (0.3 + 0.12 * cap(f["exclaims"], 2) + 0.12 * cap(f["shock_words"], 3) + 0.1 * f["dominate"]
+             + 0.1 * style * (f["style_aggressive"] + f["style_rebel"]))
+    skimmability = 1.15 - np.clip((f["words_per_line"] - 6.0) / 20.0, 0.0, 1.0) - 0.15 * (f["lines"] < 3)
+    share = (0.35 + 0.1 * cap(f["you_words"], 3) + 0.1 * cap(f["numbers"], 2) + 0.15 * f["trend"]
+             + 0.1 * f["persuade"] + 0.05 * cap(f["questions"], 1))
+    authority = (0.3 + 0.12 * cap(f["authority_words"], 3) + 0.1 * cap(f["numbers"], 2) + 0.05 * cap(f["percents"], 2)
+                 + 0.1 * f["inform"] + 0.1 * style * f["style_professional"])
+    hook = (0.4 + 0.2 * (f["hook_words"] <= 12) + 0.15 * np.maximum(f["hook_question"], f["hook_number"])
+            + 0.15 * f["hook_curiosity"] + 0.1 * f["hook_shock"])
+    depth = f["words"] / 150.0
+    visual = 0.3 + 0.15 * cap(f["visual_words"], 2) + 0.2 * f["dominate"] + 0.1 * (f["words"] <= 60)
+
+    metrics = np.stack([curiosity, shock, skimmability, share, authority, hook, depth, visual], axis=1)
+    return np.round(np.clip(metrics, 0.0, 1.0), 4)
+
+
+def _directives(signals: List[Dict[str, Any]], metrics: np.ndarray) -> List[Dict[str, Any]]:
+    # Stage 3: dominance law as boolean arrays
+    failing = {name: metrics[:, _M[name]] < threshold for name, threshold in DOMINANCE_LAW.items()}
+    aborted = np.logical_or.reduce(list(failing.values()))
+
+    # Stage 4: platform rules -> margin per platform (NaN when the rule is not met)
+    margins = {}
+    for platform, (pair, threshold) in PLATFORM_RULES.items():
+        total = metrics[:, _M[pair[0]]] + metrics[:, _M[pair[1]]]
+        margins[platform] = np.where(total >= threshold, total - threshold, np.nan)
+
+    decisions = []
+    for i, signal in enumerate(signals):
+        m = {name: float(metrics[i, j]) for j, name in enumerate(SIC_METRICS)}
+        if aborted[i]:
+            failed = [f"{name}={m[name]:.2f}<{DOMINANCE_LAW[name]}" for name in DOMINANCE_LAW if failing[name][i]]
+            decisions.append(_abort("dominance law: " + ", ".join(failed)))
+            continue
+
+        selected, suppressed = [], []
+        for platform in SIC_PLATFORMS:
+            if platform not in signal["platforms_available"] or np.isnan(margins[platform][i]):
+                continue
+            if signal["historical_scores"].get(platform, 1.0) < PLATFORM_SUPPRESSION:
+                suppressed.append(platform)
+                continue
+            selected.append((-float(margins[platform][i]), SIC_PLATFORMS.index(platform), platform))
+        if not selected:
+            reason = "no platform rule satisfied"
+            if suppressed:
+                reason += f" (suppressed by history: {', '.join(suppressed)})"
+            decisions.append(_abort(reason))
+            continue
+
+        # Stage 5: decision directive
+        ranked = [p for _, _, p in sorted(selected)]
+        primary = ranked[0]
+        if primary == "linkedin":
+            length = "long" if m["depth"] >= 0.7 else "medium"
+        else:
+            length = "short"
+        decisions.append({
+            "execute": True,
+            "primary_platform": primary,
+            "secondary_platforms": ranked[1:],
+            "content_mode": CONTENT_MODES[primary],
+            "style_override": signal["style_dna"],
+            "rules": {"hook_required": True, "cta_type": CTA_BY_INTENT[signal["intent"]], "length": length},
+            "decision_reason": (
+                f"{primary} rule met (curiosity={m['curiosity']:.2f}, share={m['share']:.2f}, hook={m['hook']:.2f})"
+                + (f"; suppressed by history: {', '.join(suppressed)}" if suppressed else "")
+            ),
+        })
+    return decisions
+
+
+def sic_decide_batch(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Runs the SIC pipeline for many input objects in one vectorized pass.
+    Decisions are memoized on the normalized signal; malformed inputs get execute=false.
+    Never raises.
+    """
+    results: List[Dict[str, Any] | None] = [None] * len(payloads)
+    pending: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+
+    for i, payload in enumerate(payloads):
+        try:
+            signal = sic_normalize(payload)
+        except (TypeError, ValueError) as e:
+            results[i] = _abort(f"invalid input: {e}")
+            continue
+        key = json.dumps(signal, sort_keys=True, ensure_ascii=False)
+        with _DECISION_CACHE_LOCK:
+            cached = _DECISION_CACHE.get(key)
+            if cached is not None:
+                _DECISION_CACHE.move_to_end(key)
+        if cached is not None:
+            results[i] = copy.deepcopy(cached)
+        else:
+            pending.setdefault(key, (signal, []))[1].append(i)
+
+    if pending:
+        keys = list(pending)
+        signals = [pending[k][0] for k in keys]
+        for key, decision in zip(keys, _directives(signals, sic_metrics_batch(signals))):
+            with _DECISION_CACHE_LOCK:
+                _DECISION_CACHE[key] = decision
+                while len(_DECISION_CACHE) > _DECISION_CACHE_MAX:
+                    _DECISION_CACHE.popitem(last=False)
+            for i in pending[key][1]:
+                results[i] = copy.deepcopy(decision)
+
+    return results
+
+
+def sic_decide(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Single-input SIC decision (see SIC_BLUEPRINT.md section 5 for the output contract).
+    """
+    return sic_decide_batch([payload])[0]
@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# Preloaded master: app.create_app() runs once before forking (tables, Gemini SDK
+# import), and the workers share those pages copy-on-write instead of each paying
+# the full import on boot. Everything with threads, sockets or a pid in it is
+# created lazily per process, so nothing the master touched leaks into a worker.
+#
+# Threaded workers: SSE streams (/generate_all/stream, /jobs/<id>/stream) and batch
+# requests hold a request thread for minutes, so a sync worker with the default 30s
+# timeout would be killed mid-stream. Each gthread worker serves GUNICORN_THREADS
+# requests at once; its heartbeat comes from the main loop, so the timeout only
+# catches a worker that is stuck as a whole.
+#
+#   gunicorn -c gunicorn.conf.py            (Procfile)
+#   GUNICORN_PRELOAD=false WEB_CONCURRENCY=4 GUNICORN_THREADS=32 gunicorn -c gunicorn.conf.py
+
+import os
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name) or default)
+
+
+wsgi_app = "app:create_app()"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() not in ("0", "false", "no")
+
+workers = _int("WEB_CONCURRENCY", 2)  # every worker owns its own model, section and batch pools
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = _int("GUNICORN_THREADS", 16)
+timeout = _int("GUNICORN_TIMEOUT", 300)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 60)  # lets in-flight streams and jobs finish on reload
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+
+def post_fork(server, worker):
+    # create_app() already disposed its pool; this also covers connections opened by
+    # anything else the master ran. close=False leaves the parent's sockets alone.
+    from db import engine
+
+    engine.dispose(close=False)
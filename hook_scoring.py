@@ -0,0 +1,246 @@
+# hook_scoring.py
+# Hook Variant Scoring Engine
+# Ranks many candidate hooks per idea locally (one feature matrix, one matrix product)
+# so the model only has to write candidates, never score them. The top three per idea
+# become the A/B/C HookVariants of the daily brief.
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from dominator_brain import NUMBER, SIGNAL_WORDS
+from schemas import HookVariant
+from wpil_runtime import invoke_wpil
+
+VARIANT_KEYS = ("A", "B", "C")
+ARCHETYPES = ("question", "number", "story", "contrarian", "curiosity", "bold_claim")
+
+# Feature columns; each is scaled to [0, 1]
+HOOK_FEATURES = ("length_fit", "brevity", "archetype_match", "genome_affinity", "curiosity",
+                 "specificity", "direct_address", "tension", "vocab_match", "onscreen_fit")
+_H = {name: i for i, name in enumerate(HOOK_FEATURES)}
+
+# Default logit weights; a creator's calibration_json["hook_weights"] overrides any of them
+DEFAULT_WEIGHTS = {
+    "length_fit": 2.0, "brevity": 0.3, "archetype_match": 1.0, "genome_affinity": 1.2, "curiosity": 0.8,
+    "specificity": 0.6, "direct_address": 0.5, "tension": 0.4, "vocab_match": 0.6, "onscreen_fit": 0.7,
+}
+DEFAULT_BIAS = -3.0
+
+ONSCREEN_MAX_WORDS = 6
+
+WHY = {
+    "length_fit": "fits the {max_words}-word hook limit",
+    "brevity": "short enough to land in the first second",
+    "archetype_match": "matches the winning {hook_type} pattern",
+    "genome_affinity": "uses a hook archetype this creator wins with",
+    "curiosity": "opens a curiosity gap",
+    "specificity": "specific number builds credibility",
+    "direct_address": "speaks directly to the viewer",
+    "tension": "creates tension",
+    "vocab_match": "uses the creator's own vocabulary",
+    "onscreen_fit": "on-screen text is readable at a glance",
+}
+FIX = {
+    "length_fit": "cut the hook to {max_words} words or fewer",
+    "brevity": "drop filler words from the opening",
+    "archetype_match": "rewrite it as a {hook_type} hook",
+    "genome_affinity": "use an archetype that has worked for this creator ({favorite})",
+    "curiosity": "leave one question unanswered (why / how / the mistake)",
+    "specificity": "add a concrete number",
+    "direct_address": "address the viewer as \"you\"",
+    "tension": "name what goes wrong if they ignore it",
+    "vocab_match": "use a phrase from the creator's own vocabulary",
+    "onscreen_fit": f"keep on-screen text to {ONSCREEN_MAX_WORDS} words or fewer",
+}
+
+_QUESTION_END = re.compile(r"[?؟]\s*$")
+_FIRST_PERSON = re.compile(r"\b(i|my|me|we)\b|أنا|كنت|قصتي", re.I)
+_TOKEN = re.compile(r"\w+", re.U)
+
+
+def _loads(raw: Any) -> Dict:
+    if isinstance(raw, dict):
+        return raw
+    try:
+        value = json.loads(raw or "{}")
+    except (TypeError, ValueError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _number(value: Any, default: float) -> float:
+    # Genome JSON is free-form: anything that is not a finite number falls back to the default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return number if np.isfinite(number) else default
+
+
+def _words(raw: Any) -> List[str]:
+    # A list of words, or one string of them ("growth, leverage") rather than its characters
+    if isinstance(raw, str):
+        return _TOKEN.findall(raw)
+    if isinstance(raw, (list, tuple, set)):
+        return [w for w in raw if isinstance(w, str)]
+    return []
+
+
+def scoring_context(genome) -> Tuple[Dict, Dict]:
+    """
+    (creator_dna, calibration) dicts from a Genome row; empty when there is no genome.
+    """
+    if genome is None:
+        return {}, {}
+    return _loads(genome.creator_dna_json), _loads(genome.calibration_json)
+
+
+def archetype_of(hook: str) -> str:
+    if _QUESTION_END.search(hook):
+        return "question"
+    if NUMBER.search(hook):
+        return "number"
+    if _FIRST_PERSON.search(hook):
+        return "story"
+    if SIGNAL_WORDS["shock"].search(hook):
+        return "contrarian"
+    if SIGNAL_WORDS["curiosity"].search(hook):
+        return "curiosity"
+    return "bold_claim"
+
+
+def _affinities(dna: Dict) -> Dict[str, float]:
+    # hook_archetypes may be a ranked list (best first) or a {archetype: weight} map
+    raw = dna.get("hook_archetypes") or []
+    if isinstance(raw, dict):
+        return {str(k): float(np.clip(_number(v, 0.0), 0.0, 1.0)) for k, v in raw.items()}
+    ranked = _words(raw) if isinstance(raw, str) else [str(a) for a in raw] if isinstance(raw, (list, tuple)) else []
+    return {a: 1.0 - 0.25 * i for i, a in enumerate(ranked[:4])}
+
+
+def _candidate(raw: Any) -> Dict[str, str]:
+    if isinstance(raw, str):
+        return {"hook_text": " ".join(raw.split()), "onscreen_text": ""}
+    return {
+        "hook_text": " ".join(str(raw.get("hook_text") or "").split()),
+        "onscreen_text": " ".join(str(raw.get("onscreen_text") or "").split()),
+    }
+
+
+def hook_feature_rows(candidates: List[Dict[str, str]], max_words: int, hook_type: str, dna: Dict) -> np.ndarray:
+    """
+    (N, len(HOOK_FEATURES)) feature matrix. Text is read once per candidate; scaling
+    and scoring run on the arrays.
+    """
+    affinity = _affinities(dna)
+    vocab = {w.lower() for w in _words(dna.get("vocab") or dna.get("vocabulary"))}
+
+    n = len(candidates)
+    words = np.empty(n)
+    onscreen = np.empty(n)
+    raw = np.zeros((n, len(HOOK_FEATURES)))
+    for i, c in enumerate(candidates):
+        hook = c["hook_text"]
+        words[i] = len(hook.split())
+        onscreen[i] = len(c["onscreen_text"].split())
+        archetype = archetype_of(hook)
+        raw[i, _H["archetype_match"]] = archetype == hook_type
+        raw[i, _H["genome_affinity"]] = affinity.get(archetype, 0.5 if not affinity else 0.0)
+        raw[i, _H["curiosity"]] = len(SIGNAL_WORDS["curiosity"].findall(hook)) + ("?" in hook or "؟" in hook)
+        raw[i, _H["specificity"]] = bool(NUMBER.search(hook))
+        raw[i, _H["direct_address"]] = bool(SIGNAL_WORDS["you"].search(hook))
+        raw[i, _H["tension"]] = len(SIGNAL_WORDS["shock"].findall(hook))
+        if vocab:
+            raw[i, _H["vocab_match"]] = len(vocab.intersection(t.lower() for t in _TOKEN.findall(hook)))
+
+    limit = float(max(max_words, 1))
+    raw[:, _H["length_fit"]] = np.clip(1.0 - np.maximum(words - limit, 0.0) / limit, 0.0, 1.0)
+    raw[:, _H["brevity"]] = np.clip((limit - words) / limit, 0.0, 1.0)
+    raw[:, _H["curiosity"]] = np.minimum(raw[:, _H["curiosity"]], 2.0) / 2.0
+    raw[:, _H["tension"]] = np.minimum(raw[:, _H["tension"]], 1.0)
+    raw[:, _H["vocab_match"]] = np.minimum(raw[:, _H["vocab_match"]], 2.0) / 2.0
+    raw[:, _H["onscreen_fit"]] = np.where(
+        onscreen == 0, 0.0, np.clip(1.0 - np.maximum(onscreen - ONSCREEN_MAX_WORDS, 0.0) / ONSCREEN_MAX_WORDS, 0.0, 1.0)
+    )
+    raw[words == 0] = 0.0
+    return raw
+
+
+def _weights(calibration: Dict) -> Tuple[np.ndarray, float]:
+    overrides = calibration.get("hook_weights")
+    overrides = overrides if isinstance(overrides, dict) else {}
+    w = np.array([_number(overrides.get(name, DEFAULT_WEIGHTS[name]), DEFAULT_WEIGHTS[name]) for name in HOOK_FEATURES])
+    return w, _number(calibration.get("hook_bias", DEFAULT_BIAS), DEFAULT_BIAS)
+
+
+def _explain(x: np.ndarray, w: np.ndarray, params: Dict[str, Any]) -> Tuple[List[str], str]:
+    contrib = w * x
+    why = [WHY[HOOK_FEATURES[j]].format(**params) for j in np.argsort(-contrib, kind="stable")[:3] if contrib[j] > 0]
+    gap = np.where(w > 0, w * (1.0 - x), 0.0)
+    j = int(np.argmax(gap))
+    minimum_fix = FIX[HOOK_FEATURES[j]].format(**params) if gap[j] > 0.05 else "none, ship it as is"
+    return why, minimum_fix
+
+
+def rank_hook_variants(
+    ideas: List[List[Any]],
+    content_signal: Dict[str, Any],
+    dna: Dict | None = None,
+    calibration: Dict | None = None,
+) -> List[List[HookVariant]]:
+    """
+    Scores every candidate of every idea in one pass and returns up to three
+    HookVariants (A/B/C, best first) per idea. Candidates are strings or
+    {"hook_text", "onscreen_text"} dicts; duplicates within an idea count once.
+    Constraints (hook type, max words) come from invoke_wpil(content_signal).
+    """
+    dna, calibration = dna or {}, calibration or {}
+    constraints = invoke_wpil(content_signal)["constraints"]["hook"]
+    max_words = int(_number(dna.get("max_hook_words"), 0) or _number(constraints.get("max_words"), 0) or 12)
+    hook_type = constraints.get("type") or "bold_claim"
+
+    flat: List[Dict[str, str]] = []
+    owner: List[int] = []
+    for idea_idx, candidates in enumerate(ideas):
+        seen = set()
+        for raw in candidates:
+            c = _candidate(raw)
+            key = c["hook_text"].lower()
+            if key and key not in seen:
+                seen.add(key)
+                flat.append(c)
+                owner.append(idea_idx)
+
+    results: List[List[HookVariant]] = [[] for _ in ideas]
+    if not flat:
+        return results
+
+    X = hook_feature_rows(flat, max_words, hook_type, dna)
+    w, bias = _weights(calibration)
+    scores = np.round(1.0 / (1.0 + np.exp(-(X @ w + bias))), 4)
+
+    # Rank within each idea: sort by (idea, -score), then position inside the idea's run
+    idea_idx = np.array(owner)
+    order = np.lexsort((-scores, idea_idx))
+    sorted_idea = idea_idx[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_idea)) + 1]
+    rank = np.arange(order.size) - np.repeat(starts, np.diff(np.r_[starts, order.size]))
+
+    affinity = _affinities(dna)
+    favorite = ", ".join(sorted(affinity, key=lambda a: -affinity[a])[:2]) or "question, number"
+    params = {"max_words": max_words, "hook_type": hook_type.replace("_", " "), "favorite": favorite}
+    for pos in order[rank < len(VARIANT_KEYS)]:
+        bucket = results[owner[pos]]
+        why, minimum_fix = _explain(X[pos], w, params)
+        bucket.append(HookVariant(
+            key=VARIANT_KEYS[len(bucket)],
+            hook_text=flat[pos]["hook_text"],
+            onscreen_text=flat[pos]["onscreen_text"],
+            score=float(scores[pos]),
+            why=why,
+            minimum_fix=minimum_fix,
+        ))
+    return results
@@ -0,0 +1,263 @@
+# image_cache.py
+# Content-addressed Visual Asset Cache
+# The image for a visual prompt is addressed by a hash of the normalized prompt, and
+# the render seed is derived from that hash, so the same prompt always maps to the
+# same image. Bundles get a local /images/<key> URL while a background pool fetches
+# the render from the upstream service (pooled HTTP sessions) into a size-bounded
+# on-disk LRU shared by every worker on the host.
+
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+from config import settings
+from response_cache import normalize_prompt
+
+_state = {"pid": None, "pool": None, "bytes": None}
+_lock = threading.Lock()
+_inflight: Dict[str, Future] = {}
+_local = threading.local()
+_stats = {"prefetched": 0, "hits": 0, "misses": 0, "fetch_failures": 0, "evicted": 0}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _lock:
+        _stats[name] += amount
+
+
+def image_key(visual: str) -> str:
+    return hashlib.sha256(normalize_prompt(visual).encode("utf-8")).hexdigest()[:32]
+
+
+def seed_for(key: str) -> int:
+    """Deterministic render seed in the upstream's 1..99999 range."""
+    return int(key[:12], 16) % 99999 + 1
+
+
+def upstream_url(visual: str, key: str | None = None) -> str:
+    seed = seed_for(key or image_key(visual))
+    quoted_v = urllib.parse.quote(visual)
+    return (f"{settings.IMAGE_UPSTREAM.rstrip('/')}/prompt/{quoted_v}?seed={seed}"
+            f"&width={settings.IMAGE_WIDTH}&height={settings.IMAGE_HEIGHT}&model={settings.IMAGE_MODEL}&nologo=true")
+
+
+def _paths(key: str) -> Tuple[str, str]:
+    base = os.path.join(settings.IMAGE_CACHE_DIR, key)
+    return f"{base}.img", f"{base}.json"
+
+
+def _pool() -> ThreadPoolExecutor:
+    # Threads do not survive fork: each worker builds its own pool on first use
+    with _lock:
+        if _state["pid"] != os.getpid():
+            _state["pool"] = ThreadPoolExecutor(max_workers=settings.IMAGE_PREFETCH_WORKERS, thread_name_prefix="image")
+            _state["bytes"] = None
+            _inflight.clear()
+            _state["pid"] = os.getpid()
+        return _state["pool"]
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None or getattr(_local, "pid", None) != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.IMAGE_PREFETCH_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session, _local.pid = session, os.getpid()
+    return session
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _register(key: str, visual: str) -> None:
+    # The sidecar lets any worker fetch a key it never saw being issued
+    _, meta_path = _paths(key)
+    if os.path.exists(meta_path):
+        return
+    os.makedirs(settings.IMAGE_CACHE_DIR, exist_ok=True)
+    _write_atomic(meta_path, json.dumps({"prompt": visual, "seed": seed_for(key)}, ensure_ascii=False).encode("utf-8"))
+
+
+def read_meta(key: str) -> Optional[Dict]:
+    try:
+        with open(_paths(key)[1], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fetch(key: str, visual: str) -> bool:
+    img_path, meta_path = _paths(key)
+    if os.path.exists(img_path):
+        return True
+    url = upstream_url(visual, key)
+    for attempt in range(settings.IMAGE_FETCH_RETRIES + 1):
+        try:
+            with telemetry.span("image_fetch"):
+                res = _session().get(url, timeout=settings.IMAGE_FETCH_TIMEOUT_SEC)
+                res.raise_for_status()
+                content_type = res.headers.get("Content-Type", "").split(";")[0].strip()
+                if not content_type.startswith("image/") or not res.content:
+                    raise ValueError(f"not an image: {content_type or 'empty'}")
+        except Exception as e:
+            print(f"⚠️ [IMAGE] fetch {key[:8]} failed (attempt {attempt + 1}): {str(e)[:60]}")
+            continue
+        _write_atomic(img_path, res.content)
+        _write_atomic(meta_path, json.dumps({"prompt": visual, "seed": seed_for(key), "content_type": content_type},
+                                            ensure_ascii=False).encode("utf-8"))
+        _count("prefetched")
+        _account(len(res.content))
+        return True
+    _count("fetch_failures")
+    return False
+
+
+def _run_fetch(key: str, visual: str) -> bool:
+    try:
+        return _fetch(key, visual)
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def prefetch(key: str, visual: str) -> Optional[Future]:
+    """Queues a background fetch unless the image is on disk or already being fetched."""
+    if os.path.exists(_paths(key)[0]):
+        return None
+    pool = _pool()
+    with _lock:
+        fut = _inflight.get(key)
+        if fut is None:
+            fut = pool.submit(_run_fetch, key, visual)
+            _inflight[key] = fut
+    return fut
+
+
+def image_url(visual: str) -> str:
+    """
+    URL for the bundle: a local /images/<key> route that starts prefetching now, or
+    the upstream render (still with the deterministic seed) when the cache is off.
+    """
+    key = image_key(visual)
+    if not settings.IMAGE_CACHE_ENABLED:
+        return upstream_url(visual, key)
+    try:
+        _register(key, visual)
+        prefetch(key, visual)
+    except Exception as e:
+        print(f"⚠️ [IMAGE] register failed: {str(e)[:60]}")
+        return upstream_url(visual, key)
+    return f"{settings.IMAGE_PUBLIC_BASE.rstrip('/')}/images/{key}"
+
+
+def resolve(key: str, wait_sec: float | None = None) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Returns (image path, meta) for a key, waiting for an in-flight or fresh fetch up
+    to wait_sec (IMAGE_WAIT_SEC, by default 0: the fetch continues in the background).
+    (None, meta) means the render is not ready and the caller should fall back to the
+    upstream URL; (None, None) means the key was never issued.
+    """
+    img_path, _ = _paths(key)
+    meta = read_meta(key)
+    if os.path.exists(img_path):
+        _count("hits")
+        try:
+            os.utime(img_path)  # mtime is the LRU clock
+        except OSError:
+            pass
+        return img_path, meta
+    if meta is None:
+        return None, None
+    _count("misses")
+    fut = prefetch(key, meta["prompt"])
+    wait_sec = settings.IMAGE_WAIT_SEC if wait_sec is None else wait_sec
+    if fut is not None and wait_sec > 0:
+        try:
+            fut.result(timeout=wait_sec)
+        except Exception:
+            pass
+    if os.path.exists(img_path):
+        return img_path, read_meta(key) or meta
+    return None, meta
+
+
+# ---------- Size bound ----------
+
+def _entries():
+    try:
+        with os.scandir(settings.IMAGE_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".img"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime
+    except FileNotFoundError:
+        return
+
+
+def _account(added: int) -> None:
+    # A running estimate per worker avoids a directory scan on every store; the scan
+    # in evict() re-syncs it with what all workers actually wrote
+    with _lock:
+        if _state["bytes"] is not None:
+            _state["bytes"] += added
+        over = _state["bytes"] is None or _state["bytes"] > settings.IMAGE_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def evict() -> int:
+    """
+    Deletes least recently used images, with their sidecars, until the cache fits
+    IMAGE_CACHE_MAX_BYTES. An evicted key is no longer served; regenerating its bundle
+    registers it again.
+    """
+    entries = sorted(_entries(), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for path, size, _ in entries:
+        if total <= settings.IMAGE_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        try:
+            os.remove(path[: -len(".img")] + ".json")
+        except OSError:
+            pass
+        total -= size
+        removed += 1
+    with _lock:
+        _state["bytes"] = total
+        _stats["evicted"] += removed
+    return removed
+
+
+def stats() -> Dict[str, float]:
+    entries = list(_entries())
+    with _lock:
+        out = dict(_stats)
+        out["inflight"] = len(_inflight)
+    out["images"] = len(entries)
+    out["bytes"] = sum(size for _, size, _ in entries)
+    out["max_bytes"] = settings.IMAGE_CACHE_MAX_BYTES
+    lookups = out["hits"] + out["misses"]
+    out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+    return out
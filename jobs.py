@@ -0,0 +1,220 @@
+# jobs.py
+# Background Generation Jobs
+# Bounded worker pool (MAX_CONCURRENT_JOBS) with per-job deadlines (JOB_TIMEOUT_SEC) and cancellation.
+# The jobs table is the source of truth, so any worker can answer a poll or a cancel.
+# Runners stop cooperatively: long steps call checkpoint() between model attempts.
+
+import contextvars
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import update
+
+from config import settings
+from db import SessionLocal
+from models import Job
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled", "timeout"}
+_owner = {"pid": None, "id": None}
+
+
+def owner_id() -> str:
+    # Per process: workers forked from a preloading master must not share its id
+    if _owner["pid"] != os.getpid():
+        _owner.update(pid=os.getpid(), id=f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+    return _owner["id"]
+
+
+RUNNERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+_state: Dict[str, Any] = {"pid": None, "executor": None}
+_futures: Dict[str, Future] = {}
+_cancels: Dict[str, threading.Event] = {}
+_lock = threading.Lock()
+# (cancel event, monotonic deadline) of the job running in this context; None outside jobs
+_current: contextvars.ContextVar = contextvars.ContextVar("job", default=None)
+
+
+def checkpoint() -> None:
+    """
+    Raises JobCancelled when the job this code runs for was cancelled or is past its
+    deadline; a no-op outside jobs. Pools that run job work must carry the context
+    (contextvars.copy_context().run) for the check to see the job.
+    """
+    job = _current.get()
+    if job is None:
+        return
+    cancel, deadline = job
+    if cancel.is_set():
+        raise JobCancelled("job cancelled")
+    if time.monotonic() >= deadline:
+        raise JobCancelled("job deadline passed")
+
+
+def register(kind: str, runner: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+    RUNNERS[kind] = runner
+
+
+def _executor() -> ThreadPoolExecutor:
+    # Created lazily (and re-created after a fork) so a preloading master never owns worker threads
+    if _state["pid"] != os.getpid():
+        _state["executor"] = ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENT_JOBS, thread_name_prefix="job")
+        _state["pid"] = os.getpid()
+        _futures.clear()
+        _cancels.clear()
+    return _state["executor"]
+
+
+def _transition(job_id: str, from_statuses, **values) -> bool:
+    """Compare-and-set on the job status; a cancel from another worker wins over a late result."""
+    with SessionLocal() as session:
+        result = session.execute(
+            update(Job).where(Job.id == job_id, Job.status.in_(from_statuses)).values(**values)
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+def _status(job_id: str) -> Optional[str]:
+    with SessionLocal() as session:
+        return session.query(Job.status).filter(Job.id == job_id).scalar()
+
+
+def _run(job_id: str, kind: str, payload: Dict[str, Any], timeout_sec: int) -> None:
+    cancel = threading.Event()
+    with _lock:
+        _cancels[job_id] = cancel
+    try:
+        if not _transition(job_id, ["queued"], status="running", started_at=datetime.utcnow()):
+            return  # cancelled while queued
+
+        outcome: Dict[str, Any] = {}
+        deadline = time.monotonic() + timeout_sec
+
+        def target():
+            _current.set((cancel, deadline))
+            try:
+                outcome["result"] = RUNNERS[kind](payload)
+            except Exception as e:
+                outcome["error"] = e
+
+        runner = threading.Thread(target=target, name=f"job-{job_id[:8]}", daemon=True)
+        runner.start()
+        # The slot stays taken until the runner thread exits: on a timeout or a cancel it is
+        # told to stop and ends at its next checkpoint, so MAX_CONCURRENT_JOBS bounds real work.
+        # A cancel through another worker only shows in the table, hence the status poll.
+        while runner.is_alive():
+            runner.join(settings.JOB_CANCEL_POLL_SEC)
+            if not runner.is_alive() or cancel.is_set():
+                continue
+            if time.monotonic() >= deadline:
+                cancel.set()
+                _transition(job_id, ["running"], status="timeout", finished_at=datetime.utcnow(),
+                            error=f"timed out after {timeout_sec}s")
+            elif _status(job_id) == "cancelled":
+                cancel.set()
+
+        now = datetime.utcnow()
+        error = outcome.get("error")
+        if isinstance(error, JobCancelled) and not cancel.is_set():
+            # The runner hit its deadline at a checkpoint before the poll above did
+            _transition(job_id, ["running"], status="timeout", finished_at=now, error=f"timed out after {timeout_sec}s")
+        elif error is not None:
+            _transition(job_id, ["running"], status="failed", finished_at=now, error=str(error))
+        elif "result" in outcome:
+            _transition(job_id, ["running"], status="succeeded", finished_at=now,
+                        result_json=json.dumps(outcome["result"], ensure_ascii=False))
+    except Exception as e:
+        print(f"⚠️ [JOBS] {job_id} crashed: {str(e)[:60]}")
+    finally:
+        with _lock:
+            _cancels.pop(job_id, None)
+
+
+def _forget(job_id: str) -> None:
+    with _lock:
+        _futures.pop(job_id, None)
+
+
+def submit(kind: str, payload: Dict[str, Any], timeout_sec: Optional[int] = None) -> str:
+    """
+    Queues a job and returns its id. The timeout defaults to and is capped at JOB_TIMEOUT_SEC.
+    Raises KeyError for an unknown kind, ValueError for a bad timeout and JobQueueFull when this worker already holds MAX_QUEUED_JOBS unfinished jobs.
+    """
+    if kind not in RUNNERS:
+        raise KeyError(kind)
+    timeout_sec = max(1, min(int(timeout_sec or settings.JOB_TIMEOUT_SEC), settings.JOB_TIMEOUT_SEC))
+
+    with _lock:
+        executor = _executor()
+        if len(_futures) >= settings.MAX_QUEUED_JOBS:
+            raise JobQueueFull("job queue is full, retry later")
+        job = Job(kind=kind, owner=owner_id(), timeout_sec=timeout_sec,
+                  payload_json=json.dumps(payload, ensure_ascii=False))
+        with SessionLocal() as session:
+            session.add(job)
+            session.commit()
+            job_id = job.id
+        future = executor.submit(_run, job_id, kind, payload, timeout_sec)
+        _futures[job_id] = future
+    future.add_done_callback(lambda _: _forget(job_id))
+    return job_id
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    with SessionLocal() as session:
+        job = session.get(Job, job_id)
+        if job is None:
+            return None
+        # A running job whose worker died never finishes; report it once it is well past its deadline
+        if job.status == "running" and job.started_at and datetime.utcnow() > job.started_at + timedelta(seconds=job.timeout_sec * 2):
+            _transition(job_id, ["running"], status="failed", finished_at=datetime.utcnow(), error="worker lost")
+            session.refresh(job)
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "created_at": job.created_at.isoformat(),
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "result": json.loads(job.result_json) if job.result_json else None,
+            "error": job.error,
+        }
+
+
+def cancel(job_id: str) -> bool:
+    """
+    Cancels a queued or running job. A running runner stops at its next checkpoint
+    (the owning worker notices a cancel made through another one within JOB_CANCEL_POLL_SEC).
+    """
+    cancelled = _transition(job_id, ["queued", "running"], status="cancelled", finished_at=datetime.utcnow())
+    with _lock:
+        future = _futures.get(job_id)
+        event = _cancels.get(job_id)
+    if future is not None:
+        future.cancel()
+    if cancelled and event is not None:
+        event.set()
+    return cancelled
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {"local_unfinished": len(_futures), "max_concurrent": settings.MAX_CONCURRENT_JOBS,
+                "max_queued": settings.MAX_QUEUED_JOBS}
@@ -0,0 +1,221 @@
+# metrics_service.py
+# Experiment Metrics Service
+# Each MetricsPoint is a row in metrics_points; the per-variant aggregates, lift and
+# winner on Experiment, plus the creator rollups, are updated incrementally in the
+# same transaction.
+
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import rollups
+import sic_memory
+from db import lock_for_write
+from models import Creator, Experiment, MetricsPointRecord
+from schemas import SubmitMetricsRequest, SubmitMetricsResponse
+
+T_RANK = {"T+60m": 1, "T+24h": 2, "T+48h": 3}
+FINAL_T_RANK = 3
+VARIANTS = ("A", "B", "C")
+
+
+class ExperimentNotFound(LookupError):
+    pass
+
+
+def variant_stats(exp: Experiment, key: str) -> Optional[Dict[str, float]]:
+    """
+    Latest aggregate snapshot of one variant, or None before its first point.
+    """
+    k = key.lower()
+    t_rank = getattr(exp, f"agg_t_rank_{k}") or 0
+    if not t_rank:
+        return None
+    views = getattr(exp, f"agg_views_{k}") or 0
+    engagements = getattr(exp, f"agg_engagements_{k}") or 0
+    shares = getattr(exp, f"agg_shares_{k}") or 0
+    return {
+        "t_rank": t_rank,
+        "views": views,
+        "engagement_rate": engagements / views if views else 0.0,
+        "share_rate": shares / views if views else 0.0,
+    }
+
+
+def defined_variants(exp: Experiment) -> List[str]:
+    keys = [k for k in VARIANTS if (getattr(exp, f"variant_{k.lower()}_json") or "{}") not in ("", "{}")]
+    return keys or list(VARIANTS)
+
+
+def pick_winner(exp: Experiment) -> Optional[str]:
+    """
+    Best share rate (then engagement rate, then views) among the variants at the
+    most mature snapshot reached so far, so early and late snapshots never compete.
+    """
+    stats = {k: s for k in VARIANTS if (s := variant_stats(exp, k))}
+    if not stats:
+        return None
+    top = max(s["t_rank"] for s in stats.values())
+    contenders = [k for k, s in stats.items() if s["t_rank"] == top]
+    return max(contenders, key=lambda k: (stats[k]["share_rate"], stats[k]["engagement_rate"], stats[k]["views"], -VARIANTS.index(k)))
+
+
+def _relative(value: float, baseline: float) -> float:
+    return round((value - baseline) / baseline, 4) if baseline else 0.0
+
+
+def lift_of(exp: Experiment) -> Dict[str, float]:
+    return {
+        "views": exp.lift_views,
+        "share_rate": exp.lift_share_rate,
+        "engagement_rate": exp.lift_engagement_rate,
+    }
+
+
+def _apply_point(exp: Experiment, variant_key: str, point) -> None:
+    """
+    Folds one snapshot into the running aggregates, winner, lift and status.
+    """
+    # Snapshots are cumulative: the most mature one per variant is the running aggregate
+    k = variant_key.lower()
+    rank = T_RANK[point.t_label]
+    if rank >= (getattr(exp, f"agg_t_rank_{k}") or 0):
+        setattr(exp, f"agg_t_rank_{k}", rank)
+        setattr(exp, f"agg_views_{k}", point.views)
+        setattr(exp, f"agg_engagements_{k}", point.likes + point.comments + point.shares)
+        setattr(exp, f"agg_shares_{k}", point.shares)
+
+    exp.winner = pick_winner(exp)
+    if exp.winner:
+        best = variant_stats(exp, exp.winner)
+        creator = exp.creator
+        exp.lift_views = _relative(best["views"], creator.baseline_views)
+        exp.lift_share_rate = _relative(best["share_rate"], creator.baseline_share_rate)
+        exp.lift_engagement_rate = _relative(best["engagement_rate"], creator.baseline_engagement_rate)
+
+    done = all((getattr(exp, f"agg_t_rank_{v.lower()}") or 0) >= FINAL_T_RANK for v in defined_variants(exp))
+    exp.status = "completed" if done else "running"
+
+
+def submit_metrics(session: Session, req: SubmitMetricsRequest) -> SubmitMetricsResponse:
+    """
+    Upserts one snapshot and refreshes the experiment summary without reading the history.
+    Submissions for one experiment are serialized: the write lock is taken before the
+    summary is read, so completion, winner and rollup deltas always see the sibling
+    variants' latest points. A resubmitted snapshot is an idempotent update.
+    The submission that completes an experiment records its outcome in the SIC
+    platform memory: a success when the winner beat the creator baseline on share or
+    engagement rate. Nothing is recorded while the creator has no baseline yet.
+    Raises ExperimentNotFound when the experiment does not belong to the creator.
+    """
+    for attempt in range(2):
+        try:
+            return _submit(session, req)
+        except IntegrityError:
+            # A concurrent insert of the same (experiment, variant, t_label) won: retry as an update
+            session.rollback()
+            if attempt:
+                raise
+
+
+def _submit(session: Session, req: SubmitMetricsRequest) -> SubmitMetricsResponse:
+    lock_for_write(session)
+    exp = session.execute(
+        select(Experiment)
+        .where(Experiment.id == req.experiment_id, Experiment.creator_id == req.creator_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if exp is None:
+        session.rollback()
+        raise ExperimentNotFound(req.experiment_id)
+
+    point = req.point
+    row = session.execute(
+        select(MetricsPointRecord).where(
+            MetricsPointRecord.experiment_id == exp.id,
+            MetricsPointRecord.variant_key == req.variant_key,
+            MetricsPointRecord.t_label == point.t_label,
+        )
+    ).scalar_one_or_none()
+    new_point = row is None
+    if new_point:
+        row = MetricsPointRecord(experiment_id=exp.id, variant_key=req.variant_key, t_label=point.t_label)
+        session.add(row)
+    row.recorded_at = datetime.utcnow()
+    for field in ("views", "likes", "comments", "shares", "followers_gained", "profile_visits"):
+        setattr(row, field, getattr(point, field))
+
+    before = rollups.experiment_state(exp)
+    # The lift is measured against the baseline before this point; with no baseline yet
+    # (the creator's first completion) there is nothing to judge the outcome by
+    has_baseline = bool(exp.creator.baseline_share_rate or exp.creator.baseline_engagement_rate)
+    _apply_point(exp, req.variant_key, point)
+    creator_deltas, daily_deltas = rollups.diff(before, rollups.experiment_state(exp), new_point)
+    rollups.apply(session, exp.creator_id, row.recorded_at.date(), creator_deltas, daily_deltas)
+
+    session.commit()
+    if has_baseline and not before["completed"] and exp.status == "completed":
+        if max(exp.lift_share_rate or 0.0, exp.lift_engagement_rate or 0.0) > 0:
+            sic_memory.record_success(req.platform)
+        else:
+            sic_memory.record_failure(req.platform)
+    return SubmitMetricsResponse(experiment_id=exp.id, status=exp.status, winner=exp.winner, lift=lift_of(exp))
+
+
+def rebuild_rollups(session: Session, creator_id: str) -> Dict:
+    """
+    Recomputes one creator's experiment aggregates and rollups by replaying the stored
+    metrics points in arrival order. For databases that predate the rollup tables.
+    The baseline moves during the replay as it did live, so lifts are measured against
+    the baseline of their time (the creator's current one until the first completion).
+    """
+    creator_totals: Dict = {}
+    daily_totals: Dict = {}
+    experiments = {e.id: e for e in session.execute(select(Experiment).where(Experiment.creator_id == creator_id)).scalars()}
+    for exp in experiments.values():
+        for k in VARIANTS:
+            for field in ("t_rank", "views", "engagements", "shares"):
+                setattr(exp, f"agg_{field}_{k.lower()}", 0)
+        exp.winner = None
+        exp.lift_views = exp.lift_share_rate = exp.lift_engagement_rate = 0.0
+
+    points = session.execute(
+        select(MetricsPointRecord)
+        .where(MetricsPointRecord.experiment_id.in_(list(experiments)))
+        .order_by(MetricsPointRecord.recorded_at, MetricsPointRecord.id)
+    ).scalars().all()
+    for exp_id in {row.experiment_id for row in points}:
+        experiments[exp_id].status = "draft"
+    for row in points:
+        exp = experiments[row.experiment_id]
+        before = rollups.experiment_state(exp)
+        _apply_point(exp, row.variant_key, row)
+        creator_deltas, daily_deltas = rollups.diff(before, rollups.experiment_state(exp), True)
+        rollups.add(creator_totals, creator_deltas)
+        rollups.add(daily_totals.setdefault(row.recorded_at.date(), {}), daily_deltas)
+        if any(creator_deltas.get(f) for f in rollups.BASELINE_FIELDS):
+            for field, value in (rollups.baseline(creator_totals) or {}).items():
+                setattr(exp.creator, field, value)
+
+    rollups.replace(session, creator_id, creator_totals, daily_totals)
+    session.commit()
+    return {"creator_id": creator_id, "experiments": len(experiments), **{f: creator_totals.get(f, 0) for f in rollups.CREATOR_FIELDS}}
+
+
+if __name__ == "__main__":
+    from db import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Rebuild experiment aggregates and creator rollups from metrics_points")
+    parser.add_argument("creator_ids", nargs="*", help="creators to rebuild, default all")
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as session:
+        ids = args.creator_ids or session.execute(select(Creator.id)).scalars().all()
+        for cid in ids:
+            print(rebuild_rollups(session, cid))
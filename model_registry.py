@@ -0,0 +1,198 @@
+# model_registry.py
+# Generative Model Registry
+# One GenerativeModel per (model, system instruction) per process, with the fixed
+# system text passed as system_instruction instead of being prepended to every
+# prompt. Where the provider supports explicit context caching for a model, the
+# system instruction is cached once and requests reference it, so those input
+# tokens are billed at the cached rate. Token usage is recorded per request.
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Tuple
+
+import audit_log
+from config import settings
+
+_lock = threading.Lock()
+_state = {"pid": None}
+_sdk = {"genai": None, "caching": None}
+_sdk_lock = threading.Lock()
+_models: Dict[Tuple[str, str], Any] = {}
+_contexts: Dict[Tuple[str, str], Tuple[Any, float, float]] = {}  # -> (CachedContent, refresh_at, expires_at); plain data, survives fork
+_context_models: Dict[Tuple[str, str], Any] = {}
+_creating: set = set()  # keys with a CachedContent.create in flight in this process
+_unsupported: Dict[Tuple[str, str], float] = {}  # -> retry_at
+_usage: Dict[str, Counter] = {}
+
+CHARS_PER_TOKEN = 4  # rough estimate, only used to skip caches the provider would refuse
+
+
+def system_id(system: str) -> str:
+    return hashlib.sha256(system.encode("utf-8")).hexdigest()[:16]
+
+
+def sdk():
+    """
+    Imports and configures google.generativeai on first use (~0.7s of imports), so
+    processes that never call a model never pay for it. warm() does it up front.
+    """
+    if _sdk["genai"] is None:
+        with _sdk_lock:
+            if _sdk["genai"] is None:
+                import google.generativeai as genai
+                from google.generativeai import caching
+
+                if settings.GEMINI_API_ENDPOINT:
+                    # Local stand-in (load tests): same client over REST
+                    genai.configure(api_key=settings.GEMINI_API_KEY or "local", transport="rest",
+                                    client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT})
+                else:
+                    genai.configure(api_key=settings.GEMINI_API_KEY)
+                _sdk["caching"] = caching
+                _sdk["genai"] = genai
+    return _sdk["genai"]
+
+
+def warm() -> None:
+    """
+    Loads the SDK now. Called from create_app(), i.e. once in a preloading gunicorn
+    master, whose imported modules the workers then share copy-on-write. configure()
+    only stores settings; transports are opened per process on first call.
+    """
+    sdk()
+
+
+def loaded() -> bool:
+    return _sdk["genai"] is not None
+
+
+def _reset_after_fork() -> None:
+    # Client objects are not fork-safe; rebuild them lazily in each worker
+    if _state["pid"] != os.getpid():
+        _models.clear()
+        _context_models.clear()
+        _creating.clear()
+        _usage.clear()
+        _state["pid"] = os.getpid()
+
+
+def _cacheable(model_name: str, system: str) -> bool:
+    allowed = settings.MODEL_CONTEXT_CACHE_MODELS
+    # The provider refuses caches below its minimum size; don't pay a failing create for them
+    big_enough = len(system) / CHARS_PER_TOKEN >= settings.MODEL_CONTEXT_CACHE_MIN_TOKENS
+    return settings.MODEL_CONTEXT_CACHE_ENABLED and big_enough and (not allowed or model_name in allowed)
+
+
+def _cached_model(key: Tuple[str, str], now: float):
+    """The model bound to a live context cache, or None. Caller holds _lock."""
+    entry = _contexts.get(key)
+    if entry is None or entry[2] <= now:
+        return None
+    model = _context_models.get(key)
+    if model is None:
+        model = sdk().GenerativeModel.from_cached_content(entry[0])
+        _context_models[key] = model
+    return model
+
+
+def _create_context(model_name: str, system: str, key: Tuple[str, str]) -> None:
+    # Network call: runs outside _lock, one caller per key at a time (see _creating)
+    ttl = settings.MODEL_CONTEXT_CACHE_TTL_SEC
+    try:
+        context = _sdk["caching"].CachedContent.create(
+            model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+            display_name=f"dominator-system-{key[1]}",
+            system_instruction=system,
+            ttl=ttl,
+        )
+    except Exception as e:
+        # Unsupported model, quota... fall back to the plain model until the retry time,
+        # and drop the old cache: it expires at the provider shortly after the refresh point
+        print(f"⚠️ [CONTEXT_CACHE] {model_name} not cached: {str(e)[:60]}")
+        with _lock:
+            _unsupported[key] = time.monotonic() + settings.MODEL_CONTEXT_CACHE_RETRY_SEC
+            _contexts.pop(key, None)
+            _context_models.pop(key, None)
+        return
+    now = time.monotonic()
+    with _lock:
+        _contexts[key] = (context, now + ttl * 0.9, now + ttl)  # refresh before the provider expires it
+        _context_models.pop(key, None)
+
+
+def get_model(model_name: str, system: str):
+    """
+    Returns the process-wide model for (model_name, system), creating it on first use.
+    """
+    key = (model_name, system_id(system))
+    create = False
+    with _lock:
+        _reset_after_fork()
+        if _cacheable(model_name, system):
+            now = time.monotonic()
+            entry = _contexts.get(key)
+            due = entry is None or entry[1] <= now
+            if due and _unsupported.get(key, 0.0) <= now and key not in _creating:
+                _creating.add(key)
+                create = True
+            elif entry is not None and entry[2] > now:
+                # Fresh, or being refreshed by another thread while the old cache still lives
+                model = _cached_model(key, now)
+                if model is not None:
+                    return model
+    if create:
+        try:
+            sdk()
+            _create_context(model_name, system, key)
+        finally:
+            with _lock:
+                _creating.discard(key)
+        with _lock:
+            model = _cached_model(key, time.monotonic())
+            if model is not None:
+                return model
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = sdk().GenerativeModel(model_name, system_instruction=system)
+            _models[key] = model
+        return model
+
+
+def record_usage(model_name: str, response, system: str) -> None:
+    """
+    Records the token usage of one finished request (non-streaming response, or the
+    last streamed chunk, which carries the totals).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = int(getattr(usage, "prompt_token_count", 0) or 0)
+    cached_tokens = int(getattr(usage, "cached_content_token_count", 0) or 0)
+    output_tokens = int(getattr(usage, "candidates_token_count", 0) or 0)
+    with _lock:
+        _reset_after_fork()
+        c = _usage.setdefault(model_name, Counter())
+        c["requests"] += 1
+        c["input_tokens"] += prompt_tokens
+        c["cached_input_tokens"] += cached_tokens
+        c["output_tokens"] += output_tokens
+    audit_log.log_event("model.usage", payload={
+        "model": model_name, "system_id": system_id(system), "input_tokens": prompt_tokens,
+        "cached_input_tokens": cached_tokens, "output_tokens": output_tokens,
+    })
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        _reset_after_fork()
+        now = time.monotonic()
+        return {
+            "clients": sorted(f"{name}:{sid}" for name, sid in _models),
+            "context_caches": {f"{name}:{sid}": ctx.name for (name, sid), (ctx, _, expires) in _contexts.items() if expires > now},
+            "context_cache_unsupported": sorted(f"{name}:{sid}" for (name, sid), until in _unsupported.items() if until > now),
+            "usage": {name: dict(c) for name, c in _usage.items()},
+        }
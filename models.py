@@ -1,6 +1,6 @@
 import uuid
-from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, Text, ForeignKey, Float, Boolean
+from datetime import date, datetime
+from sqlalchemy import String, Integer, Date, DateTime, Text, ForeignKey, Float, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db import Base
 
@@ -56,10 +56,10 @@ class Experiment(Base):
     __tablename__ = "experiments"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
-    creator_id: Mapped[str] = mapped_column(String(36), ForeignKey("creators.id"))
+    creator_id: Mapped[str] = mapped_column(String(36), ForeignKey("creators.id"), index=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    status: Mapped[str] = mapped_column(String(30), default="draft")  # draft|running|completed
+    status: Mapped[str] = mapped_column(String(30), default="draft", index=True)  # draft|running|completed
 
     idea_title: Mapped[str] = mapped_column(String(200))
     blueprint_json: Mapped[str] = mapped_column(Text, default="{}")  # content blueprint
@@ -75,26 +75,173 @@ class Experiment(Base):
 
     winner: Mapped[str | None] = mapped_column(String(1), nullable=True)  # A|B|C
 
-    # Metrics snapshots stored as JSON string
+    # Legacy metrics snapshots stored as JSON string (superseded by metrics_points)
     metrics_json: Mapped[str] = mapped_column(Text, default="[]")
 
+    # Running per-variant aggregates: latest snapshot per variant (t_rank 0=none, 1=T+60m, 2=T+24h, 3=T+48h)
+    agg_t_rank_a: Mapped[int] = mapped_column(Integer, default=0)
+    agg_views_a: Mapped[int] = mapped_column(Integer, default=0)
+    agg_engagements_a: Mapped[int] = mapped_column(Integer, default=0)
+    agg_shares_a: Mapped[int] = mapped_column(Integer, default=0)
+
+    agg_t_rank_b: Mapped[int] = mapped_column(Integer, default=0)
+    agg_views_b: Mapped[int] = mapped_column(Integer, default=0)
+    agg_engagements_b: Mapped[int] = mapped_column(Integer, default=0)
+    agg_shares_b: Mapped[int] = mapped_column(Integer, default=0)
+
+    agg_t_rank_c: Mapped[int] = mapped_column(Integer, default=0)
+    agg_views_c: Mapped[int] = mapped_column(Integer, default=0)
+    agg_engagements_c: Mapped[int] = mapped_column(Integer, default=0)
+    agg_shares_c: Mapped[int] = mapped_column(Integer, default=0)
+
     # Lift summary
     lift_views: Mapped[float] = mapped_column(Float, default=0.0)
     lift_share_rate: Mapped[float] = mapped_column(Float, default=0.0)
     lift_engagement_rate: Mapped[float] = mapped_column(Float, default=0.0)
 
     creator = relationship("Creator", back_populates="experiments")
+    metrics_points = relationship("MetricsPointRecord", back_populates="experiment", cascade="all, delete-orphan")
+
+
+class MetricsPointRecord(Base):
+    __tablename__ = "metrics_points"
+    __table_args__ = (
+        Index("ix_metrics_points_experiment_variant_t", "experiment_id", "variant_key", "t_label", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    experiment_id: Mapped[str] = mapped_column(String(36), ForeignKey("experiments.id"))
+    variant_key: Mapped[str] = mapped_column(String(1))  # A|B|C
+    t_label: Mapped[str] = mapped_column(String(10))  # T+60m|T+24h|T+48h
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    views: Mapped[int] = mapped_column(Integer, default=0)
+    likes: Mapped[int] = mapped_column(Integer, default=0)
+    comments: Mapped[int] = mapped_column(Integer, default=0)
+    shares: Mapped[int] = mapped_column(Integer, default=0)
+    followers_gained: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    profile_visits: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    experiment = relationship("Experiment", back_populates="metrics_points")
+
+
+class CreatorRollup(Base):
+    __tablename__ = "creator_rollups"
+
+    creator_id: Mapped[str] = mapped_column(String(36), ForeignKey("creators.id"), primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Experiments with at least one metrics point / all variants at T+48h / with a winner
+    experiments_tracked: Mapped[int] = mapped_column(Integer, default=0)
+    experiments_completed: Mapped[int] = mapped_column(Integer, default=0)
+    experiments_with_winner: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Winners of completed experiments
+    wins_a: Mapped[int] = mapped_column(Integer, default=0)
+    wins_b: Mapped[int] = mapped_column(Integer, default=0)
+    wins_c: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Sum of the latest snapshot of every variant
+    metrics_points: Mapped[int] = mapped_column(Integer, default=0)
+    views: Mapped[int] = mapped_column(Integer, default=0)
+    engagements: Mapped[int] = mapped_column(Integer, default=0)
+    shares: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Sums over experiments with a winner (divide by experiments_with_winner)
+    sum_predicted_winner: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_lift_views: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_lift_share_rate: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_lift_engagement_rate: Mapped[float] = mapped_column(Float, default=0.0)
+
+    # Latest snapshots of the variants of completed experiments (feed Creator.baseline_*)
+    completed_variants: Mapped[int] = mapped_column(Integer, default=0)
+    completed_views: Mapped[int] = mapped_column(Integer, default=0)
+    completed_engagements: Mapped[int] = mapped_column(Integer, default=0)
+    completed_shares: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class CreatorDailyRollup(Base):
+    __tablename__ = "creator_daily_rollups"
+
+    creator_id: Mapped[str] = mapped_column(String(36), ForeignKey("creators.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # Growth credited to the day the snapshot arrived
+    metrics_points: Mapped[int] = mapped_column(Integer, default=0)
+    views: Mapped[int] = mapped_column(Integer, default=0)
+    engagements: Mapped[int] = mapped_column(Integer, default=0)
+    shares: Mapped[int] = mapped_column(Integer, default=0)
+    experiments_completed: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
 
-    creator_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    creator_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
     event: Mapped[str] = mapped_column(String(120))
     severity: Mapped[str] = mapped_column(String(10), default="INFO")  # INFO|WARN|ERROR
 
     payload_json: Mapped[str] = mapped_column(Text, default="{}")
     blocked: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class ModelHealth(Base):
+    __tablename__ = "model_health"
+
+    model_name: Mapped[str] = mapped_column(String(80), primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    calls: Mapped[int] = mapped_column(Integer, default=0)
+    failures: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Rolling (EWMA) attempt latency and error rate
+    latency_ewma_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    error_ewma: Mapped[float] = mapped_column(Float, default=0.0)
+
+    # Circuit breaker
+    consecutive_failures: Mapped[int] = mapped_column(Integer, default=0)
+    open_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class ResponseCacheEntry(Base):
+    __tablename__ = "response_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256(model + normalized prompt)
+    model: Mapped[str] = mapped_column(String(300))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+    response_text: Mapped[str] = mapped_column(Text)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class InflightLock(Base):
+    __tablename__ = "inflight_locks"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(120))
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    # Set when the leader finished with a failure result: the row then stays until
+    # expires_at so other workers return it instead of re-running the call
+    failure: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
+    kind: Mapped[str] = mapped_column(String(40))
+    status: Mapped[str] = mapped_column(String(20), default="queued", index=True)  # queued|running|succeeded|failed|cancelled|timeout
+    owner: Mapped[str] = mapped_column(String(120), default="")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    timeout_sec: Mapped[int] = mapped_column(Integer, default=90)
+
+    payload_json: Mapped[str] = mapped_column(Text, default="{}")
+    result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
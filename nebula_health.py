@@ -0,0 +1,221 @@
+# nebula_health.py
+# Nebula Model Health Board
+# Rolling latency / error tracking and circuit breakers per model.
+# State lives in the shared database so every gunicorn worker sees the same board.
+# Attempts are buffered per worker and folded into one UPDATE per model by a
+# background flusher; only an attempt that can open or close a breaker is written
+# on the request path.
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from db import SessionLocal
+from models import ModelHealth
+
+EWMA_ALPHA = 0.2
+PRIOR_LATENCY_MS = 2000.0  # untried models rank as a reasonably fast, healthy model
+MIN_SUCCESS_RATE = 0.05
+
+QUOTA_MARKERS = ("429", "quota", "resourceexhausted", "resource_exhausted", "rate limit")
+
+_snapshot: Dict = {"at": 0.0, "rows": {}}
+_snapshot_lock = threading.Lock()
+
+_pending: Dict[str, List[Tuple[float, bool, bool]]] = {}  # model -> (latency ms, failed, quota), oldest first
+_pending_lock = threading.Lock()
+_flusher = {"pid": None}
+
+
+def is_quota_error(exc: Exception) -> bool:
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(marker in text for marker in QUOTA_MARKERS)
+
+
+def _load_rows() -> Dict[str, Dict]:
+    with SessionLocal() as session:
+        rows = session.execute(select(ModelHealth)).scalars().all()
+        return {
+            r.model_name: {
+                "latency_ewma_ms": r.latency_ewma_ms,
+                "error_ewma": r.error_ewma,
+                "calls": r.calls,
+                "consecutive_failures": r.consecutive_failures,
+                "open_until": r.open_until,
+            }
+            for r in rows
+        }
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Returns the health board, re-read from the DB at most every MODEL_HEALTH_REFRESH_SEC.
+    """
+    now = time.monotonic()
+    if now - _snapshot["at"] < settings.MODEL_HEALTH_REFRESH_SEC:
+        return _snapshot["rows"]
+    with _snapshot_lock:
+        if now - _snapshot["at"] >= settings.MODEL_HEALTH_REFRESH_SEC:
+            try:
+                _snapshot["rows"] = _load_rows()
+            except Exception as e:
+                print(f"⚠️ [HEALTH] board unavailable: {str(e)[:60]}")
+            _snapshot["at"] = now
+    return _snapshot["rows"]
+
+
+def _expected_cost(row: Dict | None) -> float:
+    # Trying models in ascending latency / P(success) order minimizes expected time-to-success
+    if not row or not row["calls"]:
+        return PRIOR_LATENCY_MS
+    return row["latency_ewma_ms"] / max(1.0 - row["error_ewma"], MIN_SUCCESS_RATE)
+
+
+def order_models(pool: List[str]) -> List[str]:
+    """
+    Orders the pool by expected time-to-success and drops models whose breaker is open.
+    Ties keep the original pool order.
+    """
+    rows = snapshot()
+    now = datetime.utcnow()
+    ranked = []
+    for idx, name in enumerate(pool):
+        row = rows.get(name)
+        if row and row["open_until"] and row["open_until"] > now:
+            continue
+        ranked.append((_expected_cost(row), idx, name))
+    ranked.sort()
+    return [name for _, _, name in ranked]
+
+
+def _apply(model_name: str, values: Dict) -> None:
+    with SessionLocal() as session:
+        stmt = update(ModelHealth).where(ModelHealth.model_name == model_name).values(**values)
+        if session.execute(stmt).rowcount == 0:
+            try:
+                with session.begin_nested():
+                    session.add(ModelHealth(model_name=model_name))
+            except IntegrityError:
+                pass  # another worker created the row first
+            session.execute(stmt)
+        session.commit()
+
+
+def _fold(samples: List[Tuple[float, bool, bool]]) -> Dict:
+    """
+    Update values equal to applying the attempts one by one: the EWMAs decay by
+    (1 - alpha) per attempt, and a success resets the consecutive failures and
+    closes the breaker.
+    """
+    n = len(samples)
+    weights = [EWMA_ALPHA * (1 - EWMA_ALPHA) ** (n - 1 - i) for i in range(n)]
+    decay = (1 - EWMA_ALPHA) ** n
+    latency = sum(w * ms for w, (ms, _, _) in zip(weights, samples))
+    first = samples[0][0] * (1 - EWMA_ALPHA) ** (n - 1) + latency - weights[0] * samples[0][0]
+    errors = sum(w for w, (_, failed, _) in zip(weights, samples) if failed)
+
+    trailing = 0
+    for _, failed, _ in reversed(samples):
+        if not failed:
+            break
+        trailing += 1
+    values = {
+        "calls": ModelHealth.calls + n,
+        "failures": ModelHealth.failures + sum(1 for _, failed, _ in samples if failed),
+        "latency_ewma_ms": case((ModelHealth.calls == 0, first), else_=ModelHealth.latency_ewma_ms * decay + latency),
+        "error_ewma": ModelHealth.error_ewma * decay + errors,
+        "updated_at": datetime.utcnow(),
+    }
+    quota = trailing and samples[-1][2]
+    opened = datetime.utcnow() + timedelta(seconds=settings.MODEL_BREAKER_QUOTA_COOLDOWN_SEC if quota
+                                           else settings.MODEL_BREAKER_COOLDOWN_SEC)
+    if trailing < n:
+        values["consecutive_failures"] = trailing
+        values["open_until"] = opened if trailing >= settings.MODEL_BREAKER_FAILURES else None
+    else:
+        values["consecutive_failures"] = ModelHealth.consecutive_failures + n
+        values["open_until"] = case(
+            (ModelHealth.consecutive_failures + n >= settings.MODEL_BREAKER_FAILURES, opened),
+            else_=ModelHealth.open_until,
+        )
+    return values
+
+
+def flush(model_name: str | None = None) -> None:
+    """Writes the buffered attempts of one model (default: all), one UPDATE per model."""
+    with _pending_lock:
+        names = [model_name] if model_name is not None else list(_pending)
+        batches = {name: _pending.pop(name) for name in names if _pending.get(name)}
+    for name, samples in batches.items():
+        try:
+            _apply(name, _fold(samples))
+        except Exception as e:
+            print(f"⚠️ [HEALTH] could not record {name}: {str(e)[:60]}")  # advisory, drop the batch
+        if any(failed for _, failed, _ in samples):
+            _snapshot["at"] = 0.0  # the batch may have opened a breaker
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(settings.MODEL_HEALTH_FLUSH_SEC)
+        flush()
+
+
+def _ensure_started() -> None:
+    if _flusher["pid"] == os.getpid():
+        return
+    with _pending_lock:
+        if _flusher["pid"] == os.getpid():
+            return
+        _pending.clear()  # forked child: the parent writes what it buffered
+        threading.Thread(target=_flush_loop, name="model-health-flusher", daemon=True).start()
+        _flusher["pid"] = os.getpid()
+
+
+def _record(model_name: str, latency_sec: float, failed: bool, quota: bool = False) -> int:
+    """Buffers one attempt; returns the model's buffered trailing failures, this one included."""
+    _ensure_started()
+    with _pending_lock:
+        samples = _pending.setdefault(model_name, [])
+        samples.append((latency_sec * 1000.0, failed, quota))
+        trailing = 0
+        for _, f, _ in reversed(samples):
+            if not f:
+                break
+            trailing += 1
+        return trailing
+
+
+def record_success(model_name: str, latency_sec: float) -> None:
+    """A success that closes an open (or probing) breaker is written at once."""
+    _record(model_name, latency_sec, False)
+    row = snapshot().get(model_name)
+    if row and row["open_until"]:
+        flush(model_name)
+        _snapshot["at"] = 0.0  # the closed breaker applies to this worker's next request
+
+
+def record_failure(model_name: str, exc: Exception, latency_sec: float) -> None:
+    """
+    Counts a failed attempt. After MODEL_BREAKER_FAILURES consecutive failures the breaker
+    opens for the cooldown window; a failed probe after the window re-opens it immediately.
+    The failure that reaches the threshold (by this worker's board) is written at once.
+    """
+    trailing = _record(model_name, latency_sec, True, is_quota_error(exc))
+    row = snapshot().get(model_name) or {}
+    consecutive = row.get("consecutive_failures") or 0
+    if trailing + consecutive >= settings.MODEL_BREAKER_FAILURES or row.get("open_until"):
+        flush(model_name)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if _flusher["pid"] == os.getpid():
+        flush()
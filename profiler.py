@@ -0,0 +1,77 @@
+# profiler.py
+# Per-Request Sampling Profiler
+# Samples one thread's Python stack at a fixed interval and writes the result in
+# collapsed-stack ("folded") format, ready for flamegraph.pl / speedscope.
+# Sampling runs on its own thread, so the profiled request pays only the GIL
+# hand-offs of the sampler.
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from config import settings
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval: float | None = None):
+        self.thread_id = thread_id
+        self.interval = interval or settings.PROFILE_SAMPLE_INTERVAL_SEC
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._started = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        return time.perf_counter() - self._started
+
+    def save(self, label: str) -> str:
+        """
+        Writes <PROFILE_DIR>/<id>.folded and returns the profile id.
+        """
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {label} samples={self.samples} interval={self.interval}s\n")
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return profile_id
+
+
+def requested(header_value: str | None) -> bool:
+    """
+    The profiling header only works when profiling is enabled and carries the
+    configured token, so it cannot be used to slow the service down from outside.
+    """
+    return bool(
+        settings.PROFILE_ENABLED and settings.PROFILE_TOKEN and header_value
+        and header_value == settings.PROFILE_TOKEN
+    )
@@ -0,0 +1,190 @@
+# response_cache.py
+# Content-addressed LLM Response Cache
+# Memory LRU (per worker, TTL) in front of a persistent tier in the shared database.
+# Reads never write: DB-tier hit counts are buffered and flushed in batches, and every
+# RESPONSE_CACHE_PURGE_EVERY stores a worker deletes the expired rows.
+
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, update
+
+from config import settings
+from db import SessionLocal
+from models import ResponseCacheEntry
+
+
+class _TTLCache:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, max_items: int, ttl_sec: float):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, ttl_sec: float | None = None) -> None:
+        ttl = self.ttl_sec if ttl_sec is None else min(ttl_sec, self.ttl_sec)
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_memory = _TTLCache(settings.RESPONSE_CACHE_MEMORY_ITEMS, settings.RESPONSE_CACHE_MEMORY_TTL_SEC)
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "purged": 0}
+_stats_lock = threading.Lock()
+_pending_hits: Counter = Counter()  # key -> DB-tier hits not yet written
+_writes = {"since_purge": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", prompt or "").split())
+
+
+def cache_key(prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+def get(prompt: str, model: str, record: bool = True) -> Optional[str]:
+    """
+    Looks up a cached response: memory first, then the DB (promoting hits into memory).
+    record=False is a peek that leaves the hit/miss counters untouched.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    key = cache_key(prompt, model)
+    value = _memory.get(key)
+    if value is not None:
+        if record:
+            _count("memory_hits")
+        return value
+
+    now = datetime.utcnow()
+    try:
+        with SessionLocal() as session:
+            row = session.get(ResponseCacheEntry, key)
+            if row is not None and row.expires_at > now:
+                value = row.response_text
+                remaining = (row.expires_at - now).total_seconds()
+    except Exception as e:
+        print(f"⚠️ [CACHE] lookup failed: {str(e)[:60]}")
+
+    if value is None:
+        if record:
+            _count("misses")
+        return None
+    _memory.put(key, value, remaining)
+    if record:
+        _count("db_hits")
+        with _stats_lock:
+            _pending_hits[key] += 1
+            full = len(_pending_hits) >= settings.RESPONSE_CACHE_HIT_BATCH
+        if full:
+            flush_hits()
+    return value
+
+
+def flush_hits() -> None:
+    """Writes the buffered DB-tier hit counts, one UPDATE per key in one transaction."""
+    with _stats_lock:
+        hits = dict(_pending_hits)
+        _pending_hits.clear()
+    if not hits:
+        return
+    try:
+        with SessionLocal() as session:
+            for key, n in hits.items():
+                session.execute(
+                    update(ResponseCacheEntry).where(ResponseCacheEntry.key == key).values(hits=ResponseCacheEntry.hits + n)
+                )
+            session.commit()
+    except Exception as e:
+        print(f"⚠️ [CACHE] hit count flush failed: {str(e)[:60]}")  # counts are advisory, drop them
+
+
+def _after_store() -> None:
+    flush_hits()
+    with _stats_lock:
+        _writes["since_purge"] += 1
+        due = settings.RESPONSE_CACHE_PURGE_EVERY > 0 and _writes["since_purge"] >= settings.RESPONSE_CACHE_PURGE_EVERY
+        if due:
+            _writes["since_purge"] = 0
+    if due:
+        try:
+            purged = purge_expired()
+        except Exception as e:
+            print(f"⚠️ [CACHE] purge failed: {str(e)[:60]}")
+            return
+        with _stats_lock:
+            _stats["purged"] += purged
+
+
+def put(prompt: str, model: str, text: str) -> None:
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return
+    key = cache_key(prompt, model)
+    _memory.put(key, text)
+    now = datetime.utcnow()
+    try:
+        with SessionLocal() as session:
+            session.merge(ResponseCacheEntry(
+                key=key,
+                model=model,
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.RESPONSE_CACHE_TTL_SEC),
+                response_text=text,
+                hits=0,
+            ))
+            session.commit()
+    except Exception as e:
+        print(f"⚠️ [CACHE] store failed: {str(e)[:60]}")
+        return
+    _count("stores")
+    _after_store()
+
+
+def record_bypass() -> None:
+    _count("bypassed")
+
+
+def purge_expired() -> int:
+    with SessionLocal() as session:
+        result = session.execute(delete(ResponseCacheEntry).where(ResponseCacheEntry.expires_at <= datetime.utcnow()))
+        session.commit()
+        return result.rowcount
+
+
+def stats() -> Dict[str, float]:
+    with _stats_lock:
+        out = dict(_stats)
+    lookups = out["memory_hits"] + out["db_hits"] + out["misses"]
+    out["hit_ratio"] = round((out["memory_hits"] + out["db_hits"]) / lookups, 4) if lookups else 0.0
+    return out
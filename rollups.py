@@ -0,0 +1,253 @@
+# rollups.py
+# Creator Rollups
+# Materialized per-creator and per-creator-per-day totals. They are maintained by
+# applying the difference between an experiment's summary before and after each
+# metrics point, so reports never scan experiments or metrics history. The creator
+# baseline (the reference for experiment lift) follows the completed-experiment totals.
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Creator, CreatorDailyRollup, CreatorRollup, Experiment
+
+VARIANTS = ("A", "B", "C")
+
+CREATOR_FIELDS = (
+    "experiments_tracked", "experiments_completed", "experiments_with_winner",
+    "wins_a", "wins_b", "wins_c",
+    "metrics_points", "views", "engagements", "shares",
+    "sum_predicted_winner", "sum_lift_views", "sum_lift_share_rate", "sum_lift_engagement_rate",
+    "completed_variants", "completed_views", "completed_engagements", "completed_shares",
+)
+BASELINE_FIELDS = ("completed_variants", "completed_views", "completed_engagements", "completed_shares")
+DAILY_FIELDS = ("metrics_points", "views", "engagements", "shares", "experiments_completed")
+
+
+def experiment_state(exp: Experiment) -> Dict:
+    """
+    The part of an experiment summary that feeds the rollups.
+    """
+    keys = [k.lower() for k in VARIANTS]
+    winner = exp.winner
+    has_winner = bool(winner)
+    return {
+        "tracked": int(any((getattr(exp, f"agg_t_rank_{k}") or 0) > 0 for k in keys)),
+        "completed": int(exp.status == "completed"),
+        "winner": winner,
+        "has_winner": int(has_winner),
+        "predicted_winner": (getattr(exp, f"predicted_score_{winner.lower()}") or 0.0) if has_winner else 0.0,
+        "lift_views": (exp.lift_views or 0.0) if has_winner else 0.0,
+        "lift_share_rate": (exp.lift_share_rate or 0.0) if has_winner else 0.0,
+        "lift_engagement_rate": (exp.lift_engagement_rate or 0.0) if has_winner else 0.0,
+        "views": sum(getattr(exp, f"agg_views_{k}") or 0 for k in keys),
+        "engagements": sum(getattr(exp, f"agg_engagements_{k}") or 0 for k in keys),
+        "shares": sum(getattr(exp, f"agg_shares_{k}") or 0 for k in keys),
+        "variants": sum(1 for k in keys if (getattr(exp, f"agg_t_rank_{k}") or 0) > 0),
+    }
+
+
+def diff(before: Dict, after: Dict, new_point: bool) -> tuple[Dict, Dict]:
+    """
+    Returns (creator_deltas, daily_deltas) for one experiment transition.
+    """
+    creator = {
+        "experiments_tracked": after["tracked"] - before["tracked"],
+        "experiments_completed": after["completed"] - before["completed"],
+        "experiments_with_winner": after["has_winner"] - before["has_winner"],
+        "metrics_points": int(new_point),
+        "views": after["views"] - before["views"],
+        "engagements": after["engagements"] - before["engagements"],
+        "shares": after["shares"] - before["shares"],
+        "sum_predicted_winner": after["predicted_winner"] - before["predicted_winner"],
+        "sum_lift_views": after["lift_views"] - before["lift_views"],
+        "sum_lift_share_rate": after["lift_share_rate"] - before["lift_share_rate"],
+        "sum_lift_engagement_rate": after["lift_engagement_rate"] - before["lift_engagement_rate"],
+    }
+    for name in ("variants", "views", "engagements", "shares"):
+        creator[f"completed_{name}"] = after[name] * after["completed"] - before[name] * before["completed"]
+    for k in VARIANTS:
+        won_before = int(bool(before["completed"]) and before["winner"] == k)
+        won_after = int(bool(after["completed"]) and after["winner"] == k)
+        creator[f"wins_{k.lower()}"] = won_after - won_before
+
+    daily = {f: creator[f] for f in ("metrics_points", "views", "engagements", "shares", "experiments_completed")}
+    return creator, daily
+
+
+def add(totals: Dict, deltas: Dict) -> None:
+    for field, value in deltas.items():
+        totals[field] = totals.get(field, 0) + value
+
+
+def _upsert(session: Session, model, where: Dict, values: Dict) -> None:
+    # Same shape as the model health counters: increment in SQL, create the row on first use
+    stmt = update(model).where(*(getattr(model, c) == v for c, v in where.items())).values(**values)
+    if session.execute(stmt).rowcount == 0:
+        try:
+            with session.begin_nested():
+                session.add(model(**where))
+        except IntegrityError:
+            pass  # another worker created the row first
+        session.execute(stmt)
+
+
+def baseline(totals: Dict) -> Optional[Dict[str, float]]:
+    """
+    Creator baseline from completed-experiment totals: mean views per variant and the
+    pooled engagement and share rates. None before any completed variant has views.
+    """
+    variants, views = totals.get("completed_variants", 0), totals.get("completed_views", 0)
+    if not variants or not views:
+        return None
+    return {
+        "baseline_views": round(views / variants, 4),
+        "baseline_engagement_rate": round(totals.get("completed_engagements", 0) / views, 4),
+        "baseline_share_rate": round(totals.get("completed_shares", 0) / views, 4),
+    }
+
+
+def _refresh_baseline(session: Session, creator_id: str, totals: Dict) -> None:
+    values = baseline(totals)
+    if values is not None:
+        session.execute(update(Creator).where(Creator.id == creator_id).values(**values))
+
+
+def apply(session: Session, creator_id: str, day: date, creator_deltas: Dict, daily_deltas: Dict) -> None:
+    """
+    Adds the deltas to both rollups inside the caller's transaction, and moves the
+    creator baseline when the completed-experiment totals changed.
+    """
+    if any(creator_deltas.values()):
+        values = {f: getattr(CreatorRollup, f) + d for f, d in creator_deltas.items() if d}
+        values["updated_at"] = datetime.utcnow()
+        _upsert(session, CreatorRollup, {"creator_id": creator_id}, values)
+        if any(creator_deltas.get(f) for f in BASELINE_FIELDS):
+            row = session.execute(
+                select(*(getattr(CreatorRollup, f) for f in BASELINE_FIELDS)).where(CreatorRollup.creator_id == creator_id)
+            ).one()
+            _refresh_baseline(session, creator_id, dict(zip(BASELINE_FIELDS, row)))
+    if any(daily_deltas.values()):
+        values = {f: getattr(CreatorDailyRollup, f) + d for f, d in daily_deltas.items() if d}
+        _upsert(session, CreatorDailyRollup, {"creator_id": creator_id, "day": day}, values)
+
+
+def replace(session: Session, creator_id: str, creator_totals: Dict, daily_totals: Dict[date, Dict]) -> None:
+    """
+    Overwrites a creator's rollups with freshly computed totals (used by rebuilds),
+    and the creator baseline with the one they imply.
+    """
+    session.query(CreatorDailyRollup).filter(CreatorDailyRollup.creator_id == creator_id).delete()
+    session.query(CreatorRollup).filter(CreatorRollup.creator_id == creator_id).delete()
+    session.add(CreatorRollup(creator_id=creator_id, **{f: creator_totals.get(f, 0) for f in CREATOR_FIELDS}))
+    for day, totals in daily_totals.items():
+        session.add(CreatorDailyRollup(creator_id=creator_id, day=day, **{f: totals.get(f, 0) for f in DAILY_FIELDS}))
+    _refresh_baseline(session, creator_id, creator_totals)
+
+
+# ---------- Reports ----------
+
+def _mean(total: float, count: int) -> float:
+    return round(total / count, 4) if count else 0.0
+
+
+def creator_reports(session: Session, creator_ids: List[str]) -> List[Dict]:
+    """
+    One indexed query for any number of creators; creators without data get zeros.
+    """
+    rows = session.execute(
+        select(Creator, CreatorRollup)
+        .outerjoin(CreatorRollup, CreatorRollup.creator_id == Creator.id)
+        .where(Creator.id.in_(creator_ids))
+    ).all()
+
+    reports = []
+    for creator, rollup in rows:
+        r = {f: getattr(rollup, f) if rollup else 0 for f in CREATOR_FIELDS}
+        winners = r["experiments_with_winner"]
+        reports.append({
+            "creator_id": creator.id,
+            "display_name": creator.display_name,
+            "baseline": {
+                "views": creator.baseline_views,
+                "share_rate": creator.baseline_share_rate,
+                "engagement_rate": creator.baseline_engagement_rate,
+            },
+            "experiments": {
+                "tracked": r["experiments_tracked"],
+                "completed": r["experiments_completed"],
+                "with_winner": winners,
+                "wins": {k: r[f"wins_{k.lower()}"] for k in VARIANTS},
+            },
+            "observed": {
+                "metrics_points": r["metrics_points"],
+                "views": r["views"],
+                "engagement_rate": _mean(r["engagements"], r["views"]),
+                "share_rate": _mean(r["shares"], r["views"]),
+            },
+            "predicted_winner_score": _mean(r["sum_predicted_winner"], winners),
+            "lift": {
+                "views": _mean(r["sum_lift_views"], winners),
+                "share_rate": _mean(r["sum_lift_share_rate"], winners),
+                "engagement_rate": _mean(r["sum_lift_engagement_rate"], winners),
+            },
+            "updated_at": rollup.updated_at.isoformat() if rollup and rollup.updated_at else None,
+        })
+    return reports
+
+
+def daily_reports(session: Session, creator_ids: List[str], since: date) -> Dict[str, List[Dict]]:
+    """
+    Daily series for many creators from one primary-key range query.
+    """
+    rows = session.execute(
+        select(CreatorDailyRollup)
+        .where(CreatorDailyRollup.creator_id.in_(creator_ids), CreatorDailyRollup.day >= since)
+        .order_by(CreatorDailyRollup.creator_id, CreatorDailyRollup.day)
+    ).scalars()
+
+    series: Dict[str, List[Dict]] = {cid: [] for cid in creator_ids}
+    for row in rows:
+        series[row.creator_id].append({"day": row.day.isoformat(), **{f: getattr(row, f) for f in DAILY_FIELDS}})
+    return series
+
+
+def experiment_reports(session: Session, creator_id: str, limit: int, status: Optional[str] = None) -> List[Dict]:
+    """
+    ReportResponse payloads straight from the experiment summary columns.
+    """
+    stmt = select(Experiment).where(Experiment.creator_id == creator_id)
+    if status:
+        stmt = stmt.where(Experiment.status == status)
+    stmt = stmt.order_by(Experiment.created_at.desc()).limit(limit)
+
+    reports = []
+    for exp in session.execute(stmt).scalars():
+        proof = {}
+        for k in VARIANTS:
+            v = k.lower()
+            t_rank = getattr(exp, f"agg_t_rank_{v}") or 0
+            if t_rank:
+                proof[k] = {
+                    "t_rank": t_rank,
+                    "views": getattr(exp, f"agg_views_{v}"),
+                    "engagements": getattr(exp, f"agg_engagements_{v}"),
+                    "shares": getattr(exp, f"agg_shares_{v}"),
+                }
+        reports.append({
+            "experiment_id": exp.id,
+            "creator_id": exp.creator_id,
+            "status": exp.status,
+            "winner": exp.winner,
+            "predicted_scores": {k: getattr(exp, f"predicted_score_{k.lower()}") for k in VARIANTS},
+            "lift": {
+                "views": exp.lift_views,
+                "share_rate": exp.lift_share_rate,
+                "engagement_rate": exp.lift_engagement_rate,
+            },
+            "proof_artifact": {"idea_title": exp.idea_title, "latest_snapshots": proof},
+        })
+    return reports
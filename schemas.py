@@ -46,6 +46,26 @@ class IdeaBrief(BaseModel):
     variants: list[HookVariant]
 
 
+class HookCandidate(BaseModel):
+    hook_text: str
+    onscreen_text: str = ""
+
+
+class IdeaCandidates(BaseModel):
+    title: str
+    angle: str = ""
+    value_promise: str = ""
+    candidates: list[HookCandidate | str]
+
+
+class RankHooksRequest(BaseModel):
+    creator_id: str
+    platform: Literal["linkedin", "twitter", "tiktok"] = "tiktok"
+    niche: str | None = None
+    winning_post: str | None = None
+    ideas: list[IdeaCandidates]
+
+
 class DailyBriefResponse(BaseModel):
     creator_id: str
     ideas: list[IdeaBrief]
@@ -86,6 +106,7 @@ class SubmitMetricsRequest(BaseModel):
     experiment_id: str
     variant_key: Literal["A", "B", "C"]
     point: MetricsPoint
+    platform: Literal["linkedin", "twitter", "tiktok"] = "tiktok"
 
 
 class SubmitMetricsResponse(BaseModel):
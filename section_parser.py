@@ -0,0 +1,87 @@
+# section_parser.py
+# Incremental Section Parser
+# Single-pass parser for the [LINKEDIN]/[TWITTER]/[TIKTOK]/[VISUAL_PROMPT] bundle format.
+# Feed it model output as it streams in; each section is emitted as soon as the next marker closes it.
+
+import re
+from typing import Dict, List, Tuple
+
+MARKERS = {
+    "[LINKEDIN]": "linkedin",
+    "[TWITTER]": "twitter",
+    "[TIKTOK]": "tiktok",
+    "[VISUAL_PROMPT]": "visual",
+}
+DEFAULT_VISUAL = "High-end professional business photography, realistic"
+
+_MARKER_RE = re.compile("|".join(re.escape(m) for m in MARKERS), re.I)
+_HOLDBACK = max(len(m) for m in MARKERS) - 1  # a marker may be split across chunks
+
+
+class SectionStreamParser:
+    """
+    Streaming parse_v14: the first occurrence of a marker opens its section, which runs
+    until a marker of another section (a repeat of its own marker stays in its text),
+    and [VISUAL_PROMPT] runs to the end of the text, other markers included. A section
+    whose marker follows [VISUAL_PROMPT] is still found. Once closed, the emitted
+    sections and result() equal parse_v14 on the full text.
+    """
+
+    def __init__(self):
+        self.text_parts: List[str] = []
+        self.parts: Dict[str, str] = {}
+        self._buffer = ""
+        self._open: Dict[str, List[str]] = {}  # at most one section plus visual
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consumes a chunk and returns the sections it completed as (key, text) pairs."""
+        self.text_parts.append(chunk)
+        self._buffer += chunk
+        completed = []
+        pos = 0
+        for match in _MARKER_RE.finditer(self._buffer):
+            self._append(self._buffer[pos:match.start()])
+            pos = match.end()
+            key = MARKERS[match.group(0).upper()]
+            for other in [k for k in self._open if k not in (key, "visual")]:
+                completed.extend(self._close_section(other))
+            self._append(match.group(0))
+            if key not in self._open and key not in self.parts:
+                self._open[key] = []
+
+        rest = self._buffer[pos:]
+        keep = min(_HOLDBACK, len(rest))
+        self._append(rest[:len(rest) - keep])
+        self._buffer = rest[len(rest) - keep:]
+        return completed
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flushes the open sections at end of stream."""
+        self._append(self._buffer)
+        self._buffer = ""
+        completed = []
+        for key in [k for k in self._open if k != "visual"] + [k for k in self._open if k == "visual"]:
+            completed.extend(self._close_section(key))
+        if not self.parts.get("linkedin"):
+            completed.append(("linkedin", self.result()["linkedin"]))
+        return completed
+
+    def result(self) -> Dict[str, str]:
+        """The parse_v14-compatible bundle once the stream is closed."""
+        parts = {"linkedin": "", "twitter": "", "tiktok": "", "visual": DEFAULT_VISUAL}
+        parts.update(self.parts)
+        if not parts["linkedin"]:
+            parts["linkedin"] = "".join(self.text_parts)
+        return parts
+
+    def _append(self, text: str) -> None:
+        if text:
+            for section in self._open.values():
+                section.append(text)
+
+    def _close_section(self, key: str) -> List[Tuple[str, str]]:
+        text = "".join(self._open.pop(key)).strip()
+        self.parts[key] = text
+        if key == "linkedin" and not text:
+            return []  # parse_v14 falls back to the whole text; emitted by close()
+        return [(key, text)]
@@ -1,8 +1,31 @@
-PLATFORM_MEMORY = {
-    "linkedin": {"successes": 0, "failures": 0},
-    "twitter": {"successes": 0, "failures": 0},
-    "tiktok": {"successes": 0, "failures": 0},
-}
+# sic_memory.py
+# SIC Platform Memory
+# Success / failure counters per platform, shared by every worker on the host.
+#
+# Hot path is lock-free: increments are appended to a local deque and reads come from
+# an immutable snapshot dict. A background flusher merges the buffered increments into
+# a SQLite WAL table in one transaction and swaps in a fresh fleet-wide snapshot.
+# Outcomes come from completed experiments (metrics_service); /sic/screen reads the
+# scores as its default system_memory.
+
+import atexit
+import os
+import sqlite3
+import threading
+from collections import Counter, deque
+
+from config import settings
+
+PLATFORMS = ("linkedin", "twitter", "tiktok")
+
+PLATFORM_MEMORY = {p: {"successes": 0, "failures": 0} for p in PLATFORMS}
+
+_pending = deque()  # (platform, "successes" | "failures"); deque.append is thread-safe
+_wakeup = threading.Event()
+_state = {"pid": None}
+_start_lock = threading.Lock()
+_local = threading.local()
+
 
 def normalize_platform(p: str) -> str:
     if not p:
@@ -12,26 +35,152 @@ def normalize_platform(p: str) -> str:
         return "twitter"
     return p
 
-def record_success(platform):
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(settings.SIC_MEMORY_PATH, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS platform_counters ("
+        "platform TEXT PRIMARY KEY, successes INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0)"
+    )
+    return conn
+
+
+def _conn() -> sqlite3.Connection:
+    # One connection per thread (in practice the flusher's), opened and set up once
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        conn = _local.conn = _connect()
+        _local.pid = os.getpid()
+    return conn
+
+
+def _drop_conn() -> None:
+    conn, _local.conn = getattr(_local, "conn", None), None
+    if conn is not None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def flush() -> None:
+    """
+    Merges buffered increments into the shared table and refreshes the snapshot.
+    """
+    global PLATFORM_MEMORY
+    deltas = Counter()
+    while True:
+        try:
+            deltas[_pending.popleft()] += 1
+        except IndexError:
+            break
+
+    rows = [(p, deltas[(p, "successes")], deltas[(p, "failures")]) for p in {p for p, _ in deltas}]
+    try:
+        conn = _conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO platform_counters (platform, successes, failures) VALUES (?, ?, ?) "
+                "ON CONFLICT(platform) DO UPDATE SET successes = successes + excluded.successes, "
+                "failures = failures + excluded.failures",
+                rows,
+            )
+        totals = conn.execute("SELECT platform, successes, failures FROM platform_counters").fetchall()
+    except sqlite3.Error:
+        for (p, field), n in deltas.items():  # keep the increments for the next attempt
+            _pending.extend([(p, field)] * n)
+        _drop_conn()  # reopen on the next attempt in case the connection itself is broken
+        raise
+
+    snapshot = {p: {"successes": 0, "failures": 0} for p in PLATFORMS}
+    for platform, successes, failures in totals:
+        if platform in snapshot:
+            snapshot[platform] = {"successes": successes, "failures": failures}
+    PLATFORM_MEMORY = snapshot  # atomic swap; readers never see a half-built dict
+
+
+def _flusher() -> None:
+    while True:
+        _wakeup.wait(settings.SIC_MEMORY_FLUSH_SEC)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [SIC_MEMORY] flush failed: {str(e)[:60]}")
+
+
+def _ensure_started() -> None:
+    if _state["pid"] == os.getpid():
+        return
+    with _start_lock:
+        if _state["pid"] == os.getpid():
+            return
+        if _state["pid"] is not None:
+            _pending.clear()  # forked child: the parent owns what it buffered
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [SIC_MEMORY] initial load failed: {str(e)[:60]}")
+        threading.Thread(target=_flusher, name="sic-memory-flusher", daemon=True).start()
+        _state["pid"] = os.getpid()
+
+
+def _record(platform, field: str) -> None:
     platform = normalize_platform(platform)
     if platform in PLATFORM_MEMORY:
-        PLATFORM_MEMORY[platform]["successes"] += 1
+        _ensure_started()
+        _pending.append((platform, field))
+        if len(_pending) >= settings.SIC_MEMORY_FLUSH_BATCH:
+            _wakeup.set()
+
+
+def record_success(platform):
+    _record(platform, "successes")
+
 
 def record_failure(platform):
-    platform = normalize_platform(platform)
-    if platform in PLATFORM_MEMORY:
-        PLATFORM_MEMORY[platform]["failures"] += 1
+    _record(platform, "failures")
+
 
 def get_platform_score(platform):
+    _ensure_started()
     platform = normalize_platform(platform)
-    if platform not in PLATFORM_MEMORY:
+    memory = PLATFORM_MEMORY
+    if platform not in memory:
         return 0.5
 
-    successes = PLATFORM_MEMORY[platform]["successes"]
-    failures = PLATFORM_MEMORY[platform]["failures"]
+    successes = memory[platform]["successes"]
+    failures = memory[platform]["failures"]
     total = successes + failures
 
     if total == 0:
         return 0.5
 
     return successes / total
+
+
+def platform_scores(min_outcomes: int | None = None):
+    """
+    Success ratio per platform, only for platforms with at least min_outcomes recorded
+    outcomes (default SIC_MEMORY_MIN_OUTCOMES): an unknown platform is left out rather
+    than given the neutral 0.5, which would sit below the SIC suppression threshold.
+    """
+    _ensure_started()
+    floor = settings.SIC_MEMORY_MIN_OUTCOMES if min_outcomes is None else min_outcomes
+    memory = PLATFORM_MEMORY
+    return {
+        p: round(c["successes"] / (c["successes"] + c["failures"]), 4)
+        for p, c in memory.items()
+        if c["successes"] + c["failures"] >= max(floor, 1)
+    }
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if _pending and _state["pid"] == os.getpid():
+        try:
+            flush()
+        except Exception:
+            pass
@@ -0,0 +1,173 @@
+# singleflight.py
+# Single-flight Coalescing
+# Concurrent callers asking for the same key share one upstream call.
+# Threads in a worker wait on the leader directly; other workers wait on a lock row
+# in the shared database and pick the result up from the shared response cache.
+# A failure result (never cached) is left in the lock row for a short TTL, so the
+# waiting workers fail fast instead of re-running the call one after another.
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+import jobs
+from config import settings
+from db import SessionLocal
+from models import InflightLock
+
+_owner = {"pid": None, "id": None}
+
+
+def owner_id() -> str:
+    # Per process: workers forked from a preloading master must not share its id
+    if _owner["pid"] != os.getpid():
+        _owner.update(pid=os.getpid(), id=f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+    return _owner["id"]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_calls: Dict[str, _Call] = {}
+_calls_lock = threading.Lock()
+_stats = {"leaders": 0, "followers": 0, "shared_followers": 0}
+
+
+def _acquire(key: str, ttl_sec: float) -> bool:
+    now = datetime.utcnow()
+    lock = InflightLock(key=key, owner=owner_id(), expires_at=now + timedelta(seconds=ttl_sec))
+    with SessionLocal() as session:
+        for _ in range(2):
+            try:
+                session.add(lock)
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()
+                # A crashed leader must not block the key forever
+                stale = session.execute(
+                    delete(InflightLock).where(InflightLock.key == key, InflightLock.expires_at <= now)
+                )
+                session.commit()
+                if not stale.rowcount:
+                    return False
+                lock = InflightLock(key=key, owner=owner_id(), expires_at=lock.expires_at)
+    return False
+
+
+def _release(key: str, failure: Optional[str] = None) -> None:
+    try:
+        with SessionLocal() as session:
+            mine = (InflightLock.key == key, InflightLock.owner == owner_id())
+            if failure is None:
+                session.execute(delete(InflightLock).where(*mine))
+            else:
+                expires_at = datetime.utcnow() + timedelta(seconds=settings.SINGLEFLIGHT_FAILURE_TTL_SEC)
+                session.execute(update(InflightLock).where(*mine).values(failure=failure, expires_at=expires_at))
+            session.commit()
+    except Exception as e:
+        print(f"⚠️ [SINGLEFLIGHT] release failed: {str(e)[:60]}")
+
+
+def _shared_failure(key: str) -> Optional[str]:
+    with SessionLocal() as session:
+        return session.execute(
+            select(InflightLock.failure).where(InflightLock.key == key, InflightLock.expires_at > datetime.utcnow())
+        ).scalar_one_or_none()
+
+
+def _run_shared(key: str, fn: Callable[[], Any], peek: Callable[[], Any], ttl_sec: float,
+                is_failure: Optional[Callable[[Any], bool]]) -> Any:
+    deadline = time.monotonic() + ttl_sec
+    while True:
+        try:
+            acquired = _acquire(key, ttl_sec)
+        except Exception as e:
+            print(f"⚠️ [SINGLEFLIGHT] shared lock unavailable: {str(e)[:60]}")
+            return fn()
+        if acquired:
+            failure = None
+            try:
+                value = peek()  # the previous holder may have finished between our cache miss and the lock
+                if value is None:
+                    value = fn()
+                    if is_failure is not None and isinstance(value, str) and is_failure(value):
+                        failure = value
+                return value
+            finally:
+                _release(key, failure)
+
+        value = peek()
+        if value is None:
+            try:
+                value = _shared_failure(key)
+            except Exception:
+                value = None
+        if value is not None:
+            with _calls_lock:
+                _stats["shared_followers"] += 1
+            return value
+        if time.monotonic() >= deadline:
+            return fn()
+        time.sleep(settings.SINGLEFLIGHT_POLL_SEC)
+
+
+def do(key: str, fn: Callable[[], Any], peek: Optional[Callable[[], Any]] = None,
+       ttl_sec: Optional[float] = None, is_failure: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    Runs fn() once per key across concurrent callers and returns its result to all of them.
+    When peek is given (a non-counting read of the shared result store), the call is also
+    coalesced across workers via the inflight_locks table. ttl_sec is how long followers
+    wait on the leader and should cover fn()'s worst case (SINGLEFLIGHT_LOCK_TTL_SEC
+    overrides it). A string result for which is_failure() holds is shared with the
+    other workers for SINGLEFLIGHT_FAILURE_TTL_SEC, since peek never sees it.
+    """
+    if not settings.SINGLEFLIGHT_ENABLED:
+        return fn()
+    ttl_sec = settings.SINGLEFLIGHT_LOCK_TTL_SEC or ttl_sec or 120
+
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+        _stats["leaders" if leader else "followers"] += 1
+
+    if not leader:
+        if not call.done.wait(ttl_sec):
+            return fn()
+        if isinstance(call.error, jobs.JobCancelled):
+            return fn()  # the leader's job was stopped, not the call itself
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        if peek is not None and settings.SINGLEFLIGHT_SHARED:
+            call.result = _run_shared(key, fn, peek, ttl_sec, is_failure)
+        else:
+            call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+def stats() -> Dict[str, int]:
+    with _calls_lock:
+        return dict(_stats)
@@ -0,0 +1,215 @@
+# telemetry.py
+# Hot-Path Telemetry
+# Timing spans, histograms and counters, merged across every worker on the host and
+# rendered in Prometheus text format.
+#
+# Same shape as sic_memory: the hot path only appends an observation to a local
+# deque; a background flusher folds the buffered observations into a SQLite WAL
+# table in one transaction, so /metrics on any worker sees the whole fleet.
+
+import atexit
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEPTH_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 7)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "dominator_http_request_seconds": ("histogram", "HTTP request latency by endpoint and status.", LATENCY_BUCKETS),
+    "dominator_model_attempt_seconds": ("histogram", "One model attempt by model and outcome (ok|empty|quota|error).", LATENCY_BUCKETS),
+    "dominator_nebula_fallback_depth": ("histogram", "Models tried before the answer (0 = first model) by outcome.", DEPTH_BUCKETS),
+    "dominator_nebula_queue_seconds": ("histogram", "Wait for a free nebula pool thread before a hedged attempt starts.", LATENCY_BUCKETS),
+    "dominator_stage_seconds": ("histogram", "Bundle pipeline stages (parse_v14, strategic_intelligence_core, image_url, ...).", LATENCY_BUCKETS),
+    "dominator_model_calls_total": ("counter", "Model attempts started, by model.", None),
+    "dominator_profiles_total": ("counter", "Requests profiled through the profiling header.", None),
+}
+
+_pending = deque()  # (metric, labels_json, value); deque.append is thread-safe
+_wakeup = threading.Event()
+_state = {"pid": None}
+_start_lock = threading.Lock()
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    return json.dumps({k: str(v) for k, v in labels.items()}, sort_keys=True, ensure_ascii=False)
+
+
+def _ensure_started() -> None:
+    if _state["pid"] == os.getpid():
+        return
+    with _start_lock:
+        if _state["pid"] == os.getpid():
+            return
+        if _state["pid"] is not None:
+            _pending.clear()  # forked child: the parent flushes what it buffered
+        threading.Thread(target=_flusher, name="telemetry-flusher", daemon=True).start()
+        _state["pid"] = os.getpid()
+
+
+def observe(metric: str, value: float, **labels) -> None:
+    """Records one histogram observation."""
+    if not settings.TELEMETRY_ENABLED:
+        return
+    _ensure_started()
+    _pending.append((metric, _labels(labels), float(value)))
+    if len(_pending) >= settings.TELEMETRY_FLUSH_BATCH:
+        _wakeup.set()
+
+
+def inc(metric: str, amount: float = 1.0, **labels) -> None:
+    """Adds to a counter."""
+    observe(metric, amount, **labels)
+
+
+@contextmanager
+def span(stage: str, metric: str = "dominator_stage_seconds", **labels) -> Iterator[Dict[str, object]]:
+    """
+    Times the block into a latency histogram. The yielded dict holds the labels; set
+    labels["outcome"] inside the block to override the default ok / error.
+    """
+    if metric == "dominator_stage_seconds":
+        labels["stage"] = stage
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield labels
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        labels.setdefault("outcome", outcome)
+        observe(metric, time.perf_counter() - started, **labels)
+
+
+# ---------- Shared store ----------
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(settings.TELEMETRY_PATH, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS telemetry_series ("
+        "metric TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL, value REAL NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (metric, labels, le))"
+    )
+    return conn
+
+
+def _fold(observations) -> Dict[Tuple[str, str, str], float]:
+    # Histogram rows: one per bucket (non-cumulative), plus "sum" and "count"; counters: le = ""
+    rows: Dict[Tuple[str, str, str], float] = {}
+    for metric, labels, value in observations:
+        kind, _, buckets = METRICS[metric]
+        if kind == "counter":
+            keys = [((metric, labels, ""), value)]
+        else:
+            le = next((str(b) for b in buckets if value <= b), "+Inf")
+            keys = [((metric, labels, le), 1.0), ((metric, labels, "sum"), value), ((metric, labels, "count"), 1.0)]
+        for key, v in keys:
+            rows[key] = rows.get(key, 0.0) + v
+    return rows
+
+
+def flush() -> None:
+    """Merges buffered observations into the shared table."""
+    batch = []
+    while True:
+        try:
+            batch.append(_pending.popleft())
+        except IndexError:
+            break
+    if not batch:
+        return
+    rows = _fold(batch)
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO telemetry_series (metric, labels, le, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(metric, labels, le) DO UPDATE SET value = value + excluded.value",
+                [(m, l, le, v) for (m, l, le), v in rows.items()],
+            )
+    except sqlite3.Error:
+        _pending.extendleft(reversed(batch))  # keep them for the next attempt
+        raise
+    finally:
+        conn.close()
+
+
+def _flusher() -> None:
+    while True:
+        _wakeup.wait(settings.TELEMETRY_FLUSH_SEC)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [TELEMETRY] flush failed: {str(e)[:60]}")
+
+
+def _fmt_labels(labels: Dict[str, str], extra: Dict[str, str] | None = None) -> str:
+    merged = {**labels, **(extra or {})}
+    if not merged:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in merged.items())
+    return "{" + body + "}"
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def render() -> str:
+    """
+    Fleet-wide metrics in Prometheus text exposition format (0.0.4).
+    """
+    if settings.TELEMETRY_ENABLED:
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠️ [TELEMETRY] flush failed: {str(e)[:60]}")
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT metric, labels, le, value FROM telemetry_series ORDER BY metric, labels").fetchall()
+    finally:
+        conn.close()
+
+    series: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for metric, labels, le, value in rows:
+        series.setdefault(metric, {}).setdefault(labels, {})[le] = value
+
+    out = []
+    for metric, (kind, help_text, buckets) in METRICS.items():
+        out.append(f"# HELP {metric} {help_text}")
+        out.append(f"# TYPE {metric} {kind}")
+        for labels_json, values in series.get(metric, {}).items():
+            labels = json.loads(labels_json)
+            if kind == "counter":
+                out.append(f"{metric}{_fmt_labels(labels)} {_num(values.get('', 0.0))}")
+                continue
+            cumulative = 0.0
+            for b in list(buckets) + [math.inf]:
+                le = "+Inf" if b == math.inf else str(b)
+                cumulative += values.get(le, 0.0)
+                out.append(f"{metric}_bucket{_fmt_labels(labels, {'le': le})} {_num(cumulative)}")
+            out.append(f"{metric}_sum{_fmt_labels(labels)} {_num(values.get('sum', 0.0))}")
+            out.append(f"{metric}_count{_fmt_labels(labels)} {_num(values.get('count', 0.0))}")
+    return "\n".join(out) + "\n"
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if _pending and _state["pid"] == os.getpid():
+        try:
+            flush()
+        except Exception:
+            pass
@@ -2,7 +2,61 @@
 # Controlled Pattern Ingestion Pipeline
 # Inserts ONLY abstract winning patterns into WPIL memory
 
-from wpil_memory import store_pattern
+import argparse
+import json
+from typing import Dict, Iterable, Iterator, List
+
+from wpil_memory import pattern_hash, store_pattern, store_patterns, stored_hashes
+
+
+REQUIRED_FIELDS = [
+    "platform",
+    "niche",
+    "intent",
+    "hook",
+    "structure",
+    "cta"
+]
+
+# Enforce structural purity
+FORBIDDEN_KEYS = [
+    "text",
+    "content",
+    "post",
+    "caption",
+    "sentiment",
+    "tone",
+    "emotion"
+]
+
+
+_REQUIRED = frozenset(REQUIRED_FIELDS)
+_FORBIDDEN = frozenset(FORBIDDEN_KEYS)
+
+
+def pattern_errors(pattern: dict) -> List[str]:
+    """
+    Returns every validation error of a pattern (empty when valid).
+    """
+
+    if not isinstance(pattern, dict):
+        return ["Pattern must be an object"]
+
+    keys = pattern.keys()
+    errors = [f"Missing required field: {f}" for f in REQUIRED_FIELDS if f in _REQUIRED - keys]
+    errors += [f"Forbidden key detected: {k}" for k in FORBIDDEN_KEYS if k in _FORBIDDEN & keys]
+    return errors
+
+
+def validate_pattern(pattern: dict) -> None:
+    """
+    Raises ValueError if the pattern is missing a required field
+    or carries content / sentiment keys.
+    """
+
+    errors = pattern_errors(pattern)
+    if errors:
+        raise ValueError(errors[0])
 
 
 def ingest_pattern(pattern: dict) -> None:
@@ -11,38 +65,70 @@ def ingest_pattern(pattern: dict) -> None:
     This function is the ONLY allowed entry point to WPIL memory.
     """
 
-    required_fields = [
-        "platform",
-        "niche",
-        "intent",
-        "hook",
-        "structure",
-        "cta"
-    ]
-
-    for field in required_fields:
-        if field not in pattern:
-            raise ValueError(f"Missing required field: {field}")
-
-    # Enforce structural purity
-    forbidden_keys = [
-        "text",
-        "content",
-        "post",
-        "caption",
-        "sentiment",
-        "tone",
-        "emotion"
-    ]
-
-    for key in forbidden_keys:
-        if key in pattern:
-            raise ValueError(f"Forbidden key detected: {key}")
-
+    validate_pattern(pattern)
     store_pattern(pattern)
 
 
-if __name__ == "__main__":
+def ingest_patterns(patterns: Iterable[dict], dry_run: bool = False) -> Dict:
+    """
+    Bulk entry point to WPIL memory.
+    Validates a stream of patterns, collects per-record errors without aborting,
+    drops structural duplicates (within the batch and against memory) by canonical
+    hash, and stores the rest with a single locked append.
+    """
+
+    known = stored_hashes()
+    seen = set()
+    batch: List[dict] = []
+    report = {"received": 0, "stored": 0, "duplicates": 0, "already_stored": 0, "errors": []}
+
+    for index, pattern in enumerate(patterns):
+        report["received"] += 1
+        errors = pattern_errors(pattern)
+        if errors:
+            report["errors"].append({"index": index, "errors": errors})
+            continue
+
+        digest = pattern_hash(pattern)
+        if digest in seen:
+            report["duplicates"] += 1
+            continue
+        seen.add(digest)
+        if digest in known:
+            report["already_stored"] += 1
+            continue
+        batch.append(pattern)
+
+    if not dry_run:
+        store_patterns(batch)
+    report["stored"] = len(batch)
+    return report
+
+
+def read_patterns(path: str) -> Iterator:
+    """
+    Streams patterns from a JSONL file (or a JSON array file).
+    Unparseable lines are yielded as None so they are reported, not fatal.
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            yield from json.load(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def _example() -> None:
     # Example controlled ingestion (manual trigger)
 
     example_pattern = {
@@ -69,3 +155,20 @@ if __name__ == "__main__":
 
     ingest_pattern(example_pattern)
     print("✅ Pattern ingested successfully.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Controlled WPIL pattern ingestion")
+    parser.add_argument("paths", nargs="*", help="pattern files (.jsonl or JSON array); none ingests the example")
+    parser.add_argument("--dry-run", action="store_true", help="validate and dedupe without writing")
+    args = parser.parse_args()
+
+    if not args.paths:
+        _example()
+    else:
+        def _all():
+            for path in args.paths:
+                yield from read_patterns(path)
+
+        result = ingest_patterns(_all(), dry_run=args.dry_run)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -1,24 +1,174 @@
 # wpil_memory.py
 # WPIL Memory Store
 # Stores ONLY abstract winning patterns (no content, no text)
+#
+# Storage: append-only JSONL log guarded by a file lock, compacted by atomic rename.
+# Reads go through an in-process index keyed by (platform, niche, intent) that only
+# re-reads the bytes appended since the last refresh.
 
+import fcntl
+import hashlib
 import json
 import os
-from typing import Dict, List
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
 
-MEMORY_FILE = "wpil_patterns.json"
+MEMORY_FILE = "wpil_patterns.jsonl"
+LEGACY_MEMORY_FILE = "wpil_patterns.json"
+LOCK_FILE = MEMORY_FILE + ".lock"
 
+# Compact once this many log lines are redundant (duplicates / torn writes)
+COMPACT_MIN_REDUNDANT = 500
 
-def _load_memory() -> List[Dict]:
-    if not os.path.exists(MEMORY_FILE):
-        return []
-    with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+INDEX_FIELDS = ("platform", "niche", "intent")
 
 
-def _save_memory(patterns: List[Dict]) -> None:
-    with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(patterns, f, ensure_ascii=False, indent=2)
+def pattern_hash(pattern: Dict) -> str:
+    """
+    Canonical structural hash: identical patterns hash the same regardless of key order.
+    """
+    canonical = json.dumps(pattern, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Index:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.patterns: List[Dict] = []
+        self.hashes: set = set()
+        self.by_key: Dict[Tuple, List[int]] = {}
+        self.postings: Dict[str, Dict[object, List[int]]] = {f: {} for f in INDEX_FIELDS}
+        self.key_postings: Dict[str, Dict[object, List[Tuple]]] = {f: {} for f in INDEX_FIELDS}
+        self.lines = 0
+        self.offset = 0
+        self.inode = None
+
+    def add(self, pattern: Dict) -> None:
+        self.lines += 1
+        digest = pattern_hash(pattern)
+        if digest in self.hashes:
+            return
+        self.hashes.add(digest)
+        pos = len(self.patterns)
+        self.patterns.append(pattern)
+        key = tuple(pattern.get(f) for f in INDEX_FIELDS)
+        if key not in self.by_key:
+            self.by_key[key] = []
+            for f, value in zip(INDEX_FIELDS, key):
+                self.key_postings[f].setdefault(value, []).append(key)
+        self.by_key[key].append(pos)
+        for f in INDEX_FIELDS:
+            self.postings[f].setdefault(pattern.get(f), []).append(pos)
+
+
+_index = _Index()
+_index_lock = threading.RLock()
+
+
+@contextmanager
+def _file_lock():
+    with open(LOCK_FILE, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _migrate_legacy() -> None:
+    if os.path.exists(MEMORY_FILE) or not os.path.exists(LEGACY_MEMORY_FILE):
+        return
+    with open(LEGACY_MEMORY_FILE, "r", encoding="utf-8") as f:
+        patterns = json.load(f)
+    _write_atomic(patterns)
+
+
+def _ensure_migrated() -> None:
+    # Lock order is always _file_lock before _index_lock, so readers migrate here,
+    # before taking the index lock, never from inside _refresh
+    if not os.path.exists(MEMORY_FILE) and os.path.exists(LEGACY_MEMORY_FILE):
+        with _file_lock():
+            _migrate_legacy()
+
+
+def _write_atomic(patterns: Iterable[Dict]) -> None:
+    tmp = f"{MEMORY_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for p in patterns:
+            f.write(json.dumps(p, ensure_ascii=False, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, MEMORY_FILE)
+
+
+def _refresh() -> _Index:
+    """
+    Brings the index up to date with the log: no I/O beyond a stat when nothing changed,
+    an incremental tail read after appends, a full reload after compaction.
+    Callers migrate the legacy file first (see _ensure_migrated).
+    """
+    with _index_lock:
+        try:
+            st = os.stat(MEMORY_FILE)
+        except FileNotFoundError:
+            _index.reset()
+            return _index
+
+        if st.st_ino != _index.inode or st.st_size < _index.offset:
+            _index.reset()
+            _index.inode = st.st_ino
+        if st.st_size == _index.offset:
+            return _index
+
+        with open(MEMORY_FILE, "rb") as f:
+            f.seek(_index.offset)
+            chunk = f.read(st.st_size - _index.offset)
+        end = chunk.rfind(b"\n") + 1  # a torn last line is picked up once it is complete
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                _index.add(json.loads(line))
+            except ValueError:
+                _index.lines += 1  # unreadable line; dropped by the next compaction
+        _index.offset += end
+        return _index
+
+
+def _append(patterns: List[Dict]) -> None:
+    data = "".join(json.dumps(p, ensure_ascii=False, separators=(",", ":")) + "\n" for p in patterns)
+    with _file_lock():
+        _migrate_legacy()
+        with open(MEMORY_FILE, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        index = _refresh()
+        if index.lines - len(index.patterns) >= COMPACT_MIN_REDUNDANT:
+            _compact_locked()
+
+
+def _compact_locked() -> int:
+    with _index_lock:
+        index = _refresh()
+        _write_atomic(index.patterns)
+        removed = index.lines - len(index.patterns)
+        _refresh()
+        return removed
+
+
+def compact() -> int:
+    """
+    Rewrites the log without duplicates or unreadable lines (atomic rename).
+    Returns the number of lines removed.
+    """
+    with _file_lock():
+        if not os.path.exists(MEMORY_FILE):
+            return 0
+        return _compact_locked()
 
 
 def store_pattern(pattern: Dict) -> None:
@@ -26,9 +176,45 @@ def store_pattern(pattern: Dict) -> None:
     Stores a single winning pattern.
     Pattern must be structural ONLY.
     """
-    patterns = _load_memory()
-    patterns.append(pattern)
-    _save_memory(patterns)
+    _append([pattern])
+
+
+def store_patterns(patterns: List[Dict]) -> None:
+    """
+    Stores many patterns in a single locked append.
+    """
+    if patterns:
+        _append(list(patterns))
+
+
+def load_patterns() -> List[Dict]:
+    """
+    Returns every stored pattern (deduplicated), oldest first.
+    """
+    _ensure_migrated()
+    with _index_lock:
+        return list(_refresh().patterns)
+
+
+def stored_hashes() -> set:
+    """
+    Returns the canonical hashes of every stored pattern (a copy).
+    """
+    _ensure_migrated()
+    with _index_lock:
+        return set(_refresh().hashes)
+
+
+def index_view() -> Tuple[List[Dict], Dict[Tuple, List[int]], Dict[str, Dict[object, List[Tuple]]]]:
+    """
+    Returns (patterns, by_key, key_postings) from the refreshed index.
+    by_key maps (platform, niche, intent) to pattern positions in ascending order;
+    key_postings maps each field value to the keys carrying it. Read-only views.
+    """
+    _ensure_migrated()
+    with _index_lock:
+        index = _refresh()
+        return index.patterns, index.by_key, index.key_postings
 
 
 def get_patterns(filter_by: Dict = None) -> List[Dict]:
@@ -36,18 +222,23 @@ def get_patterns(filter_by: Dict = None) -> List[Dict]:
     Retrieves stored patterns.
     Optional filtering by platform / niche / intent.
     """
-    patterns = _load_memory()
-    if not filter_by:
-        return patterns
-
-    filtered = []
-    for p in patterns:
-        match = True
-        for k, v in filter_by.items():
-            if p.get(k) != v:
-                match = False
-                break
-        if match:
-            filtered.append(p)
-
-    return filtered
+    _ensure_migrated()
+    with _index_lock:
+        index = _refresh()
+        if not filter_by:
+            return list(index.patterns)
+
+        if set(filter_by) == set(INDEX_FIELDS):
+            positions = index.by_key.get(tuple(filter_by[f] for f in INDEX_FIELDS), [])
+            return [index.patterns[i] for i in positions]
+
+        indexed = [f for f in INDEX_FIELDS if f in filter_by]
+        if indexed:
+            candidates = min((index.postings[f].get(filter_by[f], []) for f in indexed), key=len)
+        else:
+            candidates = range(len(index.patterns))
+
+        return [
+            index.patterns[i] for i in candidates
+            if all(index.patterns[i].get(k) == v for k, v in filter_by.items())
+        ]
@@ -0,0 +1,278 @@
+# wpil_pipeline.py
+# WPIL Batch Pipeline (see WPIL_PIPELINE_BLUEPRINT.md)
+# Raw post records (JSONL / CSV) -> decayed engagement score -> above-platform-median filter
+# -> normalization -> structural pattern extraction -> bulk ingest (dedup + one locked write).
+# Runs fully offline against local files.
+
+import argparse
+import csv
+import json
+import math
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from sic_memory import normalize_platform
+from wpil_ingest import ingest_patterns
+
+ENGAGEMENT_WEIGHTS = {"likes": 1.0, "comments": 2.0, "shares": 3.0}
+DECAY_HALF_LIFE_DAYS = 7.0
+
+# Collection rules (per niche, per weekly batch)
+MIN_POSTS_PER_NICHE = 300
+MAX_POSTS_PER_NICHE = 1000
+
+_QUESTION_END = re.compile(r"[?؟]\s*$")
+_DIGIT = re.compile(r"\d")
+_SENTENCE_SPLIT = re.compile(r"[.!?؟]+")
+_LIST_ITEM = re.compile(r"^\s*(?:[-•*▪✅👉]|\d+[.)])")
+_FIRST_PERSON = re.compile(r"\b(i|my|me|we)\b|أنا|كنت|قصتي", re.I)
+_ENGAGEMENT_CTA = re.compile(r"\b(comment|share|follow|repost|save)\b|شارك|تابع|علّق|اكتب", re.I)
+
+
+# ---------- Read ----------
+
+def read_records(path: str, report: Dict | None = None) -> Iterator[Dict]:
+    """
+    Streams raw post records from a .jsonl or .csv file.
+    JSONL lines that do not parse into an object are skipped and counted in
+    report["unparsable"], so one bad line does not abort the batch.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if isinstance(record, dict):
+                yield record
+            elif report is not None:
+                report["unparsable"] = report.get("unparsable", 0) + 1
+
+
+def _timestamp(value) -> float:
+    if value in (None, ""):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def normalize_record(record: Dict) -> Dict:
+    """
+    Normalizes one raw record into the blueprint shape (section 4).
+    Raises ValueError / TypeError / AttributeError / OverflowError on malformed input.
+    """
+    if not isinstance(record, dict):
+        raise TypeError(f"record must be an object, got {type(record).__name__}")
+    metrics = record.get("metrics") or record
+    if not isinstance(metrics, dict):
+        raise TypeError("metrics must be an object")
+    return {
+        "platform": normalize_platform(record.get("platform") or ""),
+        "niche": (record.get("niche") or "").strip(),
+        "intent": (record.get("intent") or "").strip() or None,
+        "raw_text": record.get("raw_text") or record.get("text") or "",
+        "metrics": {k: int(float(metrics.get(k) or 0)) for k in ENGAGEMENT_WEIGHTS},
+        "published_at": _timestamp(record.get("published_at")),
+    }
+
+
+# ---------- Score & filter (vectorized) ----------
+
+def score_posts(posts: List[Dict], now: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (engagement_score, keep_mask) for the batch.
+    Score = weighted engagement * 2^(-age_days / half_life); a post is kept when its
+    score exceeds its platform median. Undated posts are treated as fresh.
+    """
+    n = len(posts)
+    raw = np.zeros(n)
+    for name, weight in ENGAGEMENT_WEIGHTS.items():
+        raw += weight * np.fromiter((p["metrics"][name] for p in posts), dtype=float, count=n)
+
+    published = np.fromiter((p["published_at"] for p in posts), dtype=float, count=n)
+    age_days = np.clip((now.timestamp() - published) / 86400.0, 0.0, None)
+    age_days = np.nan_to_num(age_days, nan=0.0)
+    score = raw * np.exp2(-age_days / DECAY_HALF_LIFE_DAYS)
+
+    platforms = np.array([p["platform"] for p in posts], dtype=object)
+    _, platform_idx = np.unique(platforms, return_inverse=True)
+    medians = np.array([np.median(score[platform_idx == i]) for i in range(platform_idx.max() + 1)])
+    return score, score > medians[platform_idx]
+
+
+def normalize_scores(score: np.ndarray, keep: np.ndarray, posts: List[Dict]) -> np.ndarray:
+    """
+    Scales kept scores into [0, 1] by the best kept score on the same platform.
+    """
+    platforms = np.array([p["platform"] for p in posts], dtype=object)
+    _, platform_idx = np.unique(platforms, return_inverse=True)
+    best = np.zeros(platform_idx.max() + 1)
+    np.maximum.at(best, platform_idx[keep], score[keep])
+    denom = best[platform_idx]
+    return np.where(keep & (denom > 0), score / np.where(denom > 0, denom, 1.0), 0.0)
+
+
+def cap_per_niche(score: np.ndarray, keep: np.ndarray, posts: List[Dict], limit: int) -> np.ndarray:
+    """
+    Keeps at most `limit` best-scoring posts per niche.
+    """
+    kept = np.flatnonzero(keep)
+    if kept.size == 0:
+        return keep
+    niches = np.array([posts[i]["niche"] for i in kept], dtype=object)
+    _, niche_idx = np.unique(niches, return_inverse=True)
+    order = np.lexsort((-score[kept], niche_idx))
+    sorted_niche = niche_idx[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_niche)) + 1]
+    rank = np.arange(order.size) - np.repeat(starts, np.diff(np.r_[starts, order.size]))
+    capped = keep.copy()
+    capped[kept[order[rank >= limit]]] = False
+    return capped
+
+
+# ---------- Structural abstraction ----------
+
+def _bucket(words: int) -> int:
+    for limit in (8, 12, 16, 24):
+        if words <= limit:
+            return limit
+    return 32
+
+
+def extract_pattern(post: Dict) -> Dict:
+    """
+    Abstracts a post into a structural pattern (no text survives).
+    """
+    lines = [l.strip() for l in post["raw_text"].splitlines() if l.strip()] or [""]
+    hook_line, last_line = lines[0], lines[-1]
+
+    if _QUESTION_END.search(hook_line):
+        hook_type = "question"
+    elif _DIGIT.search(hook_line):
+        hook_type = "number"
+    else:
+        hook_type = "bold_claim"
+
+    words_per_line = sum(len(l.split()) for l in lines) / len(lines)
+    sentences = [s for s in _SENTENCE_SPLIT.split(" ".join(lines)) if s.strip()] or [""]
+    words_per_sentence = sum(len(s.split()) for s in sentences) / len(sentences)
+    list_items = sum(1 for l in lines if _LIST_ITEM.match(l))
+
+    if _QUESTION_END.search(last_line):
+        cta_type = "question"
+    elif _ENGAGEMENT_CTA.search(last_line):
+        cta_type = "engagement"
+    else:
+        cta_type = "curiosity"
+
+    intent = post["intent"]
+    if not intent:
+        if _DIGIT.search(post["raw_text"]):
+            intent = "authority"
+        elif _FIRST_PERSON.search(post["raw_text"]):
+            intent = "storytelling"
+        else:
+            intent = "educational"
+
+    return {
+        "platform": post["platform"],
+        "niche": post["niche"],
+        "intent": intent,
+        "hook": {"type": hook_type, "max_words": _bucket(len(hook_line.split()))},
+        "structure": {
+            "line_density": "one_idea_per_line" if words_per_line <= 15 else "paragraphs",
+            "sentence_length": "short" if words_per_sentence <= 12 else "medium" if words_per_sentence <= 20 else "long",
+            "format": "list" if list_items >= 3 else "flow",
+        },
+        "cta": {"type": cta_type, "position": "final_line"},
+    }
+
+
+# ---------- Run ----------
+
+def run_pipeline(records: Iterable[Dict], now: datetime | None = None, dry_run: bool = False,
+                 report: Dict | None = None) -> Dict:
+    """
+    Runs one batch end to end and returns a report. Patterns go through
+    ingest_patterns (one file lock, one append) unless dry_run is set.
+    "unparsable" counts input lines read_records skipped (pass the same report to
+    both), "invalid" records that parsed but did not normalize and "rejected"
+    patterns that failed ingest validation.
+    """
+    now = now or datetime.now(timezone.utc)
+    report = report if report is not None else {}
+    report.setdefault("unparsable", 0)
+    report.update({"read": 0, "invalid": 0, "above_median": 0, "capped": 0, "patterns": 0,
+              "duplicates": 0, "already_stored": 0, "rejected": 0, "stored": 0, "niches_below_minimum": {}})
+
+    posts: List[Dict] = []
+    for record in records:
+        report["read"] += 1
+        try:
+            post = normalize_record(record)
+        except (TypeError, ValueError, AttributeError, OverflowError):  # OverflowError: int(float("inf"))
+            report["invalid"] += 1
+            continue
+        if post["platform"] and post["niche"]:
+            posts.append(post)
+        else:
+            report["invalid"] += 1
+
+    if not posts:
+        return report
+
+    niche_names, niche_counts = np.unique(np.array([p["niche"] for p in posts], dtype=object), return_counts=True)
+    report["niches_below_minimum"] = {
+        str(n): int(c) for n, c in zip(niche_names, niche_counts) if c < MIN_POSTS_PER_NICHE
+    }
+
+    score, keep = score_posts(posts, now)
+    report["above_median"] = int(keep.sum())
+    capped = cap_per_niche(score, keep, posts, MAX_POSTS_PER_NICHE)
+    report["capped"] = int(keep.sum() - capped.sum())
+    normalized = normalize_scores(score, capped, posts)
+
+    # Best score first, so a structural duplicate keeps the strongest post; the score itself
+    # stays out of the pattern, where it would defeat the structural hash
+    order = np.flatnonzero(capped)[np.argsort(-normalized[capped], kind="stable")]
+    extracted = [extract_pattern(posts[i]) for i in order]
+    report["patterns"] = len(extracted)
+
+    ingested = ingest_patterns(extracted, dry_run=dry_run)
+    report["duplicates"] = ingested["duplicates"]
+    report["already_stored"] = ingested["already_stored"]
+    report["rejected"] = len(ingested["errors"])
+    report["stored"] = ingested["stored"]
+    return report
+
+
+def _records(paths: List[str], report: Dict) -> Iterator[Dict]:
+    for path in paths:
+        yield from read_records(path, report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weekly WPIL batch: raw posts -> winning patterns")
+    parser.add_argument("paths", nargs="+", help="raw post files (.jsonl or .csv)")
+    parser.add_argument("--now", help="reference time for decay (ISO 8601), defaults to now")
+    parser.add_argument("--dry-run", action="store_true", help="score and extract without writing")
+    args = parser.parse_args()
+
+    now = datetime.fromisoformat(args.now.replace("Z", "+00:00")) if args.now else None
+    if now is not None and now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    report: Dict = {}
+    run_pipeline(_records(args.paths, report), now=now, dry_run=args.dry_run, report=report)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -2,8 +2,60 @@
 # Winning Pattern Selection Engine
 # Chooses the best matching winning pattern for the current signal
 
-from typing import Dict, List
-from wpil_memory import load_patterns
+import heapq
+from typing import Dict, List, Tuple
+from wpil_memory import INDEX_FIELDS, index_view
+
+# Priority weights: platform > niche > intent
+MATCH_WEIGHTS = {"platform": 3, "niche": 2, "intent": 1}
+
+
+def _rank(signal_key: Tuple, k: int, patterns: List[Dict], by_key: Dict, key_postings: Dict) -> List[Dict]:
+    # Score each distinct (platform, niche, intent) key that shares a field with the
+    # signal, not each pattern: every pattern under a key has the same score.
+    key_scores: Dict[Tuple, int] = {}
+    for field, value in zip(INDEX_FIELDS, signal_key):
+        weight = MATCH_WEIGHTS[field]
+        for key in key_postings[field].get(value, ()):
+            key_scores[key] = key_scores.get(key, 0) + weight
+
+    levels: Dict[int, List[Tuple]] = {}
+    for key, score in key_scores.items():
+        levels.setdefault(score, []).append(key)
+
+    ranked: List[Dict] = []
+    for score in sorted(levels, reverse=True):
+        # Within a score level, oldest pattern first (same tie-break as a stable sort)
+        for pos in heapq.merge(*(by_key[key] for key in levels[score])):
+            ranked.append(patterns[pos])
+            if len(ranked) == k:
+                return ranked
+    return ranked
+
+
+def select_winning_patterns(signals: List[Dict], k: int = 3) -> List[List[Dict]]:
+    """
+    Ranks the top-k winning patterns for many content signals in one pass.
+    Returns one ranked list per signal, best first; a list is empty when no
+    stored pattern shares a platform, niche or intent with the signal.
+    Identical signals are ranked once; each still gets its own list.
+    Raises ValueError when k < 1.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+    patterns, by_key, key_postings = index_view()
+
+    answers: Dict[Tuple, List[Dict]] = {}
+    results: List[List[Dict]] = []
+
+    for signal in signals:
+        signal_key = tuple(signal.get(f) for f in INDEX_FIELDS)
+        if signal_key not in answers:
+            answers[signal_key] = _rank(signal_key, k, patterns, by_key, key_postings)
+        results.append(list(answers[signal_key]))
+
+    return results
 
 
 def select_winning_pattern(content_signal: Dict) -> Dict:
@@ -15,36 +67,14 @@ def select_winning_pattern(content_signal: Dict) -> Dict:
     3. intent
     """
 
-    patterns: List[Dict] = load_patterns()
+    patterns, _, _ = index_view()
 
     if not patterns:
         raise RuntimeError("WPIL has no stored patterns.")
 
-    platform = content_signal.get("platform")
-    niche = content_signal.get("niche")
-    intent = content_signal.get("intent")
-
-    scored_patterns = []
-
-    for pattern in patterns:
-        score = 0
+    ranked = select_winning_patterns([content_signal], k=1)[0]
 
-        if pattern.get("platform") == platform:
-            score += 3
-
-        if pattern.get("niche") == niche:
-            score += 2
-
-        if pattern.get("intent") == intent:
-            score += 1
-
-        if score > 0:
-            scored_patterns.append((score, pattern))
-
-    if not scored_patterns:
+    if not ranked:
         raise RuntimeError("No compatible winning pattern found.")
 
-    # Choose the highest scoring pattern
-    scored_patterns.sort(key=lambda x: x[0], reverse=True)
-
-    return scored_patterns[0][1]
+    return ranked[0]